@@ -2,28 +2,102 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import joblib
+import sys
+import time
 from pathlib import Path
 
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / 'scripts'))
+
+from create_features import DEFAULT_STATS_PATH, FeaturePlan, SpotifyFeatureEngineer
+from serve_model import default_model_path
+from src.data_processing.compact import compact_frame
+from src.data_processing.csv_cache import read_csv_cached
+from src.data_processing.data_loader import SpotifyDataLoader
+from src.models.model_server import DEFAULT_FEATURES_PATH, HitPredictor
+from src.models.prediction_cache import PredictionCache
+
 st.title("🎵 Spotify Hit Predictor")
 
-# Try different path combinations
-possible_paths = [
-    'spotify-recommendation-optimization/data/processed/spotify_features_engineered.csv',
-    'data/processed/spotify_features_engineered.csv',
-    '../data/processed/spotify_features_engineered.csv'
-]
+
+# Loaders are cached per process and keyed on (path, mtime), so reruns
+# triggered by widgets reuse them and edited files are picked up.
+@st.cache_resource
+def load_timings():
+    """Process-wide record of cold vs warm load times"""
+    return {}
+
+
+def file_key(path):
+    path = Path(path).resolve()
+    return str(path), path.stat().st_mtime_ns
+
+
+@st.cache_data(show_spinner=False)
+def load_dataset(path, mtime_ns):
+    load_timings().setdefault('dataset', {}).setdefault('loads', 0)
+    load_timings()['dataset']['loads'] += 1
+    # Kept resident for the whole session, so hold it in compact dtypes
+    return compact_frame(read_csv_cached(path))
+
+
+@st.cache_resource(show_spinner=False)
+def load_model(model_path, model_mtime_ns, features_path, features_mtime_ns,
+               stats_path, stats_mtime_ns):
+    load_timings().setdefault('model', {}).setdefault('loads', 0)
+    load_timings()['model']['loads'] += 1
+    predictor = HitPredictor.load(model_path, features_path)
+    engineer = SpotifyFeatureEngineer().load_stats(stats_path)
+    return predictor, FeaturePlan(predictor.feature_names, engineer=engineer)
+
+
+@st.cache_resource(show_spinner=False)
+def load_prediction_cache(model_path):
+    """Session-independent prediction cache, cleared when the model file changes"""
+    return PredictionCache(max_entries=10_000, model_path=model_path)
+
+
+@st.cache_data(show_spinner=False)
+def load_typical_track(path, mtime_ns, columns):
+    """Median value of each audio feature, used as the slider baseline"""
+    return load_dataset(path, mtime_ns)[list(columns)].median().to_dict()
+
+
+def timed_load(name, loader, *args):
+    """Call a cached loader and record whether it was a cold or warm hit"""
+    entry = load_timings().setdefault(name, {'loads': 0})
+    loads_before = entry['loads']
+    start = time.perf_counter()
+    value = loader(*args)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    entry['cold_ms' if entry['loads'] > loads_before else 'warm_ms'] = elapsed_ms
+    return value
+
+
+# Resolved from config/data_config.yaml, independent of the working directory
+path = SpotifyDataLoader().path('engineered')
 
 df = None
-for path in possible_paths:
-    if Path(path).exists():
-        df = pd.read_csv(path)
-        st.success(f"✅ Data loaded from: {path}")
-        break
+if path.exists():
+    data_key = file_key(path)
+    df = timed_load('dataset', load_dataset, *data_key)
+    st.success(f"✅ Data loaded from: {path}")
 
 if df is None:
     st.error("❌ Could not find data file")
     st.stop()
 
+try:
+    predictor, plan = timed_load(
+        'model', load_model,
+        *file_key(default_model_path()), *file_key(DEFAULT_FEATURES_PATH),
+        *file_key(DEFAULT_STATS_PATH)
+    )
+except (OSError, ValueError) as exc:
+    predictor, plan = None, None
+    st.warning(f"⚠️ Model unavailable, using rule-based score: {exc}")
+
 # Simple prediction interface
 st.subheader("🎯 Predict Song Success")
 
@@ -31,8 +105,18 @@ danceability = st.slider("🕺 Danceability", 0.0, 1.0, 0.5)
 energy = st.slider("⚡ Energy", 0.0, 1.0, 0.5)
 valence = st.slider("😊 Happiness", 0.0, 1.0, 0.5)
 
-# Simple rule-based prediction for now
-hit_score = (danceability + energy + valence) / 3
+if predictor is not None:
+    # Start from a typical track and apply the slider values
+    track = load_typical_track(*data_key, tuple(plan.engineer.audio_features))
+    track.update(danceability=danceability, energy=energy, valence=valence)
+    # Slider positions repeat across reruns; only new ones reach the forest
+    cache = load_prediction_cache(str(default_model_path()))
+    row = plan.execute_record(track)
+    hit_score = float(cache.get_or_compute([cache.feature_key(row)], [row],
+                                           predictor.predict_proba)[0])
+else:
+    # Simple rule-based prediction
+    hit_score = (danceability + energy + valence) / 3
 
 if st.button("🎯 Predict Hit"):
     if hit_score > 0.6:
@@ -41,4 +125,16 @@ if st.button("🎯 Predict Hit"):
     else:
         st.info(f"📊 Needs Work. Score: {hit_score:.1%}")
 
-st.write(f"Dataset: {len(df)} songs loaded")
\ No newline at end of file
+st.write(f"Dataset: {len(df)} songs loaded")
+
+with st.expander("⏱️ Load timings"):
+    rows = [
+        {'resource': name,
+         'cold load (ms)': entry.get('cold_ms', np.nan),
+         'warm load (ms)': entry.get('warm_ms', np.nan),
+         'loads': entry['loads']}
+        for name, entry in load_timings().items()
+    ]
+    st.table(pd.DataFrame(rows))
+    if predictor is not None:
+        st.json(load_prediction_cache(str(default_model_path())).stats())
@@ -0,0 +1,80 @@
+"""
+Benchmark: multi-core feature engineering scaling
+Times parallel_create_features for 1..N worker processes against the
+single-process pipeline on synthetic tracks
+
+Usage:
+    python benchmarks/bench_parallel_features.py --rows 2000000 --max-workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+from create_features import SpotifyFeatureEngineer, feature_worker_pool, parallel_create_features
+from synthetic_data import make_tracks
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - start
+
+
+def run(n_rows, max_workers):
+    df = make_tracks(n_rows)
+    engineer = SpotifyFeatureEngineer().fit(df)
+    results = {
+        "rows": n_rows,
+        "copying_s": timed(lambda: SpotifyFeatureEngineer().create_all_features(df)),
+        "single_pass_s": timed(lambda: engineer.create_all_features(df, copy=False)),
+        "workers": [],
+    }
+    for workers in range(1, max_workers + 1):
+        with feature_worker_pool(workers) as pool:
+            # Warm the pool so process start-up is not counted
+            list(pool.map(abs, range(workers)))
+            elapsed = timed(lambda: parallel_create_features(engineer, df, workers, pool))
+        results["workers"].append({
+            "workers": workers,
+            "seconds": elapsed,
+            "speedup_vs_copying": results["copying_s"] / elapsed,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for parallel feature engineering")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.max_workers)
+
+    print("🧵 PARALLEL FEATURE ENGINEERING BENCHMARK")
+    print("=" * 50)
+    print(f"   Rows: {results['rows']:,}  (CPUs available: {os.cpu_count()})")
+    print(f"   Copying pipeline:  {results['copying_s']:.3f} s")
+    print(f"   Single pass:       {results['single_pass_s']:.3f} s")
+    for entry in results["workers"]:
+        print(f"   {entry['workers']:>2} workers:        {entry['seconds']:.3f} s "
+              f"({entry['speedup_vs_copying']:.1f}x vs copying)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
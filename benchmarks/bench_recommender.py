@@ -0,0 +1,106 @@
+"""
+Benchmark: hit-aware recommendation latency
+Builds a synthetic catalog, an IVF similarity index and a forest shaped like
+the saved model, then reports per-query latency percentiles for cold
+(model call per query) and warm (cached hit scores) recommendations
+
+Usage:
+    python benchmarks/bench_recommender.py --rows 1000000 --k 50
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+from create_features import FeaturePlan, SpotifyFeatureEngineer
+from src.models.model_server import read_feature_list
+from src.models.recommender import HitAwareRecommender
+from src.models.similarity import SimilarityIndex
+from src.models.tree_engine import CompactForest
+from synthetic_data import make_tracks
+
+
+def build_forest(plan, n_estimators=100, seed=42):
+    """Forest on the deployed model's feature list, trained on synthetic hits"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    tracks = make_tracks(5000, seed=seed)
+    X = plan.execute(tracks)
+    y = (tracks["energy"] + tracks["danceability"] + tracks["valence"]
+         + np.random.default_rng(seed).normal(0, 0.3, len(tracks)) > 1.6).astype(int)
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=15,
+                                  random_state=seed).fit(X.to_numpy(), y)
+
+
+def latency_ms(fn, seeds):
+    timings = []
+    for seed in seeds:
+        start = time.perf_counter()
+        fn(int(seed))
+        timings.append((time.perf_counter() - start) * 1000)
+    p50, p90, p99 = np.percentile(timings, [50, 90, 99])
+    return {"p50_ms": p50, "p90_ms": p90, "p99_ms": p99}
+
+
+def run(n_rows, k=50, n_candidates=200, n_probe=8, n_queries=300):
+    tracks = make_tracks(n_rows)
+    engineer = SpotifyFeatureEngineer().fit(tracks)
+    plan = FeaturePlan(read_feature_list(), engineer=engineer)
+    forest = CompactForest.from_sklearn(build_forest(plan))
+
+    start = time.perf_counter()
+    index = SimilarityIndex.from_frame(tracks, n_lists=int(np.sqrt(n_rows)))
+    build_s = time.perf_counter() - start
+
+    recommender = HitAwareRecommender.from_catalog(
+        tracks, plan, lambda rows: forest.predict_proba(rows)[:, 1], index=index,
+        n_candidates=n_candidates, n_probe=n_probe,
+    )
+    seeds = np.random.default_rng(0).choice(n_rows, n_queries, replace=False)
+    recommend = lambda seed: recommender.recommend(track_id=seed, k=k)
+
+    cold = latency_ms(recommend, seeds)
+    warm = latency_ms(recommend, seeds)
+    return {
+        "rows": n_rows, "k": k, "n_candidates": n_candidates, "n_probe": n_probe,
+        "index_build_s": build_s, "cold": cold, "warm": warm,
+        "cache_hits": recommender.cache.hits, "cache_misses": recommender.cache.misses,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latency of hit-aware recommendations")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--output", help="optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    result = run(args.rows, args.k, args.candidates, args.n_probe)
+
+    print("🎧 RECOMMENDER BENCHMARK")
+    print("=" * 50)
+    print(f"   Catalog: {result['rows']:,} tracks (index build {result['index_build_s']:.1f} s)")
+    print(f"   k={result['k']}, {result['n_candidates']} candidates, n_probe={result['n_probe']}")
+    for name in ("cold", "warm"):
+        p = result[name]
+        print(f"   {name:>4}: p50 {p['p50_ms']:.2f} ms, p90 {p['p90_ms']:.2f} ms, "
+              f"p99 {p['p99_ms']:.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: similarity index recall versus latency
+Builds exact and IVF indexes over synthetic catalogs and reports per-query
+latency, recall@k against brute force, and incremental insert cost
+
+Usage:
+    python benchmarks/bench_similarity.py --rows 100000 1000000 --probes 1 4 8 16 32
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.models.similarity import SimilarityIndex
+
+
+def make_features(n_rows, seed=42):
+    """Synthetic audio features with the same shapes as the test fixtures"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.beta(2, 5, n_rows),       # acousticness
+        rng.beta(2, 2, n_rows),       # danceability
+        rng.beta(2, 2, n_rows),       # energy
+        rng.beta(1, 10, n_rows),      # instrumentalness
+        rng.beta(1, 9, n_rows),       # liveness
+        rng.normal(-8, 4, n_rows),    # loudness
+        rng.beta(1, 10, n_rows),      # speechiness
+        rng.normal(120, 30, n_rows),  # tempo
+        rng.beta(2, 2, n_rows),       # valence
+    ])
+
+
+def per_query_ms(fn, queries):
+    """Mean latency of answering ``queries`` one at a time"""
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def recall(approx_ids, exact_ids):
+    k = exact_ids.shape[1]
+    return float(np.mean([len(np.intersect1d(a, e)) / k for a, e in zip(approx_ids, exact_ids)]))
+
+
+def run(n_rows, probes, k=10, n_queries=200, n_lists=None, insert_rows=1000):
+    features = make_features(n_rows)
+    queries = make_features(n_queries, seed=7)
+    n_lists = n_lists or max(16, int(np.sqrt(n_rows)))
+
+    start = time.perf_counter()
+    index = SimilarityIndex.build(features, n_lists=n_lists)
+    result = {"rows": n_rows, "k": k, "n_lists": n_lists,
+              "build_s": time.perf_counter() - start}
+
+    start = time.perf_counter()
+    exact_ids, _ = index.search(queries, k)
+    result["exact_batch_ms_per_query"] = (time.perf_counter() - start) / n_queries * 1000
+    result["exact_single_ms"] = per_query_ms(lambda q: index.search(q, k), queries[:20])
+
+    result["ivf"] = []
+    for n_probe in probes:
+        approx_ids, _ = index.search(queries, k, n_probe=n_probe)
+        result["ivf"].append({
+            "n_probe": n_probe,
+            "recall": recall(approx_ids, exact_ids),
+            "single_ms": per_query_ms(lambda q: index.search(q, k, n_probe=n_probe), queries),
+        })
+
+    new_tracks = make_features(insert_rows, seed=11)
+    start = time.perf_counter()
+    index.add(new_tracks)
+    result["insert_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.compact()
+    result["compact_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall vs latency for the similarity index")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, help="IVF lists (default sqrt(rows))")
+    parser.add_argument("--output", help="optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    print("🔎 SIMILARITY INDEX BENCHMARK")
+    print("=" * 50)
+    results = []
+    for n_rows in args.rows:
+        result = run(n_rows, args.probes, k=args.k, n_lists=args.lists)
+        results.append(result)
+        print(f"\n   {n_rows:,} tracks, {result['n_lists']} lists "
+              f"(build {result['build_s']:.2f} s)")
+        print(f"   Exact: {result['exact_single_ms']:.2f} ms/query single, "
+              f"{result['exact_batch_ms_per_query']:.3f} ms/query batched")
+        for row in result["ivf"]:
+            print(f"   IVF n_probe={row['n_probe']:>4}: recall@{args.k} {row['recall']:.3f}, "
+                  f"{row['single_ms']:.3f} ms/query")
+        print(f"   Insert 1,000 tracks: {result['insert_ms']:.1f} ms "
+              f"(compact {result['compact_ms']:.1f} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: sklearn RandomForest vs CompactForest inference
+Compares single-track latency and batch throughput, and checks that the
+compact engine reproduces sklearn's probabilities
+
+Usage:
+    python benchmarks/bench_tree_engine.py --rows 1000 100000 1000000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.models.tree_engine import CompactForest, export_forest
+
+
+def best_time(fn, repeat):
+    """Best wall time of ``repeat`` calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def build_model(n_estimators, max_depth, n_features, seed=42):
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    X = rng.random((2000, n_features))
+    y = (X[:, 0] + X[:, 1] + rng.normal(0, 0.3, len(X)) > 1).astype(int)
+    return RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, min_samples_leaf=4, random_state=seed
+    ).fit(X, y)
+
+
+def run(rows, n_estimators=300, max_depth=15, n_features=10, threads=1):
+    model = build_model(n_estimators, max_depth, n_features)
+    rng = np.random.default_rng(0)
+    results = {"n_estimators": n_estimators, "max_depth": max_depth, "batches": []}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_forest(model, tmp)
+        results["load_ms"] = best_time(lambda: CompactForest.load(tmp), 5) * 1000
+        forest = CompactForest.load(tmp)
+
+        X_check = rng.random((5000, n_features))
+        results["max_abs_diff"] = float(
+            np.abs(forest.predict_proba(X_check) - model.predict_proba(X_check)).max()
+        )
+
+        single = rng.random((1, n_features))
+        results["single_ms"] = {
+            "sklearn": best_time(lambda: model.predict_proba(single), 20) * 1000,
+            "compact": best_time(lambda: forest.predict_proba(single), 20) * 1000,
+        }
+
+        for n_rows in rows:
+            X = rng.random((n_rows, n_features))
+            repeat = 3 if n_rows <= 100_000 else 1
+            sk = best_time(lambda: model.predict_proba(X), repeat)
+            compact = best_time(lambda: forest.predict_proba(X, n_threads=threads), repeat)
+            results["batches"].append({
+                "rows": n_rows,
+                "sklearn_rows_per_s": n_rows / sk,
+                "compact_rows_per_s": n_rows / compact,
+                "speedup": sk / compact,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare sklearn and CompactForest inference")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--depth", type=int, default=15)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--output", help="optional JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.trees, args.depth, threads=args.threads)
+
+    print("🌲 TREE ENGINE BENCHMARK")
+    print("=" * 50)
+    print(f"   Forest: {args.trees} trees, max_depth={args.depth}")
+    print(f"   Load (mmap): {results['load_ms']:.2f} ms")
+    print(f"   Max |p_sklearn - p_compact|: {results['max_abs_diff']:.2e}")
+    single = results["single_ms"]
+    print(f"   Single track: sklearn {single['sklearn']:.2f} ms, "
+          f"compact {single['compact']:.3f} ms ({single['sklearn'] / single['compact']:.0f}x)")
+    for batch in results["batches"]:
+        print(f"   {batch['rows']:>9,} rows: sklearn {batch['sklearn_rows_per_s']:>10,.0f} rows/s, "
+              f"compact {batch['compact_rows_per_s']:>10,.0f} rows/s ({batch['speedup']:.2f}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark suite: CSV load, feature engineering, training and inference
+Runs every stage of the pipeline on synthetic labelled tracks (1k-10M rows)
+and saves the timings as JSON, one file per commit, so regressions can be
+spotted by comparing two runs
+
+Usage:
+    python benchmarks/run_benchmarks.py --rows 1000 100000 1000000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+from create_features import FeaturePlan, SpotifyFeatureEngineer
+from src.analytics.profiling import PipelineProfiler
+from src.data_processing.csv_cache import read_csv_cached
+from src.models.model_server import read_feature_list
+from src.models.tree_engine import CompactForest
+from src.models.tuning import make_estimator
+from synthetic_data import SIZES, write_tracks_csv
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_DATA_DIR = BENCH_DIR / ".data"
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+
+# Best configuration found by the notebook's grid search
+MODEL_PARAMS = {"max_depth": 10, "min_samples_leaf": 4, "min_samples_split": 10}
+
+
+def best_time(fn, repeat):
+    """Best wall time of ``repeat`` calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def stage_times(run_stages, repeat):
+    """Best wall time of every profiled stage over ``repeat`` runs"""
+    best = {}
+    for _ in range(repeat):
+        profiler = PipelineProfiler(trace_memory=False)
+        run_stages(profiler)
+        for record in profiler.stages:
+            name = record["stage"]
+            best[name] = min(best.get(name, np.inf), record["wall_s"])
+    return best
+
+
+def bench_load(csv_path, repeat):
+    metrics = {"csv_mb": os.path.getsize(csv_path) / 1e6}
+    metrics["read_csv_s"] = best_time(lambda: pd.read_csv(csv_path), repeat)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        read_csv_cached(csv_path, cache_dir=cache_dir)
+        metrics["read_csv_cached_cold_s"] = time.perf_counter() - start
+        metrics["read_csv_cached_warm_s"] = best_time(
+            lambda: read_csv_cached(csv_path, cache_dir=cache_dir), repeat
+        )
+    return metrics
+
+
+def bench_features(df, repeat):
+    metrics = {"fit_s": best_time(lambda: SpotifyFeatureEngineer().fit(df), repeat)}
+    engineer = SpotifyFeatureEngineer().fit(df)
+
+    def copying(profiler):
+        engineer.profiler = profiler
+        engineer.create_all_features(df)
+
+    def single_pass(profiler):
+        engineer.profiler = profiler
+        engineer.create_all_features(df, copy=False)
+
+    for mode, run_stages in (("copying", copying), ("single_pass", single_pass)):
+        for stage, seconds in stage_times(run_stages, repeat).items():
+            metrics[f"{mode}.{stage}_s"] = seconds
+    engineer.profiler = None
+
+    plan = FeaturePlan(read_feature_list(), engineer=engineer)
+    metrics["model_plan_s"] = best_time(lambda: plan.execute(df), repeat)
+    return metrics, plan.execute(df).to_numpy(dtype=np.float64)
+
+
+def bench_training(X, y, n_estimators, max_rows):
+    rows = min(len(y), max_rows)
+    model = make_estimator("random_forest", dict(MODEL_PARAMS, n_estimators=n_estimators))
+    start = time.perf_counter()
+    model.fit(X[:rows], y[:rows])
+    return {"rows": rows, "fit_s": time.perf_counter() - start}, model
+
+
+def bench_inference(model, X, repeat, max_rows, n_single=200):
+    forest = CompactForest.from_sklearn(model)
+    metrics = {}
+    for name, predict in (("sklearn", model.predict_proba), ("compact", forest.predict_proba)):
+        timings = []
+        for i in range(n_single):
+            row = X[i % len(X)][None, :]
+            start = time.perf_counter()
+            predict(row)
+            timings.append((time.perf_counter() - start) * 1000)
+        p50, p99 = np.percentile(timings, [50, 99])
+        metrics[f"{name}.single_p50_ms"] = p50
+        metrics[f"{name}.single_p99_ms"] = p99
+
+        batch = X[:max_rows]
+        metrics[f"{name}.batch_rows_per_s"] = len(batch) / best_time(lambda: predict(batch), repeat)
+    return metrics
+
+
+def run(n_rows, data_dir=DEFAULT_DATA_DIR, repeat=3, n_estimators=100,
+        max_fit_rows=100_000, max_predict_rows=1_000_000):
+    """Every benchmark at one dataset size; returns a flat ``metrics`` dict"""
+    csv_path = write_tracks_csv(n_rows, Path(data_dir) / f"tracks_{n_rows}.csv")
+    # Large sizes are measured once; repeats would only multiply the run time
+    repeat = repeat if n_rows <= 100_000 else 1
+    metrics = {}
+
+    for name, value in bench_load(csv_path, repeat).items():
+        metrics[f"load.{name}"] = value
+    df = pd.read_csv(csv_path)
+
+    feature_metrics, X = bench_features(df, repeat)
+    for name, value in feature_metrics.items():
+        metrics[f"features.{name}"] = value
+
+    train_metrics, model = bench_training(X, df["target"].to_numpy(), n_estimators, max_fit_rows)
+    for name, value in train_metrics.items():
+        metrics[f"train.{name}"] = value
+
+    for name, value in bench_inference(model, X, repeat, max_predict_rows).items():
+        metrics[f"predict.{name}"] = value
+    return {"rows": n_rows, "metrics": metrics}
+
+
+def environment():
+    """Commit and library versions the numbers were measured with"""
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current, baseline, threshold=0.2, noise_floor_s=1e-3):
+    """Metrics that got more than ``threshold`` worse than the baseline
+
+    Metrics ending in ``_s`` or ``_ms`` are times (lower is better) and
+    ``_per_s`` are throughputs (higher is better); other values are context.
+    Timings below ``noise_floor_s`` in both runs are too noisy to compare.
+    """
+    baseline_runs = {r["rows"]: r["metrics"] for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = baseline_runs.get(result["rows"], {})
+        for name, value in result["metrics"].items():
+            old = before.get(name)
+            if not old or not value:
+                continue
+            if name.endswith("_per_s"):
+                change = old / value - 1
+            elif name.endswith(("_s", "_ms")):
+                scale = 1e-3 if name.endswith("_ms") else 1
+                if max(old, value) * scale < noise_floor_s:
+                    continue
+                change = value / old - 1
+            else:
+                continue
+            if change > threshold:
+                regressions.append({"rows": result["rows"], "metric": name,
+                                    "baseline": old, "current": value, "slowdown": change})
+    return regressions
+
+
+def print_results(results):
+    print("📏 SPOTIFY PIPELINE BENCHMARKS")
+    print("=" * 50)
+    env = results["environment"]
+    print(f"   Commit {env['commit']}, Python {env['python']}, sklearn {env['sklearn']}, "
+          f"{env['cpu_count']} CPUs")
+    for result in results["results"]:
+        print(f"\n📊 {result['rows']:,} rows")
+        for name, value in result["metrics"].items():
+            if name.endswith("_per_s"):
+                print(f"   {name:45s} {value:12,.0f} rows/s")
+            elif name.endswith("_s"):
+                print(f"   {name:45s} {value * 1000:12.1f} ms")
+            elif name.endswith("_ms"):
+                print(f"   {name:45s} {value:12.3f} ms")
+            else:
+                print(f"   {name:45s} {value:12,.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Spotify hit prediction pipeline")
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES[:4],
+                        help=f"dataset sizes (calibrated for {', '.join(f'{s:,}' for s in SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-fit-rows", type=int, default=100_000,
+                        help="training rows used for the fit benchmark")
+    parser.add_argument("--max-predict-rows", type=int, default=1_000_000,
+                        help="rows scored by the batch inference benchmark")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR),
+                        help="where generated CSVs are kept between runs")
+    parser.add_argument("--output", help="JSON results file (default: results/<commit>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        "environment": environment(),
+        "config": {"repeat": args.repeat, "n_estimators": args.n_estimators,
+                   "max_fit_rows": args.max_fit_rows, "max_predict_rows": args.max_predict_rows},
+        "results": [run(n_rows, args.data_dir, args.repeat, args.n_estimators,
+                        args.max_fit_rows, args.max_predict_rows) for n_rows in args.rows],
+    }
+    print_results(results)
+
+    output = Path(args.output or DEFAULT_RESULTS_DIR / f"{results['environment']['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"\n💾 Results saved to: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print(f"\n🔎 {len(regressions)} regression(s) vs {args.compare}")
+        for r in regressions:
+            print(f"   {r['rows']:>10,} rows  {r['metric']:45s} {r['slowdown']:+.0%}")
+        results["regressions"] = regressions
+    return results
+
+
+if __name__ == "__main__":
+    main()
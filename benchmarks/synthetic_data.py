@@ -0,0 +1,66 @@
+"""
+Synthetic track generators for the benchmarks
+Scaled-up versions of create_sample_data_with_target in
+tests/test_features.py: same feature distributions and hit rule, any size
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Dataset sizes the benchmark suite is calibrated for
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# Rows generated per block when writing large CSVs
+CSV_BLOCK_ROWS = 1_000_000
+
+
+def make_tracks(n_rows, seed=42):
+    """Synthetic audio features with the same shapes as the test fixtures"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'acousticness': rng.beta(2, 5, n_rows),
+        'danceability': rng.beta(2, 2, n_rows),
+        'energy': rng.beta(2, 2, n_rows),
+        'instrumentalness': rng.beta(1, 10, n_rows),
+        'liveness': rng.beta(1, 9, n_rows),
+        'loudness': rng.normal(-8, 4, n_rows),
+        'speechiness': rng.beta(1, 10, n_rows),
+        'tempo': rng.normal(120, 30, n_rows),
+        'valence': rng.beta(2, 2, n_rows),
+    })
+
+
+def make_labelled_tracks(n_rows, seed=42):
+    """``make_tracks`` plus a ``target`` column, half of the songs hits"""
+    df = make_tracks(n_rows, seed)
+    # Energetic, danceable, happy, produced songs are more likely to be hits
+    hit_probability = (
+        df['energy'] * 0.3 +
+        df['danceability'] * 0.3 +
+        df['valence'] * 0.2 +
+        (1 - df['acousticness']) * 0.2
+    )
+    hit_probability += np.random.default_rng(seed + 1).normal(0, 0.1, n_rows)
+    hit_probability = np.clip(hit_probability, 0, 1)
+    df['target'] = (hit_probability > hit_probability.median()).astype(int)
+    return df
+
+
+def write_tracks_csv(n_rows, path, seed=42):
+    """Write ``n_rows`` labelled tracks to ``path``, reusing an existing file
+
+    Large files are generated block by block so memory stays bounded; each
+    block is labelled against its own median.
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    for i, start in enumerate(range(0, n_rows, CSV_BLOCK_ROWS)):
+        block = make_labelled_tracks(min(CSV_BLOCK_ROWS, n_rows - start), seed + i)
+        block.to_csv(tmp, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    tmp.replace(path)
+    return path
@@ -6,8 +6,6 @@ Create smart features that help ML models predict song success
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-import warnings
-warnings.filterwarnings('ignore')
 
 class SpotifyFeatureEngineer:
     """Create features that predict song success"""
@@ -0,0 +1,61 @@
+"""
+Build the "songs like this" similarity index
+Indexes the standardized audio features of every track and optionally
+prints the nearest neighbours of a song
+
+Usage:
+    python scripts/build_similarity_index.py
+    python scripts/build_similarity_index.py --query "Mask Off" --k 5
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.data_processing.csv_cache import read_csv_cached
+from src.models.similarity import AUDIO_FEATURES, SimilarityIndex
+
+DEFAULT_INPUT = ROOT_DIR / "data" / "raw" / "Spotify_Data.csv"
+DEFAULT_INDEX_PATH = ROOT_DIR / "models" / "similarity_index"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the audio-feature similarity index")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT))
+    parser.add_argument("--output", default=str(DEFAULT_INDEX_PATH))
+    parser.add_argument(
+        "--lists", type=int, default=0,
+        help="IVF lists for approximate search (0 = exact only; try sqrt(tracks))"
+    )
+    parser.add_argument("--query", help="song title to find similar tracks for")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-probe", type=int, help="lists to scan per approximate query")
+    args = parser.parse_args(argv)
+
+    print("🔎 SPOTIFY SIMILARITY INDEX")
+    print("=" * 50)
+
+    df = read_csv_cached(args.input, columns=AUDIO_FEATURES + ["song_title", "artist"])
+    index = SimilarityIndex.from_frame(df, n_lists=args.lists)
+    index.save(args.output)
+    print(f"✅ Indexed {index.n_tracks:,} tracks ({index.n_lists} IVF lists)")
+    print(f"   Saved to: {args.output}")
+
+    if args.query:
+        matches = df.index[df["song_title"].str.lower() == args.query.lower()]
+        if not len(matches):
+            print(f"⚠️ No track titled '{args.query}'")
+            return index
+        seed = int(matches[0])
+        ids, dists = index.similar_to(seed, k=args.k, n_probe=args.n_probe)
+        print(f"\n🎧 Songs like {df.at[seed, 'song_title']} - {df.at[seed, 'artist']}:")
+        for track_id, dist in zip(ids, dists):
+            print(f"   {dist:6.3f}  {df.at[track_id, 'song_title']} - {df.at[track_id, 'artist']}")
+    return index
+
+
+if __name__ == "__main__":
+    main()
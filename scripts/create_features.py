@@ -3,19 +3,73 @@ Feature Engineering Pipeline for Spotify Hit Prediction
 Create smart features that help predict song success
 """
 
-import pandas as pd
 import numpy as np
+from bisect import bisect_left
+from contextlib import nullcontext
 from pathlib import Path
+import argparse
+import json
 import sys
 
 # Add src to path
+ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append('src')
+sys.path.append(str(ROOT_DIR))
+
+from src.analytics.profiling import PipelineProfiler
+from src.data_processing.data_loader import SpotifyDataLoader
+
+# Normalization statistics live next to the model they were trained with
+DEFAULT_STATS_PATH = ROOT_DIR / "models" / "feature_stats.json"
+
+# Columns whose batch min/max feed the normalized composite scores
+NORMALIZED_FEATURES = ['tempo', 'loudness']
+NORMALIZED_COMPOSITES = ['dancefloor_potential', 'chill_factor']
 
 class SpotifyFeatureEngineer:
-    """Create features that predict song success"""
-    
-    def __init__(self):
+    """Create features that predict song success
+
+    Progress lines are only printed with ``verbose=True``. Pass a
+    ``PipelineProfiler`` to record per-stage timing and memory metrics.
+    ``norms`` maps names to ``AggregateTable`` lookups (see
+    ``load_norm_tables``); rows carrying a table's key column also get
+    "deviation from the year/genre norm" features. With ``compact=True``
+    the engineered frame is downcast (float32 features, int8 codes,
+    categorical strings) and ``last_memory_report`` records the saving.
+    """
+
+    # Key interactions that often predict hit songs
+    INTERACTIONS = [
+        ('energy', 'danceability', 'energy_dance'),
+        ('valence', 'danceability', 'happy_dance'),
+        ('energy', 'loudness', 'energy_loudness'),
+        ('acousticness', 'energy', 'acoustic_energy'),
+        ('danceability', 'tempo', 'dance_tempo')
+    ]
+
+    # (source column, right-closed bin edges, labels, output column)
+    CATEGORY_BINS = [
+        ('energy', [0, 0.3, 0.7, 1.0], ['Low', 'Medium', 'High'], 'energy_level'),
+        ('danceability', [0, 0.4, 0.7, 1.0],
+         ['Not_Danceable', 'Moderate', 'Very_Danceable'], 'dance_category'),
+        ('tempo', [0, 90, 120, 140, 200],
+         ['Slow', 'Medium', 'Fast', 'Very_Fast'], 'tempo_category'),
+        ('valence', [0, 0.33, 0.67, 1.0], ['Sad', 'Neutral', 'Happy'], 'mood')
+    ]
+
+    COMPOSITE_FEATURES = ['happiness_score', 'dancefloor_potential', 'chill_factor']
+    RATIO_FEATURES = ['speech_to_music_ratio', 'energy_acoustic_ratio']
+
+    def __init__(self, verbose=False, profiler=None, norms=None, compact=False):
         self.feature_names = []
+        self.verbose = verbose
+        self.profiler = profiler
+        self.norms = norms or {}
+        self.compact = compact
+        self.last_memory_report = None
+        
+        # Learned by fit(); when unset, each batch is normalized by itself
+        self.normalization_stats = None
         
         # Define audio features
         self.audio_features = [
@@ -23,182 +77,482 @@ class SpotifyFeatureEngineer:
             'liveness', 'loudness', 'speechiness', 'tempo', 'valence'
         ]
     
+    def fit(self, df):
+        """Learn the normalization statistics used by the composite scores"""
+        missing = [f for f in NORMALIZED_FEATURES if f not in df.columns]
+        if missing:
+            raise ValueError(f"Cannot fit feature engineer, missing columns: {missing}")
+        
+        self.normalization_stats = {
+            f: {'min': float(df[f].min()), 'max': float(df[f].max())}
+            for f in NORMALIZED_FEATURES
+        }
+        self.normalization_stats['n_rows'] = int(len(df))
+        return self
+    
+    def partial_fit(self, df):
+        """Update the normalization statistics with another chunk of rows"""
+        if self.normalization_stats is None:
+            return self.fit(df)
+        
+        for f in NORMALIZED_FEATURES:
+            stats = self.normalization_stats[f]
+            # fmin/fmax ignore NaN, matching Series.min()/max() on the full file
+            stats['min'] = float(np.fmin(stats['min'], df[f].min()))
+            stats['max'] = float(np.fmax(stats['max'], df[f].max()))
+        self.normalization_stats['n_rows'] += int(len(df))
+        return self
+    
+    def fit_csv(self, path, chunksize=100_000):
+        """Cheap first pass: fit the statistics reading only the needed columns"""
+        import pandas as pd
+        
+        self.normalization_stats = None
+        for chunk in pd.read_csv(path, usecols=NORMALIZED_FEATURES, chunksize=chunksize):
+            self.partial_fit(chunk)
+        self._check_fitted()
+        return self
+    
+    def transform(self, df, copy=True):
+        """Create all features using the fitted normalization statistics"""
+        self._check_fitted()
+        return self.create_all_features(df, copy=copy)
+    
+    def fit_transform(self, df, copy=True):
+        """Fit the normalization statistics and create all features"""
+        return self.fit(df).transform(df, copy=copy)
+    
+    def save_stats(self, path=DEFAULT_STATS_PATH):
+        """Persist the fitted normalization statistics as JSON"""
+        self._check_fitted()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.normalization_stats, f, indent=2)
+        return path
+    
+    def load_stats(self, path=DEFAULT_STATS_PATH):
+        """Load normalization statistics written by save_stats()"""
+        with open(path) as f:
+            self.normalization_stats = json.load(f)
+        return self
+    
+    def transform_record(self, track):
+        """Engineer a single track (dict of audio features) without pandas"""
+        self._check_fitted()
+        expressions = self.feature_expressions()
+        bins = {name: (source, edges, labels)
+                for source, edges, labels, name in self.CATEGORY_BINS}
+        
+        features = {}
+        for name in self.feature_dependencies():
+            if name in bins:
+                features[name] = self._bin_label(track[bins[name][0]], *bins[name][1:])
+            else:
+                features[name] = expressions[name](track)
+        return features
+    
+    def feature_dependencies(self):
+        """Map every engineered column to the raw columns it is built from"""
+        dependencies = {name: [feat1, feat2] for feat1, feat2, name in self.INTERACTIONS}
+        dependencies['happiness_score'] = ['valence', 'danceability', 'acousticness']
+        dependencies['dancefloor_potential'] = ['danceability', 'energy', 'tempo']
+        dependencies['chill_factor'] = ['acousticness', 'energy', 'loudness']
+        for source, _, _, name in self.CATEGORY_BINS:
+            dependencies[name] = [source]
+        dependencies['speech_to_music_ratio'] = ['speechiness', 'instrumentalness']
+        dependencies['energy_acoustic_ratio'] = ['energy', 'acousticness']
+        return dependencies
+    
+    def feature_expressions(self):
+        """Vectorized expressions for the engineered columns
+
+        Each expression takes a mapping of raw column -> array (or scalar) and
+        repeats the operation order of the create_* steps, so results are
+        identical to the DataFrame path.
+        """
+        def normalized(feature, values):
+            low, high = self._normalization_range(feature, values)
+            return (values - low) / (high - low)
+        
+        expressions = {
+            name: (lambda c, a=feat1, b=feat2: c[a] * c[b])
+            for feat1, feat2, name in self.INTERACTIONS
+        }
+        expressions['happiness_score'] = lambda c: (
+            c['valence'] + c['danceability'] - c['acousticness']
+        ) / 2
+        expressions['dancefloor_potential'] = lambda c: (
+            c['danceability'] + c['energy'] + normalized('tempo', c['tempo'])
+        ) / 3
+        expressions['chill_factor'] = lambda c: (
+            c['acousticness'] + (1 - c['energy']) + (1 - normalized('loudness', c['loudness']))
+        ) / 3
+        for source, bins, labels, name in self.CATEGORY_BINS:
+            expressions[name] = (
+                lambda c, s=source, b=bins, l=labels: self._bin_codes(c[s], b, l)
+            )
+        expressions['speech_to_music_ratio'] = lambda c: (
+            c['speechiness'] / (c['instrumentalness'] + 0.001)
+        )
+        expressions['energy_acoustic_ratio'] = lambda c: (
+            c['energy'] / (c['acousticness'] + 0.001)
+        )
+        return expressions
+    
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+    
+    def _stage(self, name, rows=None):
+        """Profiler stage context, or a no-op when profiling is off"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name, rows)
+    
+    def _check_fitted(self):
+        if self.normalization_stats is None:
+            raise ValueError("Feature engineer is not fitted; call fit() or load_stats() first")
+    
+    def _normalization_range(self, feature, values):
+        """Fitted (min, max) for ``feature``, else the range of ``values``"""
+        if self.normalization_stats is not None:
+            stats = self.normalization_stats[feature]
+            return stats['min'], stats['max']
+        return np.nanmin(values), np.nanmax(values)
+    
     def create_interaction_features(self, df):
         """Create interaction features that combine audio characteristics"""
-        print("🔄 Creating interaction features...")
+        with self._stage('interaction_features', len(df)):
+            self._log("🔄 Creating interaction features...")
         
-        df_features = df.copy()
+            df_features = df.copy()
         
-        # Key interactions that often predict hit songs
-        interactions = [
-            ('energy', 'danceability', 'energy_dance'),
-            ('valence', 'danceability', 'happy_dance'),
-            ('energy', 'loudness', 'energy_loudness'),
-            ('acousticness', 'energy', 'acoustic_energy'),
-            ('danceability', 'tempo', 'dance_tempo')
-        ]
-        
-        created_features = []
-        for feat1, feat2, name in interactions:
-            if feat1 in df.columns and feat2 in df.columns:
-                df_features[name] = df_features[feat1] * df_features[feat2]
-                created_features.append(name)
-                print(f"   ✅ Created {name}")
+            created_features = []
+            for feat1, feat2, name in self.INTERACTIONS:
+                if feat1 in df.columns and feat2 in df.columns:
+                    df_features[name] = df_features[feat1] * df_features[feat2]
+                    created_features.append(name)
+                    self._log(f"   ✅ Created {name}")
         
-        self.feature_names.extend(created_features)
-        return df_features
+            self.feature_names.extend(created_features)
+            return df_features
     
     def create_composite_scores(self, df):
         """Create composite scores that summarize multiple features"""
-        print("🔄 Creating composite scores...")
-        
-        df_features = df.copy()
-        created_features = []
-        
-        # Happiness Score (valence + danceability - acousticness)
-        if all(f in df.columns for f in ['valence', 'danceability', 'acousticness']):
-            df_features['happiness_score'] = (
-                df_features['valence'] + 
-                df_features['danceability'] - 
-                df_features['acousticness']
-            ) / 2
-            created_features.append('happiness_score')
-            print("   ✅ Created happiness_score")
-        
-        # Dancefloor Potential (danceability + energy + tempo_normalized)
-        if all(f in df.columns for f in ['danceability', 'energy', 'tempo']):
-            # Normalize tempo to 0-1 range
-            tempo_norm = (df_features['tempo'] - df_features['tempo'].min()) / (
-                df_features['tempo'].max() - df_features['tempo'].min()
-            )
-            df_features['dancefloor_potential'] = (
-                df_features['danceability'] + 
-                df_features['energy'] + 
-                tempo_norm
-            ) / 3
-            created_features.append('dancefloor_potential')
-            print("   ✅ Created dancefloor_potential")
-        
-        # Chill Factor (acousticness + (1-energy) + (1-loudness_normalized))
-        if all(f in df.columns for f in ['acousticness', 'energy', 'loudness']):
-            # Normalize loudness (usually negative values)
-            loudness_norm = (df_features['loudness'] - df_features['loudness'].min()) / (
-                df_features['loudness'].max() - df_features['loudness'].min()
-            )
-            df_features['chill_factor'] = (
-                df_features['acousticness'] + 
-                (1 - df_features['energy']) + 
-                (1 - loudness_norm)
-            ) / 3
-            created_features.append('chill_factor')
-            print("   ✅ Created chill_factor")
+        with self._stage('composite_scores', len(df)):
+            self._log("🔄 Creating composite scores...")
         
-        self.feature_names.extend(created_features)
-        return df_features
+            df_features = df.copy()
+            created_features = []
+        
+            # Happiness Score (valence + danceability - acousticness)
+            if all(f in df.columns for f in ['valence', 'danceability', 'acousticness']):
+                df_features['happiness_score'] = (
+                    df_features['valence'] + 
+                    df_features['danceability'] - 
+                    df_features['acousticness']
+                ) / 2
+                created_features.append('happiness_score')
+                self._log("   ✅ Created happiness_score")
+        
+            # Dancefloor Potential (danceability + energy + tempo_normalized)
+            if all(f in df.columns for f in ['danceability', 'energy', 'tempo']):
+                # Normalize tempo to 0-1 range
+                tempo_min, tempo_max = self._normalization_range('tempo', df_features['tempo'])
+                tempo_norm = (df_features['tempo'] - tempo_min) / (tempo_max - tempo_min)
+                df_features['dancefloor_potential'] = (
+                    df_features['danceability'] + 
+                    df_features['energy'] + 
+                    tempo_norm
+                ) / 3
+                created_features.append('dancefloor_potential')
+                self._log("   ✅ Created dancefloor_potential")
+        
+            # Chill Factor (acousticness + (1-energy) + (1-loudness_normalized))
+            if all(f in df.columns for f in ['acousticness', 'energy', 'loudness']):
+                # Normalize loudness (usually negative values)
+                loudness_min, loudness_max = self._normalization_range(
+                    'loudness', df_features['loudness']
+                )
+                loudness_norm = (df_features['loudness'] - loudness_min) / (
+                    loudness_max - loudness_min
+                )
+                df_features['chill_factor'] = (
+                    df_features['acousticness'] + 
+                    (1 - df_features['energy']) + 
+                    (1 - loudness_norm)
+                ) / 3
+                created_features.append('chill_factor')
+                self._log("   ✅ Created chill_factor")
+        
+            self.feature_names.extend(created_features)
+            return df_features
     
     def create_categorical_features(self, df):
         """Create categorical features from continuous ones"""
-        print("🔄 Creating categorical features...")
+        import pandas as pd
         
-        df_features = df.copy()
-        created_features = []
+        with self._stage('categorical_features', len(df)):
+            self._log("🔄 Creating categorical features...")
         
-        # Energy levels
-        if 'energy' in df.columns:
-            df_features['energy_level'] = pd.cut(
-                df_features['energy'], 
-                bins=[0, 0.3, 0.7, 1.0], 
-                labels=['Low', 'Medium', 'High']
-            )
-            created_features.append('energy_level')
-            print("   ✅ Created energy_level (Low/Medium/High)")
-        
-        # Danceability categories
-        if 'danceability' in df.columns:
-            df_features['dance_category'] = pd.cut(
-                df_features['danceability'], 
-                bins=[0, 0.4, 0.7, 1.0], 
-                labels=['Not_Danceable', 'Moderate', 'Very_Danceable']
-            )
-            created_features.append('dance_category')
-            print("   ✅ Created dance_category")
-        
-        # Tempo categories
-        if 'tempo' in df.columns:
-            df_features['tempo_category'] = pd.cut(
-                df_features['tempo'], 
-                bins=[0, 90, 120, 140, 200], 
-                labels=['Slow', 'Medium', 'Fast', 'Very_Fast']
-            )
-            created_features.append('tempo_category')
-            print("   ✅ Created tempo_category")
-        
-        # Valence mood
-        if 'valence' in df.columns:
-            df_features['mood'] = pd.cut(
-                df_features['valence'], 
-                bins=[0, 0.33, 0.67, 1.0], 
-                labels=['Sad', 'Neutral', 'Happy']
-            )
-            created_features.append('mood')
-            print("   ✅ Created mood (Sad/Neutral/Happy)")
+            df_features = df.copy()
+            created_features = []
+        
+            for source, bins, labels, name in self.CATEGORY_BINS:
+                if source in df.columns:
+                    df_features[name] = pd.cut(
+                        df_features[source],
+                        bins=bins,
+                        labels=labels
+                    )
+                    created_features.append(name)
+                    self._log(f"   ✅ Created {name} ({'/'.join(labels)})")
         
-        self.feature_names.extend(created_features)
-        return df_features
+            self.feature_names.extend(created_features)
+            return df_features
     
     def create_ratio_features(self, df):
         """Create ratio features"""
-        print("🔄 Creating ratio features...")
+        with self._stage('ratio_features', len(df)):
+            self._log("🔄 Creating ratio features...")
         
-        df_features = df.copy()
-        created_features = []
+            df_features = df.copy()
+            created_features = []
         
-        # Speech to music ratio
-        if all(f in df.columns for f in ['speechiness', 'instrumentalness']):
-            df_features['speech_to_music_ratio'] = (
-                df_features['speechiness'] / 
-                (df_features['instrumentalness'] + 0.001)  # Avoid division by zero
-            )
-            created_features.append('speech_to_music_ratio')
-            print("   ✅ Created speech_to_music_ratio")
-        
-        # Energy to acousticness ratio
-        if all(f in df.columns for f in ['energy', 'acousticness']):
-            df_features['energy_acoustic_ratio'] = (
-                df_features['energy'] / 
-                (df_features['acousticness'] + 0.001)
-            )
-            created_features.append('energy_acoustic_ratio')
-            print("   ✅ Created energy_acoustic_ratio")
+            # Speech to music ratio
+            if all(f in df.columns for f in ['speechiness', 'instrumentalness']):
+                df_features['speech_to_music_ratio'] = (
+                    df_features['speechiness'] / 
+                    (df_features['instrumentalness'] + 0.001)  # Avoid division by zero
+                )
+                created_features.append('speech_to_music_ratio')
+                self._log("   ✅ Created speech_to_music_ratio")
+        
+            # Energy to acousticness ratio
+            if all(f in df.columns for f in ['energy', 'acousticness']):
+                df_features['energy_acoustic_ratio'] = (
+                    df_features['energy'] / 
+                    (df_features['acousticness'] + 0.001)
+                )
+                created_features.append('energy_acoustic_ratio')
+                self._log("   ✅ Created energy_acoustic_ratio")
+        
+            self.feature_names.extend(created_features)
+            return df_features
+    
+    def create_norm_features(self, df):
+        """Join year/genre norms and add each feature's deviation from them"""
+        import pandas as pd
+        
+        tables = [t for t in self.norms.values() if t.column in df.columns]
+        if not tables:
+            return df
+        
+        with self._stage('norm_features', len(df)):
+            self._log("🔄 Creating year/genre norm features...")
+            blocks = []
+            for table in tables:
+                block = table.deviations(df)
+                blocks.append(block)
+                self.feature_names.extend(block.columns)
+                self._log(f"   ✅ Created {len(block.columns)} features vs {table.name} norm")
+            return pd.concat([df] + blocks, axis=1)
+    
+    def _finish_features(self, df_engineered):
+        """Steps shared by every pipeline path: norm joins, then compaction"""
+        from src.data_processing.compact import compact_with_report
+        
+        df_engineered = self.create_norm_features(df_engineered)
+        if not self.compact:
+            return df_engineered
         
-        self.feature_names.extend(created_features)
-        return df_features
+        with self._stage('compact_dtypes', len(df_engineered)):
+            df_engineered, self.last_memory_report = compact_with_report(df_engineered)
+        return df_engineered
     
-    def create_all_features(self, df):
-        """Create all engineered features"""
-        print("\n🚀 STARTING FEATURE ENGINEERING")
-        print("="*50)
+    def create_all_features(self, df, copy=True):
+        """Create all engineered features
+
+        With ``copy=False`` the columns are computed in a single pass over the
+        raw NumPy buffers and attached as one block instead of copying the
+        frame at every step. The output is identical to the default path.
+        """
+        if not copy:
+            df_engineered = self._create_all_features_single_pass(df)
+            if df_engineered is not None:
+                return self._finish_features(df_engineered)
+        
+        self._log("\n🚀 STARTING FEATURE ENGINEERING")
+        self._log("="*50)
         
         original_features = len(df.columns)
         
         # Apply all feature engineering steps
-        df_engineered = df.copy()
-        df_engineered = self.create_interaction_features(df_engineered)
-        df_engineered = self.create_composite_scores(df_engineered)
-        df_engineered = self.create_categorical_features(df_engineered)
-        df_engineered = self.create_ratio_features(df_engineered)
+        with self._stage('all_features', len(df)):
+            df_engineered = df.copy()
+            df_engineered = self.create_interaction_features(df_engineered)
+            df_engineered = self.create_composite_scores(df_engineered)
+            df_engineered = self.create_categorical_features(df_engineered)
+            df_engineered = self.create_ratio_features(df_engineered)
+            df_engineered = self._finish_features(df_engineered)
         
         new_features = len(df_engineered.columns) - original_features
         
-        print(f"\n✅ FEATURE ENGINEERING COMPLETE!")
-        print(f"   Original features: {original_features}")
-        print(f"   New features created: {new_features}")
-        print(f"   Total features: {len(df_engineered.columns)}")
+        self._log(f"\n✅ FEATURE ENGINEERING COMPLETE!")
+        self._log(f"   Original features: {original_features}")
+        self._log(f"   New features created: {new_features}")
+        self._log(f"   Total features: {len(df_engineered.columns)}")
+        
+        return df_engineered
+    
+    def _single_pass_inputs(self, df):
+        """Return the raw audio columns as arrays, or None if unsupported"""
+        if not all(f in df.columns for f in self.audio_features):
+            return None
+        
+        columns = {f: df[f].to_numpy(copy=False) for f in self.audio_features}
+        dtypes = {arr.dtype for arr in columns.values()}
+        if len(dtypes) != 1 or dtypes.pop() not in (np.float32, np.float64):
+            # Mixed or integer inputs follow pandas' own promotion rules
+            return None
+        return columns
+    
+    def _compute_numeric_block(self, cols, out):
+        """Fill ``out`` (one row per float feature) from the raw columns"""
+        (energy_dance, happy_dance, energy_loudness, acoustic_energy,
+         dance_tempo, happiness, dancefloor, chill,
+         speech_music, energy_acoustic) = out
+        
+        np.multiply(cols['energy'], cols['danceability'], out=energy_dance)
+        np.multiply(cols['valence'], cols['danceability'], out=happy_dance)
+        np.multiply(cols['energy'], cols['loudness'], out=energy_loudness)
+        np.multiply(cols['acousticness'], cols['energy'], out=acoustic_energy)
+        np.multiply(cols['danceability'], cols['tempo'], out=dance_tempo)
+        
+        # The composite scores follow the exact operation order of
+        # create_composite_scores so the results are bit-for-bit equal.
+        np.add(cols['valence'], cols['danceability'], out=happiness)
+        np.subtract(happiness, cols['acousticness'], out=happiness)
+        np.divide(happiness, 2, out=happiness)
+        
+        # speech_music is free until the ratios, use it as scratch space
+        tempo = cols['tempo']
+        tempo_min, tempo_max = self._normalization_range('tempo', tempo)
+        np.subtract(tempo, tempo_min, out=speech_music)
+        np.divide(speech_music, tempo_max - tempo_min, out=speech_music)
+        np.add(cols['danceability'], cols['energy'], out=dancefloor)
+        np.add(dancefloor, speech_music, out=dancefloor)
+        np.divide(dancefloor, 3, out=dancefloor)
+        
+        loudness = cols['loudness']
+        loudness_min, loudness_max = self._normalization_range('loudness', loudness)
+        np.subtract(loudness, loudness_min, out=speech_music)
+        np.divide(speech_music, loudness_max - loudness_min, out=speech_music)
+        np.subtract(1, speech_music, out=speech_music)
+        np.subtract(1, cols['energy'], out=chill)
+        np.add(cols['acousticness'], chill, out=chill)
+        np.add(chill, speech_music, out=chill)
+        np.divide(chill, 3, out=chill)
+        
+        np.add(cols['instrumentalness'], 0.001, out=speech_music)
+        np.divide(cols['speechiness'], speech_music, out=speech_music)
+        np.add(cols['acousticness'], 0.001, out=energy_acoustic)
+        np.divide(cols['energy'], energy_acoustic, out=energy_acoustic)
+    
+    @staticmethod
+    def _bin_code_array(values, bins, out=None):
+        """Integer codes of ``pd.cut(values, bins)``, -1 outside the bins"""
+        edges = np.asarray(bins, dtype=np.float64)
+        ids = np.searchsorted(edges, values, side='left')
+        invalid = (ids == 0) | (ids == len(edges)) | np.isnan(values)
+        if out is None:
+            out = np.empty(len(ids), dtype=np.int8)
+        np.subtract(ids, 1, out=out, casting='unsafe')
+        out[invalid] = -1
+        return out
+    
+    @classmethod
+    def _bin_codes(cls, values, bins, labels):
+        """Vectorized equivalent of ``pd.cut(values, bins, labels=labels)``"""
+        import pandas as pd
+        
+        codes = cls._bin_code_array(values, bins)
+        return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+    
+    def _compute_code_block(self, cols, out):
+        """Fill ``out`` (one int8 row per CATEGORY_BINS entry) with bin codes"""
+        for row, (source, bins, _, _) in zip(out, self.CATEGORY_BINS):
+            self._bin_code_array(cols[source], bins, out=row)
+    
+    def _numeric_feature_names(self):
+        """Float features in block order (ratios last)"""
+        interaction_names = [name for _, _, name in self.INTERACTIONS]
+        return interaction_names + self.COMPOSITE_FEATURES + self.RATIO_FEATURES
+    
+    def _assemble_features(self, df, block, codes):
+        """Attach a float block and bin codes to ``df`` in pipeline column order"""
+        import pandas as pd
+        
+        numeric_names = self._numeric_feature_names()
+        split = len(numeric_names) - len(self.RATIO_FEATURES)
+        categories = {
+            name: pd.Categorical.from_codes(row, categories=labels, ordered=True)
+            for row, (_, _, labels, name) in zip(codes, self.CATEGORY_BINS)
+        }
+        
+        df_engineered = pd.concat([
+            df,
+            pd.DataFrame(block[:split].T, index=df.index, columns=numeric_names[:split],
+                         copy=False),
+            pd.DataFrame(categories, index=df.index),
+            pd.DataFrame(block[split:].T, index=df.index,
+                         columns=self.RATIO_FEATURES, copy=False)
+        ], axis=1)
+        
+        self.feature_names.extend(
+            numeric_names[:split] + list(categories) + self.RATIO_FEATURES
+        )
+        return df_engineered
+    
+    @staticmethod
+    def _bin_label(value, bins, labels):
+        """Scalar equivalent of ``_bin_codes``; None outside the bins"""
+        idx = bisect_left(bins, value)
+        return labels[idx - 1] if 0 < idx < len(bins) else None
+    
+    def _create_all_features_single_pass(self, df):
+        """Create all engineered features without intermediate copies"""
+        cols = self._single_pass_inputs(df)
+        if cols is None:
+            return None
+        
+        self._log("\n🚀 STARTING FEATURE ENGINEERING (single pass)")
+        self._log("="*50)
+        
+        with self._stage('all_features', len(df)):
+            # One contiguous buffer holds every float feature, one row each
+            with self._stage('numeric_block', len(df)):
+                block = np.empty((len(self._numeric_feature_names()), len(df)),
+                                 dtype=cols['energy'].dtype)
+                self._compute_numeric_block(cols, block)
+            with self._stage('categorical_codes', len(df)):
+                codes = np.empty((len(self.CATEGORY_BINS), len(df)), dtype=np.int8)
+                self._compute_code_block(cols, codes)
+            with self._stage('assemble', len(df)):
+                df_engineered = self._assemble_features(df, block, codes)
+        
+        self._log(f"\n✅ FEATURE ENGINEERING COMPLETE!")
+        self._log(f"   Original features: {len(df.columns)}")
+        self._log(f"   New features created: {len(df_engineered.columns) - len(df.columns)}")
+        self._log(f"   Total features: {len(df_engineered.columns)}")
         
         return df_engineered
     
     def get_feature_importance_preview(self, df):
         """Quick preview of feature relationships with target"""
+        from src.analytics.statistics import get_statistics
+        
         if 'target' not in df.columns:
             print("⚠️ No target column found for feature importance preview")
             return
@@ -206,60 +560,365 @@ class SpotifyFeatureEngineer:
         print("\n🔍 FEATURE IMPORTANCE PREVIEW:")
         print("="*40)
         
-        # Get numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        numeric_cols = [col for col in numeric_cols if col != 'target']
-        
-        # Calculate correlations with target
-        correlations = df[numeric_cols + ['target']].corr()['target'].abs().sort_values(ascending=False)
+        # Correlations with target from the shared (cached) statistics pass
+        correlations = get_statistics(df).target_correlations()
         
         print("Top features correlated with success:")
         for feature, corr in correlations.head(10).items():
             if feature != 'target':
                 print(f"   {feature:25s}: {corr:.3f}")
 
-def main():
+class FeaturePlan:
+    """Compute only the engineered columns a consumer actually needs
+
+    The plan resolves the requested columns back to the raw audio columns
+    they depend on, then evaluates just the required vectorized expressions.
+    Requested columns that are not engineered are passed through unchanged.
+    """
+    
+    def __init__(self, columns, engineer=None):
+        self.engineer = engineer if engineer is not None else SpotifyFeatureEngineer()
+        self.columns = list(columns)
+        
+        dependencies = self.engineer.feature_dependencies()
+        self.derived = [c for c in self.columns if c in dependencies]
+        self.passthrough = [c for c in self.columns if c not in dependencies]
+        self.skipped = [name for name in dependencies if name not in self.derived]
+        
+        self.raw_inputs = list(self.passthrough)
+        for name in self.derived:
+            for source in dependencies[name]:
+                if source not in self.raw_inputs:
+                    self.raw_inputs.append(source)
+        
+        self._expressions = self.engineer.feature_expressions()
+    
+    @classmethod
+    def from_model_features(cls, path=None, engineer=None):
+        """Build the plan for the feature list the deployed model was trained on"""
+        if path is None:
+            path = DEFAULT_STATS_PATH.parent / "model_features.txt"
+        with open(path) as f:
+            columns = [line.strip() for line in f if line.strip()]
+        return cls(columns, engineer=engineer)
+    
+    def execute(self, df):
+        """Return a frame holding exactly the planned columns, in order"""
+        import pandas as pd
+        
+        missing = [c for c in self.raw_inputs if c not in df.columns]
+        if missing:
+            raise KeyError(f"Feature plan needs missing columns: {missing}")
+        
+        with self.engineer._stage('feature_plan', len(df)):
+            cols = {c: df[c].to_numpy(copy=False) for c in self.raw_inputs}
+            data = {}
+            for name in self.columns:
+                if name in self._expressions:
+                    data[name] = self._expressions[name](cols)
+                else:
+                    data[name] = df[name]
+            return pd.DataFrame(data, index=df.index)
+    
+    def execute_record(self, track):
+        """Return the planned feature values for one track, in order"""
+        if any(name in NORMALIZED_COMPOSITES for name in self.derived):
+            self.engineer._check_fitted()
+        bins = {name: (source, edges, labels)
+                for source, edges, labels, name in self.engineer.CATEGORY_BINS}
+        values = []
+        for name in self.columns:
+            if name in bins:
+                # The vectorized bin expression needs arrays; use the scalar twin
+                source, edges, labels = bins[name]
+                values.append(self.engineer._bin_label(track[source], edges, labels))
+            elif name in self._expressions:
+                values.append(self._expressions[name](track))
+            else:
+                values.append(track[name])
+        return values
+    
+    def report(self):
+        """Summarize how much engineering work the plan avoids"""
+        total = len(self.derived) + len(self.skipped)
+        categorical = {name for _, _, _, name in self.engineer.CATEGORY_BINS}
+        return {
+            'requested_columns': len(self.columns),
+            'computed_features': list(self.derived),
+            'skipped_features': list(self.skipped),
+            'skipped_categorical': [c for c in self.skipped if c in categorical],
+            'raw_inputs': list(self.raw_inputs),
+            'unused_audio_features': [
+                f for f in self.engineer.audio_features if f not in self.raw_inputs
+            ],
+            'skipped_fraction': len(self.skipped) / total if total else 0.0
+        }
+    
+    def print_report(self):
+        """Print the plan report in the pipeline's console style"""
+        report = self.report()
+        print(f"\n🧭 FEATURE PLAN:")
+        print(f"   Computing {len(report['computed_features'])} engineered features "
+              f"from {len(report['raw_inputs'])} raw columns")
+        print(f"   Skipped {len(report['skipped_features'])} features "
+              f"({report['skipped_fraction']:.0%} of engineering work)")
+        if report['skipped_categorical']:
+            print(f"   Skipped bins: {', '.join(report['skipped_categorical'])}")
+        if report['unused_audio_features']:
+            print(f"   Unread audio features: {', '.join(report['unused_audio_features'])}")
+
+def _attach_shared(name):
+    """Attach to a parent-owned shared memory block"""
+    from multiprocessing import shared_memory
+    
+    try:
+        # Python 3.13+: leave unlinking entirely to the parent
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older Pythons register with the resource tracker the worker
+        # inherited from the parent (see feature_worker_pool)
+        return shared_memory.SharedMemory(name=name)
+
+def feature_worker_pool(workers):
+    """Process pool for parallel_create_features
+
+    The resource tracker is started first so forked workers share it with
+    the parent instead of each starting one that would warn about, and
+    try to unlink, the parent's shared memory blocks at exit.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import resource_tracker
+    
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=workers)
+
+def _engineer_partition(task):
+    """Worker: engineer rows [start, stop) from shared input into shared output"""
+    raw_name, out_name, codes_name, n_rows, dtype, start, stop, stats = task
+    buffers = [_attach_shared(name) for name in (raw_name, out_name, codes_name)]
+    try:
+        engineer = SpotifyFeatureEngineer()
+        engineer.normalization_stats = stats
+        raw = np.ndarray((len(engineer.audio_features), n_rows), dtype=dtype,
+                         buffer=buffers[0].buf)
+        out = np.ndarray((len(engineer._numeric_feature_names()), n_rows), dtype=dtype,
+                         buffer=buffers[1].buf)
+        codes = np.ndarray((len(engineer.CATEGORY_BINS), n_rows), dtype=np.int8,
+                           buffer=buffers[2].buf)
+        
+        cols = {f: raw[i, start:stop] for i, f in enumerate(engineer.audio_features)}
+        engineer._compute_numeric_block(cols, out[:, start:stop])
+        engineer._compute_code_block(cols, codes[:, start:stop])
+        # Views must be released before the buffers can be closed
+        del raw, out, codes, cols
+    finally:
+        for shm in buffers:
+            shm.close()
+    return stop - start
+
+def parallel_create_features(engineer, df, workers, executor=None):
+    """Engineer ``df`` on a process pool, one contiguous row range per worker
+
+    The raw audio columns are copied once into shared memory; workers write
+    their float features and bin codes straight into shared output blocks,
+    so no DataFrames are pickled. Every partition is normalized with the
+    same global statistics (fitted ones, or the range of the whole ``df``),
+    so the result equals ``create_all_features(df)``.
+    """
+    from multiprocessing import shared_memory
+    
+    cols = engineer._single_pass_inputs(df)
+    if cols is None or workers <= 1 or len(df) < workers:
+        return engineer.create_all_features(df, copy=False)
+    
+    stats = engineer.normalization_stats
+    if stats is None:
+        stats = SpotifyFeatureEngineer().fit(df).normalization_stats
+    
+    n_rows = len(df)
+    dtype = cols['energy'].dtype
+    shapes = [
+        ((len(engineer.audio_features), n_rows), dtype),
+        ((len(engineer._numeric_feature_names()), n_rows), dtype),
+        ((len(engineer.CATEGORY_BINS), n_rows), np.dtype(np.int8)),
+    ]
+    blocks = []
+    try:
+        for shape, block_dtype in shapes:
+            nbytes = max(int(np.prod(shape)) * block_dtype.itemsize, 1)
+            blocks.append(shared_memory.SharedMemory(create=True, size=nbytes))
+        raw = np.ndarray(shapes[0][0], dtype=dtype, buffer=blocks[0].buf)
+        for i, f in enumerate(engineer.audio_features):
+            raw[i] = cols[f]
+        del raw
+        
+        bounds = np.linspace(0, n_rows, workers + 1).astype(int)
+        tasks = [
+            (blocks[0].name, blocks[1].name, blocks[2].name, n_rows, dtype.str,
+             int(start), int(stop), stats)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ]
+        
+        with engineer._stage('parallel_partitions', n_rows) as record:
+            if executor is None:
+                with feature_worker_pool(workers) as pool:
+                    rows_done = sum(pool.map(_engineer_partition, tasks))
+            else:
+                rows_done = sum(executor.map(_engineer_partition, tasks))
+            if record is not None:
+                record['workers'] = len(tasks)
+        assert rows_done == n_rows
+        
+        # Copy the results out before the shared blocks are released
+        block = np.ndarray(shapes[1][0], dtype=dtype, buffer=blocks[1].buf).copy()
+        codes = np.ndarray(shapes[2][0], dtype=np.int8, buffer=blocks[2].buf).copy()
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    
+    with engineer._stage('assemble', n_rows):
+        df_engineered = engineer._assemble_features(df, block, codes)
+    return engineer._finish_features(df_engineered)
+
+def stream_features(engineer, input_path, output_path, chunksize, transform=None):
+    """Engineer a CSV chunk by chunk, appending each chunk to ``output_path``
+
+    Memory is bounded by ``chunksize``. The engineer must already hold the
+    global normalization statistics (see ``fit_csv``) so every chunk is
+    normalized exactly like a whole-file run. Column types are inferred per
+    chunk, as pandas does for chunked reads.
+    """
+    import pandas as pd
+    
+    engineer._check_fitted()
+    transform = transform or (lambda chunk: engineer.transform(chunk, copy=False))
+    
+    rows, chunks = 0, 0
+    with open(output_path, 'w', newline='') as out:
+        for chunk in pd.read_csv(input_path, chunksize=chunksize):
+            with engineer._stage('chunk', len(chunk)):
+                transform(chunk).to_csv(out, index=False, header=(chunks == 0))
+            rows += len(chunk)
+            chunks += 1
+    return rows, chunks
+
+def main(argv=None):
     """Run feature engineering pipeline"""
+    parser = argparse.ArgumentParser(description="Spotify feature engineering pipeline")
+    parser.add_argument(
+        '--model-features', action='store_true',
+        help="only compute the columns listed in models/model_features.txt (plus target)"
+    )
+    parser.add_argument('--input', help="input CSV (defaults to the first known data file)")
+    parser.add_argument(
+        '--chunksize', type=int,
+        help="stream the input in chunks of this many rows instead of loading it whole"
+    )
+    parser.add_argument(
+        '--stats', help="normalization stats JSON to use instead of fitting on the input"
+    )
+    parser.add_argument(
+        '--save-stats', metavar='PATH',
+        help="write the stats fitted on the input here (by default they are only written "
+             "when models/feature_stats.json does not exist yet)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="engineer row partitions on this many worker processes"
+    )
+    parser.add_argument(
+        '--compact', action='store_true',
+        help="downcast dtypes of the loaded and engineered frames and report memory per row"
+    )
+    parser.add_argument(
+        '--norms', action='store_true',
+        help="add deviation-from-norm features for rows with a year or genres column"
+    )
+    parser.add_argument(
+        '--profile', metavar='PATH',
+        help="write per-stage timing and memory metrics to this JSON file"
+    )
+    args = parser.parse_args(argv)
+    
+    # pandas-backed helpers load after argument parsing so --help stays instant
+    from src.data_processing.aggregates import load_norm_tables
+    from src.data_processing.compact import compact_with_report, print_memory_report
+    from src.data_processing.csv_cache import read_csv_cached
     
     print("🔧 SPOTIFY FEATURE ENGINEERING PIPELINE")
     print("="*50)
     
-    # Load data
-    data_files = [
-        "data/processed/spotify_clean.csv",
-        "data/raw/Spotify_Data.csv",
-        "data/raw/spotify_songs.csv"
-    ]
+    # Find data: cleaned dataset first, else the raw export
+    loader = SpotifyDataLoader()
+    if args.input:
+        input_path = Path(args.input) if Path(args.input).exists() else None
+    else:
+        name = loader.first_existing(['clean', 'raw'])
+        input_path = loader.path(name) if name else None
     
-    df = None
-    for file_path in data_files:
-        if Path(file_path).exists():
-            df = pd.read_csv(file_path)
-            print(f"Loaded data from: {file_path}")
-            break
-    
-    if df is None:
+    if input_path is None:
         print(" No data file found!")
         print("Available files:")
-        for path in Path("data").rglob("*.csv"):
+        for path in loader.data_dir.rglob("*.csv"):
             print(f"   {path}")
         return
     
     # Create feature engineer
-    engineer = SpotifyFeatureEngineer()
+    profiler = PipelineProfiler() if args.profile else None
+    norms = load_norm_tables() if args.norms else None
+    engineer = SpotifyFeatureEngineer(verbose=True, profiler=profiler, norms=norms,
+                                      compact=args.compact)
+    output_dir = Path("data/processed")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if args.chunksize:
+        output_path = run_streaming(engineer, input_path, output_dir, args)
+        write_profile(profiler, args.profile)
+        return output_path
+    
+    with engineer._stage('load_csv') as record:
+        df = read_csv_cached(input_path)
+        if record is not None:
+            record['rows'] = len(df)
+    print(f"Loaded data from: {input_path}")
+    
+    # Learn normalization statistics once so online scoring can reuse them
+    if args.stats:
+        engineer.load_stats(args.stats)
+        print(f"📏 Normalization stats loaded from: {args.stats}")
+    else:
+        engineer.fit(df)
+        save_fitted_stats(engineer, args.save_stats)
     
-    # Engineer features
-    df_engineered = engineer.create_all_features(df)
+    if args.model_features:
+        # Only pay for the columns the deployed model consumes
+        plan = FeaturePlan.from_model_features(engineer=engineer)
+        if 'target' in df.columns:
+            plan = FeaturePlan(plan.columns + ['target'], engineer=engineer)
+        plan.print_report()
+        df_engineered = plan.execute(df)
+        engineer.feature_names.extend(plan.derived)
+        output_path = output_dir / "spotify_model_features.csv"
+    elif args.workers > 1:
+        print(f"🧵 Engineering on {args.workers} worker processes...")
+        df_engineered = parallel_create_features(engineer, df, args.workers)
+        output_path = output_dir / "spotify_features_engineered.csv"
+    else:
+        df_engineered = engineer.transform(df, copy=False)
+        output_path = output_dir / "spotify_features_engineered.csv"
+    
+    if args.compact:
+        if engineer.last_memory_report is None:
+            df_engineered, engineer.last_memory_report = compact_with_report(df_engineered)
+        print_memory_report(engineer.last_memory_report, "Engineered frame")
     
     # Preview feature importance
     engineer.get_feature_importance_preview(df_engineered)
     
     # Save engineered features
-    output_dir = Path("data/processed")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    output_path = output_dir / "spotify_features_engineered.csv"
-    df_engineered.to_csv(output_path, index=False)
+    with engineer._stage('write_csv', len(df_engineered)):
+        df_engineered.to_csv(output_path, index=False)
     
     print(f"\n💾 FEATURES SAVED:")
     print(f"   Location: {output_path}")
@@ -276,7 +935,69 @@ def main():
     print("2. Compare model performance")
     print("3. Set up A/B testing framework")
     
+    write_profile(profiler, args.profile)
     return df_engineered
 
+def save_fitted_stats(engineer, path=None):
+    """Persist freshly fitted stats without clobbering the deployed ones
+
+    The default stats file is what the trained model was fitted with, so
+    it is only written when it does not exist yet; pass ``path`` (the
+    ``--save-stats`` flag) to write elsewhere or to replace it on purpose.
+    """
+    if path is None and DEFAULT_STATS_PATH.exists():
+        print(f"📏 Normalization stats fitted on the input (kept {DEFAULT_STATS_PATH}; "
+              f"use --save-stats to write them)")
+        return None
+    stats_path = engineer.save_stats(path if path is not None else DEFAULT_STATS_PATH)
+    print(f"📏 Normalization stats saved to: {stats_path}")
+    return stats_path
+
+def write_profile(profiler, path):
+    """Print the stage timings and save the JSON report"""
+    if profiler is None:
+        return
+    profiler.print_summary()
+    profiler.to_json(path)
+    print(f"   Report saved to: {path}")
+
+def run_streaming(engineer, input_path, output_dir, args):
+    """Chunked variant of main() for inputs that do not fit in memory"""
+    import pandas as pd
+    
+    if args.stats:
+        engineer.load_stats(args.stats)
+        print(f"📏 Normalization stats loaded from: {args.stats}")
+    else:
+        print(f"📏 Stats pass over {input_path} ({', '.join(NORMALIZED_FEATURES)} only)...")
+        engineer.fit_csv(input_path, chunksize=args.chunksize)
+        save_fitted_stats(engineer, args.save_stats)
+    
+    transform = None
+    output_path = output_dir / "spotify_features_engineered.csv"
+    if args.model_features:
+        plan = FeaturePlan.from_model_features(engineer=engineer)
+        if 'target' in pd.read_csv(input_path, nrows=0).columns:
+            plan = FeaturePlan(plan.columns + ['target'], engineer=engineer)
+        plan.print_report()
+        transform = plan.execute
+        output_path = output_dir / "spotify_model_features.csv"
+    
+    print(f"🌊 Streaming {input_path} in chunks of {args.chunksize:,} rows...")
+    if transform is None and args.workers > 1:
+        with feature_worker_pool(args.workers) as pool:
+            rows, chunks = stream_features(
+                engineer, input_path, output_path, args.chunksize,
+                lambda chunk: parallel_create_features(engineer, chunk, args.workers, pool)
+            )
+    else:
+        rows, chunks = stream_features(engineer, input_path, output_path, args.chunksize, transform)
+    
+    print(f"\n💾 FEATURES SAVED:")
+    print(f"   Location: {output_path}")
+    print(f"   Rows: {rows:,} in {chunks} chunks")
+    print("   (Feature importance preview skipped in streaming mode)")
+    return output_path
+
 if __name__ == "__main__":
     df_engineered = main()
\ No newline at end of file
@@ -1,40 +1,95 @@
 """
 Create Key Visualizations for Spotify Data
 Run this to generate all exploration plots
+
+Usage:
+    python scripts/create_visualizations.py
+    python scripts/create_visualizations.py --headless --workers 4   # batch jobs
 """
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import argparse
+import hashlib
+import inspect
+import json
+import os
 import sys
+import time
 
 # Add src to path
 sys.path.append('src')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.data_processing.data_loader import SpotifyDataLoader
+
+DEFAULT_OUTPUT_DIR = Path("results/figures")
+RENDER_MANIFEST = ".render_manifest.json"
 
-def load_data():
+# Scatter plots of larger datasets draw a stratified sample of this size
+SCATTER_MAX_POINTS = 20_000
+
+# Render settings, set by main() and copied into worker processes
+_RENDER = {"output_dir": str(DEFAULT_OUTPUT_DIR), "dpi": 300, "headless": False}
+
+def load_data(path=None):
     """Load the processed data"""
-    # Try processed data first
-    processed_path = Path("data/processed/spotify_clean.csv")
-    if processed_path.exists():
-        df = pd.read_csv(processed_path)
-        print(f"✅ Loaded processed data: {len(df):,} songs")
-    else:
-        # Fallback to raw data
-        raw_path = Path("data/raw/Spotify_Data.csv")
-        df = pd.read_csv(raw_path)
-        print(f"✅ Loaded raw data: {len(df):,} songs")
+    from src.data_processing.csv_cache import read_csv_cached
+    
+    if path is not None:
+        df = read_csv_cached(path)
+        print(f"✅ Loaded data: {len(df):,} songs")
+        return df
+    
+    # Try processed data first, fall back to raw data
+    loader = SpotifyDataLoader()
+    name = loader.first_existing(['clean', 'raw']) or 'raw'
+    df = read_csv_cached(loader.path(name))
+    print(f"✅ Loaded {'processed' if name == 'clean' else 'raw'} data: {len(df):,} songs")
     
     return df
 
-def create_target_distribution_plot(df):
+def _statistics(df, stats):
+    """Shared statistics pass; computed once per dataset and reused"""
+    from src.analytics.statistics import get_statistics
+    
+    return stats if stats is not None else get_statistics(df)
+
+def _finish_figure(filename):
+    """Save the current figure; show it unless rendering headless"""
+    import matplotlib.pyplot as plt
+    
+    plt.savefig(Path(_RENDER["output_dir"]) / filename, dpi=_RENDER["dpi"], bbox_inches='tight')
+    if _RENDER["headless"]:
+        plt.close('all')
+    else:
+        plt.show()
+
+def stratified_sample(df, max_points, column='target', seed=42):
+    """At most ``max_points`` rows, keeping each class's share of the data"""
+    if len(df) <= max_points:
+        return df
+    rng = np.random.default_rng(seed)
+    labels = df[column].to_numpy()
+    picks = []
+    for value in np.unique(labels):
+        rows = np.flatnonzero(labels == value)
+        picks.append(rng.choice(rows, max(1, round(max_points * len(rows) / len(labels))),
+                                replace=False))
+    return df.iloc[np.sort(np.concatenate(picks))]
+
+def create_target_distribution_plot(df, stats=None):
     """Plot 1: Target Distribution"""
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    
+    stats = _statistics(df, stats)
     plt.figure(figsize=(10, 6))
     
     # Main plot
     plt.subplot(1, 2, 1)
-    target_counts = df['target'].value_counts()
+    target_counts = pd.Series(stats.group_counts, index=[0, 1])
     plt.pie(target_counts.values, labels=['Non-Hit', 'Hit'], autopct='%1.1f%%',
             colors=['lightcoral', 'lightgreen'], startangle=90)
     plt.title('Song Success Distribution', fontsize=14, fontweight='bold')
@@ -48,28 +103,31 @@ def create_target_distribution_plot(df):
     plt.xticks(rotation=0)
     
     plt.tight_layout()
-    plt.savefig('results/figures/01_target_distribution.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('01_target_distribution.png')
     
     # Print insights
-    hit_rate = df['target'].mean()
-    print(f"📈 INSIGHT: {hit_rate:.1%} of songs are hits")
+    print(f"📈 INSIGHT: {stats.hit_rate:.1%} of songs are hits")
 
-def create_audio_features_comparison(df):
+def create_audio_features_comparison(df, stats=None):
     """Plot 2: Audio Features by Success"""
+    import matplotlib.pyplot as plt
+    
+    stats = _statistics(df, stats)
     audio_features = ['acousticness', 'danceability', 'energy', 'instrumentalness',
                      'liveness', 'speechiness', 'valence']
     
     # Filter to available features
-    available_features = [f for f in audio_features if f in df.columns]
+    available_features = [f for f in audio_features if f in stats.features]
     
     plt.figure(figsize=(15, 10))
     
     for i, feature in enumerate(available_features, 1):
         plt.subplot(3, 3, i)
         
-        # Box plot comparing hits vs non-hits
-        df.boxplot(column=feature, by='target', ax=plt.gca())
+        # Box plot comparing hits vs non-hits, from precomputed quartiles
+        j = stats.feature_index(feature)
+        boxes = [dict(stats.boxes[group][j], label=str(group)) for group in (0, 1)]
+        plt.gca().bxp(boxes, showfliers=False)
         plt.title(f'{feature.title()}')
         plt.xlabel('Target (0=Non-Hit, 1=Hit)')
         plt.ylabel(feature)
@@ -77,18 +135,20 @@ def create_audio_features_comparison(df):
     
     plt.suptitle('Audio Features: Hits vs Non-Hits', fontsize=16, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('results/figures/02_audio_features_comparison.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('02_audio_features_comparison.png')
 
-def create_correlation_heatmap(df):
+def create_correlation_heatmap(df, stats=None):
     """Plot 3: Feature Correlation Heatmap"""
-    # Select numeric columns
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    stats = _statistics(df, stats)
+    numeric_cols = stats.columns
     
     plt.figure(figsize=(12, 10))
     
-    # Calculate correlation matrix
-    corr_matrix = df[numeric_cols].corr()
+    # Correlation matrix from the shared statistics pass
+    corr_matrix = stats.correlation_frame()
     
     # Create heatmap
     sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0,
@@ -96,22 +156,26 @@ def create_correlation_heatmap(df):
     
     plt.title('Feature Correlation Matrix', fontsize=16, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('results/figures/03_correlation_heatmap.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('03_correlation_heatmap.png')
     
     # Find strong correlations with target
-    if 'target' in numeric_cols:
-        target_corr = corr_matrix['target'].abs().sort_values(ascending=False)
+    if stats.target in numeric_cols:
+        target_corr = stats.target_correlations()
         print("\n🔍 STRONGEST CORRELATIONS WITH SUCCESS:")
         for feature, corr in target_corr.items():
             if feature != 'target' and abs(corr) > 0.1:
                 direction = "positive" if corr > 0 else "negative"
                 print(f"   {feature}: {corr:.3f} ({direction})")
 
-def create_success_rate_by_feature(df):
+def create_success_rate_by_feature(df, stats=None):
     """Plot 4: Success Rate by Feature Quartiles"""
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from src.analytics.statistics import QUARTILE_LABELS
+    
+    stats = _statistics(df, stats)
     audio_features = ['danceability', 'energy', 'valence', 'acousticness']
-    available_features = [f for f in audio_features if f in df.columns]
+    available_features = [f for f in audio_features if f in stats.features]
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     axes = axes.flatten()
@@ -119,11 +183,9 @@ def create_success_rate_by_feature(df):
     for i, feature in enumerate(available_features[:4]):
         ax = axes[i]
         
-        # Create quartiles
-        df[f'{feature}_quartile'] = pd.qcut(df[feature], q=4, labels=['Q1', 'Q2', 'Q3', 'Q4'])
-        
-        # Calculate success rate by quartile
-        success_rates = df.groupby(f'{feature}_quartile')['target'].mean()
+        # Success rate by quartile, without adding columns to df
+        success_rates = pd.Series(stats.quartile_hit_rates[stats.feature_index(feature)],
+                                  index=QUARTILE_LABELS)
         
         # Plot
         success_rates.plot(kind='bar', ax=ax, color='skyblue', alpha=0.7)
@@ -138,13 +200,15 @@ def create_success_rate_by_feature(df):
     
     plt.suptitle('How Audio Features Affect Success Rate', fontsize=16, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('results/figures/04_success_by_features.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('04_success_by_features.png')
 
-def create_feature_distributions(df):
+def create_feature_distributions(df, stats=None):
     """Plot 5: Feature Distribution Overlays"""
+    import matplotlib.pyplot as plt
+    
+    stats = _statistics(df, stats)
     audio_features = ['danceability', 'energy', 'valence', 'tempo']
-    available_features = [f for f in audio_features if f in df.columns]
+    available_features = [f for f in audio_features if f in stats.features]
     
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     axes = axes.flatten()
@@ -152,12 +216,13 @@ def create_feature_distributions(df):
     for i, feature in enumerate(available_features[:4]):
         ax = axes[i]
         
-        # Plot distributions for hits and non-hits
-        hits = df[df['target'] == 1][feature]
-        non_hits = df[df['target'] == 0][feature]
-        
-        ax.hist(non_hits, bins=30, alpha=0.7, label='Non-Hits', color='lightcoral', density=True)
-        ax.hist(hits, bins=30, alpha=0.7, label='Hits', color='lightgreen', density=True)
+        # Plot precomputed densities for hits and non-hits on shared bins
+        j = stats.feature_index(feature)
+        edges = stats.hist_edges[j]
+        ax.hist(edges[:-1], bins=edges, weights=stats.hist_density[0][j], alpha=0.7,
+                label='Non-Hits', color='lightcoral')
+        ax.hist(edges[:-1], bins=edges, weights=stats.hist_density[1][j], alpha=0.7,
+                label='Hits', color='lightgreen')
         
         ax.set_title(f'{feature.title()} Distribution', fontweight='bold')
         ax.set_xlabel(feature.title())
@@ -166,15 +231,20 @@ def create_feature_distributions(df):
     
     plt.suptitle('Feature Distributions: Hits vs Non-Hits', fontsize=16, fontweight='bold')
     plt.tight_layout()
-    plt.savefig('results/figures/05_feature_distributions.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('05_feature_distributions.png')
 
-def create_tempo_vs_energy_scatter(df):
+def create_tempo_vs_energy_scatter(df, max_points=SCATTER_MAX_POINTS, n_total=None):
     """Plot 6: Tempo vs Energy Scatter Plot"""
+    import matplotlib.pyplot as plt
+    
     if 'tempo' not in df.columns or 'energy' not in df.columns:
         print("⚠️ Tempo or Energy not available for scatter plot")
         return
     
+    # Millions of overlapping points are unreadable and slow to draw
+    n_total = n_total or len(df)
+    df = stratified_sample(df, max_points)
+    
     plt.figure(figsize=(12, 8))
     
     # Create scatter plot
@@ -188,41 +258,41 @@ def create_tempo_vs_energy_scatter(df):
     
     plt.xlabel('Tempo (BPM)', fontsize=12)
     plt.ylabel('Energy', fontsize=12)
-    plt.title('Tempo vs Energy: Hits vs Non-Hits', fontsize=16, fontweight='bold')
+    title = 'Tempo vs Energy: Hits vs Non-Hits'
+    if len(df) < n_total:
+        title += f' (sample of {len(df):,} / {n_total:,})'
+    plt.title(title, fontsize=16, fontweight='bold')
     plt.legend()
     plt.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('results/figures/06_tempo_energy_scatter.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    _finish_figure('06_tempo_energy_scatter.png')
 
-def generate_insights_summary(df):
+def generate_insights_summary(df, stats=None):
     """Generate key insights from the data"""
+    stats = _statistics(df, stats)
     print("\n" + "="*50)
     print("🧠 KEY INSIGHTS FROM DATA EXPLORATION")
     print("="*50)
     
     # Basic stats
-    hit_rate = df['target'].mean()
-    print(f"📊 Overall hit rate: {hit_rate:.1%}")
+    print(f"📊 Overall hit rate: {stats.hit_rate:.1%}")
     
     # Feature insights
     audio_features = ['danceability', 'energy', 'valence', 'acousticness']
-    available_features = [f for f in audio_features if f in df.columns]
+    available_features = [f for f in audio_features if f in stats.features]
     
     print("\n🎵 AUDIO FEATURE INSIGHTS:")
     for feature in available_features:
-        hit_mean = df[df['target'] == 1][feature].mean()
-        non_hit_mean = df[df['target'] == 0][feature].mean()
+        non_hit_mean, hit_mean = stats.group_means[:, stats.feature_index(feature)]
         diff = hit_mean - non_hit_mean
         
         direction = "higher" if diff > 0 else "lower"
         print(f"   • Hit songs have {direction} {feature}: {hit_mean:.3f} vs {non_hit_mean:.3f}")
     
     # Correlation insights
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    if 'target' in numeric_cols:
-        corr_with_target = df[numeric_cols].corr()['target'].abs().sort_values(ascending=False)
+    if stats.target in stats.columns:
+        corr_with_target = stats.target_correlations()
         print(f"\n🔍 MOST PREDICTIVE FEATURES:")
         for feature, corr in corr_with_target.items():
             if feature != 'target' and abs(corr) > 0.05:
@@ -233,46 +303,139 @@ def generate_insights_summary(df):
     print("   • We can build ML models to predict hit probability")
     print("   • A/B testing can help optimize song recommendations")
 
-def main():
+FIGURES = [
+    ("01_target_distribution.png", create_target_distribution_plot, "target distribution plot"),
+    ("02_audio_features_comparison.png", create_audio_features_comparison,
+     "audio features comparison"),
+    ("03_correlation_heatmap.png", create_correlation_heatmap, "correlation heatmap"),
+    ("04_success_by_features.png", create_success_rate_by_feature, "success rate by features"),
+    ("05_feature_distributions.png", create_feature_distributions, "feature distributions"),
+    ("06_tempo_energy_scatter.png", create_tempo_vs_energy_scatter, "tempo vs energy scatter"),
+]
+
+def figure_digest(function, stats, **options):
+    """Identity of a figure's inputs: plotting code, dataset and render options"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(inspect.getsource(function).encode())
+    digest.update(json.dumps([stats.fingerprint, stats.bins, options], sort_keys=True).encode())
+    return digest.hexdigest()
+
+def _set_style():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+
+def _figure_args(filename, df, stats, max_points):
+    """Arguments for one figure; only the scatter needs rows, and only a sample"""
+    if filename == "06_tempo_energy_scatter.png":
+        columns = [c for c in ('tempo', 'energy', 'target') if c in df.columns]
+        sample = stratified_sample(df[columns], max_points)
+        return (sample,), {"max_points": max_points, "n_total": len(df)}
+    return (None, stats), {}
+
+def _draw(filename, args, kwargs):
+    function = next(fn for name, fn, _ in FIGURES if name == filename)
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return filename, time.perf_counter() - start
+
+def _render_figure(task):
+    """Worker entry point: draw one figure without a display"""
+    import matplotlib.pyplot as plt
+    
+    filename, args, kwargs, render = task
+    plt.switch_backend('Agg')
+    _RENDER.update(render)
+    _set_style()
+    return _draw(filename, args, kwargs)
+
+def render_figures(df, stats, workers=1, force=False, max_points=SCATTER_MAX_POINTS):
+    """Render every figure whose inputs changed; returns (rendered, skipped)"""
+    output_dir = Path(_RENDER["output_dir"])
+    manifest_path = output_dir / RENDER_MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    
+    tasks, digests, skipped = [], {}, []
+    for i, (filename, function, description) in enumerate(FIGURES, 1):
+        digest = figure_digest(function, stats, dpi=_RENDER["dpi"], max_points=max_points)
+        if not force and manifest.get(filename) == digest and (output_dir / filename).exists():
+            print(f"⏭️ {i}. {description} unchanged, skipping")
+            skipped.append(filename)
+            continue
+        args, kwargs = _figure_args(filename, df, stats, max_points)
+        tasks.append((filename, args, kwargs, dict(_RENDER)))
+        digests[filename] = digest
+    
+    if workers > 1 and len(tasks) > 1:
+        print(f"🧵 Rendering {len(tasks)} figures on {workers} worker processes...")
+        with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+            rendered = list(pool.map(_render_figure, tasks))
+    else:
+        _set_style()
+        rendered = []
+        for filename, args, kwargs, _ in tasks:
+            description = next(d for name, _, d in FIGURES if name == filename)
+            print(f"\n🖼️ Creating {description}...")
+            rendered.append(_draw(filename, args, kwargs))
+    
+    manifest.update(digests)
+    tmp = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, manifest_path)
+    return rendered, skipped
+
+def main(argv=None):
     """Run all visualizations"""
+    parser = argparse.ArgumentParser(description="Create the Spotify exploration figures")
+    parser.add_argument("--input", help="CSV to plot (default: processed, else raw data)")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR))
+    parser.add_argument("--headless", action="store_true",
+                        help="never open windows (implied by --workers > 1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="render figures in this many processes")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--max-points", type=int, default=SCATTER_MAX_POINTS,
+                        help="scatter plots sample larger datasets down to this many tracks")
+    parser.add_argument("--force", action="store_true", help="re-render unchanged figures")
+    args = parser.parse_args(argv)
+    
+    # Plotting and pandas-backed helpers load after argument parsing so --help stays instant
+    import matplotlib.pyplot as plt
+    from src.analytics.statistics import get_statistics
+    
     print("🎨 CREATING SPOTIFY DATA VISUALIZATIONS")
     print("="*50)
     
+    headless = args.headless or args.workers > 1
+    if headless:
+        plt.switch_backend('Agg')
+    _RENDER.update(output_dir=args.output_dir, dpi=args.dpi, headless=headless)
+    
     # Create results directory
-    results_dir = Path("results/figures")
+    results_dir = Path(args.output_dir)
     results_dir.mkdir(parents=True, exist_ok=True)
     
     # Load data
-    df = load_data()
-    
-    # Set plotting style
-    plt.style.use('seaborn-v0_8')
-    sns.set_palette("husl")
-    
-    print("\n1 Creating target distribution plot...")
-    create_target_distribution_plot(df)
-    
-    print("\n2️ Creating audio features comparison...")
-    create_audio_features_comparison(df)
-    
-    print("\n3️ Creating correlation heatmap...")
-    create_correlation_heatmap(df)
-    
-    print("\n4️ Creating success rate by features...")
-    create_success_rate_by_feature(df)
+    df = load_data(args.input)
     
-    print("\n5️ Creating feature distributions...")
-    create_feature_distributions(df)
+    # One statistics pass shared by every plot and the summary
+    stats = get_statistics(df, cache_dir=results_dir / ".stats_cache")
     
-    print("\n6️ Creating tempo vs energy scatter...")
-    create_tempo_vs_energy_scatter(df)
+    start = time.perf_counter()
+    rendered, skipped = render_figures(df, stats, args.workers, args.force, args.max_points)
+    elapsed = time.perf_counter() - start
     
     print("\n7️ Generating insights summary...")
-    generate_insights_summary(df)
+    generate_insights_summary(df, stats)
     
     print(f"\n🎉 ALL VISUALIZATIONS COMPLETE!")
     print(f" Saved to: {results_dir}")
+    print(f" Rendered {len(rendered)} figures, skipped {len(skipped)} unchanged "
+          f"({elapsed:.1f} s)")
     print("\n Ready for feature engineering and ML modeling!")
+    return rendered, skipped
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
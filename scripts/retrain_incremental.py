@@ -0,0 +1,156 @@
+"""
+Incrementally retrain the hit prediction model on newly labelled tracks
+Appends the batch to the feature store, then grows the forest with
+warm_start on new + recent rows, or refits on everything when drift is
+detected, and atomically replaces the model file the scorer loads. An
+exported model bundle next to the model is re-exported too, since serving
+prefers the bundle over the pickle
+
+Usage:
+    python scripts/retrain_incremental.py --new data/raw/new_tracks.csv
+    python scripts/serve_model.py --reload-interval 30   # picks up the swap
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+from train_models import DEFAULT_INPUT, load_features
+from src.models.incremental import (
+    ACCURACY_DROP_THRESHOLD, PSI_THRESHOLD, FeatureStore, check_drift, grow_forest,
+    swap_model_file, upgrade_legacy_model
+)
+from src.models.model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle, export_bundle, is_bundle
+from src.models.model_server import DEFAULT_FEATURES_PATH, DEFAULT_MODEL_PATH, read_feature_list
+
+DEFAULT_STORE_PATH = ROOT_DIR / "data" / "processed" / "feature_store"
+
+
+def open_store(args, features, model_info):
+    """Open the feature store, seeding it from the training history once"""
+    if (Path(args.store) / "manifest.json").exists():
+        store = FeatureStore(args.store)
+        if store.features != features:
+            raise ValueError(f"Feature store at {args.store} holds different features")
+        return store
+
+    print(f"🗄️ Seeding feature store from: {args.history}")
+    X, y = load_features(args.history, features)
+    store = FeatureStore.create(args.store, features, X, y)
+    store.set_reference(X, accuracy=model_info.get("accuracy"))
+    return store
+
+
+def training_rows(store, X_new, y_new, last_rows=None):
+    """Stored rows (all, or enough for ``last_rows`` in total) plus the new batch
+
+    The batch joins the store only once the retrained model is swapped in,
+    so a failed retrain can simply be re-run.
+    """
+    n_stored = None if last_rows is None else last_rows - len(y_new)
+    if n_stored is not None and n_stored <= 0:
+        return X_new, y_new
+    X, y = store.load(last_rows=n_stored)
+    return np.concatenate([X, X_new]), np.concatenate([y, y_new])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally retrain the hit model")
+    parser.add_argument("--new", required=True, help="CSV of newly labelled tracks")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument("--features", default=str(DEFAULT_FEATURES_PATH))
+    parser.add_argument("--bundle",
+                        help="model bundle to re-export (default: hit_model next to --model, "
+                             "if it was exported)")
+    parser.add_argument("--store", default=str(DEFAULT_STORE_PATH))
+    parser.add_argument("--history", default=str(DEFAULT_INPUT),
+                        help="full training data used to seed a new feature store")
+    parser.add_argument("--new-trees", type=int, default=20,
+                        help="trees added per incremental update")
+    parser.add_argument("--max-trees", type=int, default=500,
+                        help="oldest trees are retired beyond this many")
+    parser.add_argument("--recent-rows", type=int, default=5000,
+                        help="most recent stored rows (incl. the batch) the new trees see")
+    parser.add_argument("--psi-threshold", type=float, default=PSI_THRESHOLD)
+    parser.add_argument("--accuracy-drop", type=float, default=ACCURACY_DROP_THRESHOLD)
+    parser.add_argument("--full", action="store_true", help="force a full refit")
+    args = parser.parse_args(argv)
+
+    import joblib
+    from sklearn.base import clone
+
+    print("♻️ SPOTIFY HIT MODEL - INCREMENTAL RETRAIN")
+    print("=" * 50)
+    model_path = Path(args.model)
+    info_path = model_path.parent / "model_info.json"
+    model_info = json.loads(info_path.read_text()) if info_path.exists() else {}
+    features = read_feature_list(args.features)
+    # Pickles from older sklearn versions need new defaults before clone/warm_start
+    model = upgrade_legacy_model(joblib.load(model_path))
+    store = open_store(args, features, model_info)
+
+    start = time.perf_counter()
+    X_new, y_new = load_features(args.new, features)
+    drift = check_drift(store, model, X_new, y_new, args.psi_threshold, args.accuracy_drop)
+    print(f"📥 {len(y_new):,} new tracks (store has {store.n_rows:,} rows)")
+    print(f"   Current model on the batch: {drift['accuracy']:.1%}")
+
+    can_grow = hasattr(model, "estimators_") and hasattr(model, "warm_start")
+    if args.full or drift["drift"] or not can_grow:
+        reason = ("requested" if args.full else drift.get("reason")
+                  or "model does not support warm_start")
+        print(f"🔁 Full refit: {reason}")
+        X, y = training_rows(store, X_new, y_new)
+        params = {"oob_score": True} if getattr(model, "bootstrap", False) else {}
+        model = clone(model).set_params(**params).fit(X, y)
+        mode, rows_fit = "refit", len(y)
+    else:
+        X, y = training_rows(store, X_new, y_new, last_rows=args.recent_rows)
+        print(f"🌱 Growing forest by {args.new_trees} trees on {len(y):,} recent rows")
+        grow_forest(model, X, y, args.new_trees, args.max_trees)
+        mode, rows_fit = "warm_start", len(y)
+    elapsed = time.perf_counter() - start
+
+    swap_model_file(model, model_path)
+    store.append(X_new, y_new)
+    oob_accuracy = getattr(model, "oob_score_", None) if mode == "refit" else None
+    if mode == "refit":
+        # Drift checks compare batch accuracy with the OOB estimate when there is one
+        store.set_reference(X, accuracy=oob_accuracy if oob_accuracy is not None
+                            else (store.reference or {}).get("accuracy"))
+    entry = {
+        "mode": mode, "timestamp": time.time(), "new_rows": int(len(y_new)),
+        "rows_fit": int(rows_fit), "trees": len(getattr(model, "estimators_", [])),
+        "seconds": elapsed, "batch_accuracy_before": drift["accuracy"],
+        "drifted_features": drift["drifted_features"],
+    }
+    # "accuracy" stays the holdout test accuracy from training; OOB is recorded apart
+    if oob_accuracy is not None:
+        entry["oob_accuracy"] = float(oob_accuracy)
+        model_info["oob_accuracy"] = float(oob_accuracy)
+    model_info.setdefault("retrain_history", []).append(entry)
+    info_path.write_text(json.dumps(model_info, indent=2))
+    bundle_path = Path(args.bundle or model_path.parent / DEFAULT_BUNDLE_PATH.name)
+    if is_bundle(bundle_path):
+        stats = ModelBundle.load(bundle_path).normalization_stats
+        export_bundle(model, bundle_path, features, stats,
+                      {k: v for k, v in model_info.items() if k != "candidates"})
+
+    print(f"\n💾 MODEL SWAPPED ({mode}):")
+    print(f"   Location: {model_path}")
+    if is_bundle(bundle_path):
+        print(f"   Bundle: {bundle_path}")
+    print(f"   Trees: {entry['trees']}, fitted on {rows_fit:,} rows in {elapsed:.2f} s")
+    return entry
+
+
+if __name__ == "__main__":
+    main()
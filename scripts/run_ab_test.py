@@ -0,0 +1,112 @@
+"""
+Analyze a recommendation A/B test from its exposure log
+Streams the log in chunks through the A/B engine, printing per-variant
+results and always-valid sequential p-values. With --state, the engine
+resumes from a previous run: events already ingested from a log are
+skipped, so re-running on an appended log reads only the new events.
+
+Usage:
+    python scripts/run_ab_test.py --generate 20000000 --lift 0.002   # load test
+    python scripts/run_ab_test.py --log results/ab_test/events.csv
+    python scripts/run_ab_test.py --log new_events.csv --state results/ab_test/state.json
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from src.ab_testing.engine import ABTestEngine
+from src.ab_testing.events import generate_event_log
+
+DEFAULT_LOG_PATH = ROOT_DIR / "results" / "ab_test" / "events.csv"
+DEMO_EVENTS = 1_000_000
+
+
+def print_results(engine):
+    print(f"\n📊 RESULTS: {engine.experiment} ({engine.n_events:,} exposures, "
+          f"{engine.n_batches} looks)")
+    for row in engine.results():
+        line = (f"   {row['variant']:12s} n={row['exposures']:>12,}  "
+                f"mean={row['mean']:.5f}  std={row['std']:.4f}")
+        if "difference" in row:
+            verdict = "✅ significant" if row["significant"] else "⏳ not yet"
+            line += (f"  lift={row['relative_lift']:+.2%}  "
+                     f"p(seq)={row['sequential_p_value']:.4f}  "
+                     f"p(z)={row['z_p_value']:.4f}  {verdict}")
+        print(line)
+    if engine.n_mismatched:
+        print(f"⚠️ {engine.n_mismatched:,} exposures were served a variant other than "
+              f"their hash assignment")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a recommendation A/B test")
+    parser.add_argument("--log", default=str(DEFAULT_LOG_PATH), help="exposure log CSV")
+    parser.add_argument("--experiment", default="recommendations")
+    parser.add_argument("--variants", nargs="+", default=["control", "treatment"],
+                        help="variant names, control first")
+    parser.add_argument("--weights", nargs="+", type=float, help="traffic split per variant")
+    parser.add_argument("--tau", type=float, default=0.02,
+                        help="expected effect size on the outcome's scale (mSPRT mixture)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--chunksize", type=int, default=1_000_000,
+                        help="events per look at the data")
+    parser.add_argument("--state", help="engine state JSON to resume from and update")
+    parser.add_argument("--check-variants", action="store_true",
+                        help="compare logged variants with the hash assignment")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="first write a synthetic log of N events to --log")
+    parser.add_argument("--base-rate", type=float, default=0.10)
+    parser.add_argument("--lift", type=float, default=0.005,
+                        help="absolute outcome lift of the non-control variants (synthetic)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print("🧪 SPOTIFY RECOMMENDATION A/B TEST")
+    print("=" * 50)
+
+    log_path = Path(args.log)
+    n_generate = args.generate
+    if n_generate is None and not log_path.exists() and log_path == DEFAULT_LOG_PATH:
+        n_generate = DEMO_EVENTS
+        print(f"ℹ️ No exposure log yet, generating a {DEMO_EVENTS:,}-event demo log")
+    if n_generate:
+        start = time.perf_counter()
+        generate_event_log(
+            log_path, n_generate, args.experiment, args.variants, args.weights,
+            base_rate=args.base_rate, lifts={v: args.lift for v in args.variants[1:]},
+            seed=args.seed,
+        )
+        print(f"📝 Wrote {n_generate:,} events to {log_path} "
+              f"in {time.perf_counter() - start:.1f} s")
+
+    if args.state and Path(args.state).exists():
+        engine = ABTestEngine.load(args.state)
+        print(f"↩️ Resuming from {args.state} ({engine.n_events:,} exposures so far)")
+        skipped = engine.consumed.get(str(log_path.resolve()), 0)
+        if skipped:
+            print(f"⏭️ Skipping the first {skipped:,} events of {log_path}, already ingested")
+    else:
+        engine = ABTestEngine(args.experiment, args.variants, args.weights,
+                              tau=args.tau, alpha=args.alpha)
+
+    start = time.perf_counter()
+    rows = engine.ingest_csv(log_path, chunksize=args.chunksize,
+                             check_variants=args.check_variants)
+    elapsed = time.perf_counter() - start
+    print(f"📥 Ingested {rows:,} events in {elapsed:.1f} s "
+          f"({rows / max(elapsed, 1e-9):,.0f} events/s)")
+
+    print_results(engine)
+    if args.state:
+        engine.save(args.state)
+        print(f"\n💾 State saved to: {args.state}")
+    return engine
+
+
+if __name__ == "__main__":
+    main()
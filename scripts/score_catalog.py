@@ -0,0 +1,69 @@
+"""
+Precompute hit probabilities for the whole catalog
+Writes a memory-mappable score table that the scoring service and the
+recommender read instead of running the forest. Re-runs only re-score
+tracks whose model features changed; a new model re-scores everything.
+
+Usage:
+    python scripts/score_catalog.py
+    python scripts/score_catalog.py --catalog data/processed/new_tracks.csv --full
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from create_features import DEFAULT_STATS_PATH, FeaturePlan
+from serve_model import (
+    DEFAULT_CATALOG_PATH, DEFAULT_SCORE_TABLE_PATH, default_model_path,
+    file_signature, load_engineer
+)
+from src.data_processing.csv_cache import read_csv_cached
+from src.models.model_server import DEFAULT_FEATURES_PATH, HitPredictor
+from src.models.score_table import model_version, refresh_score_table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute catalog hit probabilities")
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH))
+    parser.add_argument("--model", default=str(default_model_path()))
+    parser.add_argument("--features", default=str(DEFAULT_FEATURES_PATH))
+    parser.add_argument("--stats", default=str(DEFAULT_STATS_PATH))
+    parser.add_argument("--output", default=str(DEFAULT_SCORE_TABLE_PATH))
+    parser.add_argument("--full", action="store_true",
+                        help="re-score every track even if the table is current")
+    parser.add_argument("--chunk-size", type=int, default=100_000,
+                        help="tracks per model call")
+    args = parser.parse_args(argv)
+
+    print("🎵 SPOTIFY CATALOG SCORING")
+    print("=" * 50)
+
+    predictor = HitPredictor.load(args.model, args.features)
+    catalog = read_csv_cached(args.catalog)
+    print(f"✅ Loaded {len(catalog):,} tracks from: {args.catalog}")
+
+    engineer = load_engineer(predictor, args.stats)
+    X = FeaturePlan(predictor.feature_names, engineer=engineer).execute(catalog)
+    X = np.asarray(X, dtype=np.float64)
+    track_ids = (catalog["track_id"].to_numpy() if "track_id" in catalog
+                 else np.arange(len(catalog)))
+
+    summary = refresh_score_table(
+        args.output, track_ids, X, predictor.predict_proba,
+        version=model_version(args.model, args.features, args.stats),
+        chunk_size=args.chunk_size, full=args.full, source=file_signature(args.catalog),
+    )
+    print(f"🔄 {summary['reason'].capitalize()}: re-scored {summary['rescored']:,}, "
+          f"reused {summary['reused']:,} of {summary['n_tracks']:,} tracks "
+          f"in {summary['seconds']:.2f}s")
+    print(f"💾 Score table saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
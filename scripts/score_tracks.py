@@ -0,0 +1,74 @@
+"""
+Score a track file with the hit prediction model
+Streams a CSV or Parquet file through read → engineer → predict → write
+stages with bounded queues and writes one hit probability per track
+
+Usage:
+    python scripts/score_tracks.py data/raw/Spotify_Data.csv
+    python scripts/score_tracks.py new_tracks.parquet --output results/scores.parquet
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from create_features import DEFAULT_STATS_PATH, FeaturePlan
+from serve_model import default_model_path, load_engineer
+from src.models.batch_scoring import score_file
+from src.models.model_server import DEFAULT_FEATURES_PATH, HitPredictor
+
+DEFAULT_OUTPUT_PATH = ROOT_DIR / "results" / "scores.csv"
+DEFAULT_KEEP_COLUMNS = ["track_id", "id", "song_title", "artist"]
+
+
+def print_report(report):
+    print(f"\n⏱️ STAGE THROUGHPUT:")
+    for stage in report["stages"]:
+        print(f"   {stage['stage']:10s} {stage['rows']:>12,} rows in {stage['busy_s']:7.2f}s "
+              f"busy  ({stage['rows_per_s']:>12,.0f} rows/s)")
+    print(f"   {'end-to-end':10s} {report['rows']:>12,} rows in {report['seconds']:7.2f}s "
+          f"wall  ({report['rows_per_s']:>12,.0f} rows/s)")
+    slowest = max(report["stages"], key=lambda s: s["busy_s"])
+    print(f"   Bottleneck: {slowest['stage']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet track file")
+    parser.add_argument("input", help="tracks to score (.csv, .parquet)")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT_PATH),
+                        help="scores file (.csv or .parquet)")
+    parser.add_argument("--model", default=str(default_model_path()))
+    parser.add_argument("--features", default=str(DEFAULT_FEATURES_PATH))
+    parser.add_argument("--stats", default=str(DEFAULT_STATS_PATH))
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per chunk")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="chunks buffered between stages (bounds memory)")
+    parser.add_argument("--keep", nargs="*", default=DEFAULT_KEEP_COLUMNS,
+                        help="input columns copied to the output when present")
+    args = parser.parse_args(argv)
+
+    print("🎵 SPOTIFY BATCH SCORING")
+    print("=" * 50)
+
+    predictor = HitPredictor.load(args.model, args.features)
+    print(f"✅ Model loaded from: {args.model}")
+    plan = FeaturePlan(predictor.feature_names,
+                       engineer=load_engineer(predictor, args.stats))
+
+    def engineer_fn(chunk):
+        return np.asarray(plan.execute(chunk), dtype=np.float64)
+
+    report = score_file(args.input, args.output, engineer_fn, predictor.predict_proba,
+                        keep_columns=args.keep, batch_size=args.batch_size,
+                        queue_size=args.queue_size)
+    print_report(report)
+    print(f"\n💾 {report['rows']:,} scores saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Spotify Hit Prediction Scoring Service
+Serve the trained model over a local HTTP API with micro-batching
+
+Usage:
+    python scripts/serve_model.py --port 8000
+
+    curl -X POST localhost:8000/predict -d '{"track": {"danceability": 0.8, ...}}'
+    curl -X POST localhost:8000/recommend -d '{"track_id": 0, "k": 10}'
+    curl localhost:8000/metrics
+"""
+
+import argparse
+import sys
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from create_features import DEFAULT_STATS_PATH, FeaturePlan, SpotifyFeatureEngineer
+from src.data_processing.csv_cache import read_csv_cached
+from src.models.model_bundle import DEFAULT_BUNDLE_PATH, is_bundle
+from src.models.model_server import (
+    DEFAULT_FEATURES_PATH, DEFAULT_MODEL_PATH, MODELS_DIR, HitPredictor, ScoringService,
+    make_server
+)
+from src.models.prediction_cache import PredictionCache
+from src.models.recommender import HitAwareRecommender
+from src.models.score_table import model_version, open_score_table
+from src.models.similarity import SimilarityIndex
+
+DEFAULT_CATALOG_PATH = ROOT_DIR / "data" / "processed" / "spotify_features_engineered.csv"
+DEFAULT_HIT_CACHE_PATH = MODELS_DIR / "hit_scores"
+DEFAULT_SCORE_TABLE_PATH = MODELS_DIR / "score_table"
+
+
+def load_engineer(predictor, stats_path=DEFAULT_STATS_PATH):
+    """Feature engineer fitted with the stats the model was trained with
+
+    Model bundles carry their normalization stats; plain pickles rely on
+    the stats file.
+    """
+    engineer = SpotifyFeatureEngineer()
+    stats = getattr(predictor.model, "normalization_stats", None)
+    if stats:
+        engineer.normalization_stats = stats
+        return engineer
+    return engineer.load_stats(stats_path)
+
+
+def default_model_path():
+    """The exported model bundle when there is one, else the pickle"""
+    return DEFAULT_BUNDLE_PATH if is_bundle(DEFAULT_BUNDLE_PATH) else DEFAULT_MODEL_PATH
+
+
+def build_feature_fn(feature_names, stats_path=DEFAULT_STATS_PATH, engineer=None):
+    """Accept either model-ready feature rows or raw audio features"""
+    if engineer is None:
+        engineer = SpotifyFeatureEngineer().load_stats(stats_path)
+    plan = FeaturePlan(feature_names, engineer=engineer)
+
+    def feature_fn(track):
+        if all(name in track for name in feature_names):
+            return [track[name] for name in feature_names]
+        return plan.execute_record(track)
+
+    return feature_fn
+
+
+def file_signature(*paths):
+    """Cache key that changes whenever any of the files is replaced"""
+    parts = []
+    for path in paths:
+        stat = Path(path).stat()
+        parts.append(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def load_score_table(args):
+    """Precomputed catalog scores, if written for this model and catalog"""
+    if not args.score_table or not (Path(args.score_table) / "meta.json").exists():
+        return None
+    version = model_version(args.model, args.features, args.stats)
+    source = file_signature(args.catalog) if args.catalog and Path(args.catalog).exists() else None
+    table = open_score_table(args.score_table, version, source)
+    if table is None:
+        print(f"⚠️ Score table is stale, run scripts/score_catalog.py: {args.score_table}")
+    else:
+        print(f"✅ Score table: {table.n_tracks:,} tracks from {args.score_table}")
+    return table
+
+
+def build_recommender(predictor, args, score_table=None):
+    """Load the catalog, similarity index and cached hit scores"""
+    plan = FeaturePlan(predictor.feature_names, engineer=load_engineer(predictor, args.stats))
+    catalog = read_csv_cached(args.catalog, mmap=True)
+    index = SimilarityIndex.load(args.index) if args.index else None
+    recommender = HitAwareRecommender.from_catalog(
+        catalog, plan, predictor.predict_proba, index=index, n_lists=args.lists,
+        hit_weight=args.hit_weight, n_probe=args.n_probe,
+    )
+    if recommender.index.n_tracks != len(catalog):
+        raise ValueError(f"Index has {recommender.index.n_tracks} tracks, "
+                         f"catalog has {len(catalog)}")
+
+    cache_key = file_signature(args.model, args.catalog)
+    if score_table is not None and score_table.meta.get("dense_ids") \
+            and score_table.n_tracks == len(catalog):
+        recommender.cache.adopt(score_table.probabilities)
+    elif recommender.cache.load(DEFAULT_HIT_CACHE_PATH, cache_key):
+        print(f"✅ Hit scores loaded from: {DEFAULT_HIT_CACHE_PATH}")
+    if args.warm_cache:
+        recommender.cache.warm()
+    print(f"✅ Recommending from {len(catalog):,} tracks in: {args.catalog}")
+    return recommender, cache_key
+
+
+def watch_model(service, args, interval, stop, hit_cache=None):
+    """Reload the model whenever its file is replaced (e.g. by a retrain)
+
+    ``hit_cache["key"]`` follows the served model, so hit scores saved at
+    shutdown are filed under the model that computed them.
+    """
+    signature = file_signature(args.model)
+    while not stop.wait(interval):
+        try:
+            current = file_signature(args.model)
+            if current == signature:
+                continue
+            predictor = HitPredictor.load(args.model, args.features)
+            service.swap_predictor(predictor)
+            if service.recommender is not None:
+                service.recommender.set_predict_fn(predictor.predict_proba)
+                if hit_cache is not None:
+                    hit_cache["key"] = file_signature(args.model, args.catalog)
+            signature = current
+            print(f"🔄 Reloaded model from: {args.model}")
+        except (OSError, ValueError, EOFError) as exc:
+            print(f"⚠️ Model reload failed, still serving the previous model: {exc}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Spotify hit probabilities over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=str(default_model_path()),
+                        help="model bundle directory or joblib pickle")
+    parser.add_argument("--features", default=str(DEFAULT_FEATURES_PATH))
+    parser.add_argument("--stats", default=str(DEFAULT_STATS_PATH))
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--catalog", default=str(DEFAULT_CATALOG_PATH),
+                        help="tracks to recommend from ('' disables /recommend)")
+    parser.add_argument("--index", help="saved similarity index for the catalog")
+    parser.add_argument("--lists", type=int, default=0,
+                        help="IVF lists when building the index at startup")
+    parser.add_argument("--n-probe", type=int, help="IVF lists scanned per query")
+    parser.add_argument("--hit-weight", type=float, default=0.5)
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="score the whole catalog before serving")
+    parser.add_argument("--cache-size", type=int, default=100_000,
+                        help="cached predictions kept (0 disables the prediction cache)")
+    parser.add_argument("--cache-ttl", type=float, help="seconds a cached prediction stays valid")
+    parser.add_argument("--cache-decimals", type=int, default=4,
+                        help="decimal places ad-hoc feature vectors are rounded to for caching")
+    parser.add_argument("--score-table", default=str(DEFAULT_SCORE_TABLE_PATH),
+                        help="precomputed catalog scores from score_catalog.py ('' disables)")
+    parser.add_argument("--reload-interval", type=float, default=0,
+                        help="seconds between checks for a replaced model file (0 = off)")
+    args = parser.parse_args(argv)
+
+    print("🎵 SPOTIFY HIT PREDICTION SERVICE")
+    print("=" * 50)
+
+    predictor = HitPredictor.load(args.model, args.features)
+    print(f"✅ Model loaded from: {args.model}")
+    print(f"   Features: {', '.join(predictor.feature_names)}")
+
+    score_table = load_score_table(args)
+    recommender, hit_cache = None, {"key": None}
+    if args.catalog and Path(args.catalog).exists():
+        recommender, hit_cache["key"] = build_recommender(predictor, args, score_table)
+
+    cache = None
+    if args.cache_size > 0:
+        cache = PredictionCache(args.cache_size, args.cache_ttl, args.cache_decimals,
+                                model_path=args.model)
+        print(f"🗃️ Prediction cache: {args.cache_size:,} entries")
+
+    service = ScoringService(
+        predictor,
+        feature_fn=build_feature_fn(predictor.feature_names,
+                                    engineer=load_engineer(predictor, args.stats)),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        recommender=recommender,
+        cache=cache,
+        score_table=score_table,
+    )
+    server = make_server(service, args.host, args.port)
+    print(f"🚀 Listening on http://{args.host}:{server.server_port}")
+    print("   POST /predict  POST /recommend  GET /metrics  GET /health")
+
+    stop = threading.Event()
+    if args.reload_interval > 0:
+        threading.Thread(target=watch_model, args=(service, args, args.reload_interval, stop, hit_cache),
+                         name="model-watcher", daemon=True).start()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        stop.set()
+        server.server_close()
+        service.close()
+        if recommender is not None:
+            recommender.cache.save(DEFAULT_HIT_CACHE_PATH, hit_cache["key"])
+
+
+if __name__ == "__main__":
+    main()
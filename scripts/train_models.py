@@ -0,0 +1,195 @@
+"""
+Train and tune the Spotify hit prediction models
+Reproducible replacement for notebooks/02_ml_model_training.ipynb: searches
+the Random Forest / Logistic Regression / Extra Trees candidates with
+parallel successive halving and saves the winner for serving
+
+Usage:
+    python scripts/train_models.py --workers 8
+    python scripts/train_models.py --families random_forest --eta 1   # full grid
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))
+sys.path.append(str(ROOT_DIR / "scripts"))
+
+from create_features import DEFAULT_STATS_PATH, FeaturePlan, SpotifyFeatureEngineer
+from src.data_processing.csv_cache import read_csv_cached
+from src.models.incremental import swap_model_file
+from src.models.model_bundle import DEFAULT_BUNDLE_PATH, export_bundle, is_bundle
+from src.models.model_server import DEFAULT_MODEL_PATH, MODELS_DIR, read_feature_list
+from src.models.tuning import (
+    MODEL_NAMES, SEARCH_SPACES, FeatureMatrixCache, SuccessiveHalvingSearch, candidate_grid,
+    make_estimator
+)
+
+DEFAULT_INPUT = ROOT_DIR / "data" / "processed" / "spotify_features_engineered.csv"
+
+# Feature selection carried over from the notebook
+BEST_FEATURES = [
+    'energy_loudness', 'happiness_score', 'dance_tempo', 'danceability', 'energy_dance',
+    'happy_dance', 'dancefloor_potential', 'energy', 'valence', 'speechiness'
+]
+
+
+def load_features(input_path, features, target="target"):
+    """Model matrix and labels, engineering any columns the CSV lacks"""
+    df = read_csv_cached(input_path)
+    missing = [name for name in features if name not in df.columns]
+    if missing:
+        engineer = SpotifyFeatureEngineer()
+        if Path(DEFAULT_STATS_PATH).exists():
+            engineer.load_stats(DEFAULT_STATS_PATH)
+        else:
+            engineer.fit(df)
+        X = FeaturePlan(features, engineer=engineer).execute(df)
+    else:
+        X = df[features]
+    return X.to_numpy(dtype=np.float64), df[target].to_numpy()
+
+
+class SerialExecutor:
+    """Executor stand-in that runs tasks in the calling process"""
+
+    def map(self, fn, iterable):
+        return map(fn, iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune and train the hit prediction model")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT))
+    parser.add_argument("--features", help="feature list file (defaults to the notebook's selection)")
+    parser.add_argument("--families", nargs="+", default=list(SEARCH_SPACES),
+                        choices=list(SEARCH_SPACES))
+    parser.add_argument("--cv", type=int, default=3, help="cross-validation folds")
+    parser.add_argument("--eta", type=int, default=3,
+                        help="successive halving factor (1 = exhaustive grid search)")
+    parser.add_argument("--min-samples", type=int, default=100,
+                        help="training rows in the first halving round")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--output-dir", default=str(MODELS_DIR))
+    parser.add_argument("--cache-dir", help="feature matrix cache (default: next to the input)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print("🤖 SPOTIFY HIT PREDICTION - MODEL TRAINING")
+    print("=" * 50)
+    timings = {}
+    features = read_feature_list(args.features) if args.features else BEST_FEATURES
+
+    # Engineered matrices are cached on disk and memory-mapped by the workers
+    start = time.perf_counter()
+    cache = FeatureMatrixCache(args.cache_dir or Path(args.input).parent / ".feature_cache")
+    X_path, y_path, hit = cache.get_or_build(
+        args.input, features, lambda: load_features(args.input, features)
+    )
+    X, y = np.load(X_path, mmap_mode="r"), np.load(y_path)
+    timings["features_s"] = time.perf_counter() - start
+    print(f"📊 {len(y):,} songs, {len(features)} features "
+          f"({'cached' if hit else 'built'} in {timings['features_s']:.2f} s)")
+
+    from sklearn.model_selection import train_test_split
+
+    train_idx, test_idx = train_test_split(
+        np.arange(len(y)), test_size=args.test_size, random_state=args.seed, stratify=y
+    )
+
+    candidates = candidate_grid(args.families)
+    search = SuccessiveHalvingSearch(candidates, n_splits=args.cv, eta=args.eta,
+                                     min_samples=args.min_samples, random_state=args.seed)
+    n_rounds = search.planned_rounds(len(train_idx))
+    strategy = "successive halving" if n_rounds > 1 else "grid search"
+    print(f"🔍 Searching {len(candidates)} candidates ({strategy}, {n_rounds} rounds) "
+          f"on {args.workers} workers...")
+
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(args.workers) if args.workers > 1 else SerialExecutor()
+    with executor:
+        best = search.fit(X_path, y_path, train_idx, executor)
+    timings["search_s"] = time.perf_counter() - start
+    for rnd in search.rounds:
+        top = max(rnd["scores"].values())
+        print(f"   Round {rnd['round']}: {rnd['candidates']:4d} candidates x {rnd['rows']:,} rows "
+              f"-> best CV {top:.1%} ({rnd['wall_s']:.1f} s)")
+
+    # Refit the winner on the full training split and score the holdout
+    start = time.perf_counter()
+    model = make_estimator(best["family"], best["params"], random_state=args.seed)
+    model.fit(X[train_idx], y[train_idx])
+    timings["refit_s"] = time.perf_counter() - start
+    accuracy = float((model.predict(X[test_idx]) == y[test_idx]).mean())
+
+    model_type = MODEL_NAMES[best["family"]]
+    print(f"\n🏆 BEST MODEL: {model_type} {best['params']}")
+    print(f"   CV accuracy: {best['cv_accuracy']:.1%}")
+    print(f"   Test accuracy: {accuracy:.1%}")
+
+    # Saved where serving looks, whichever family won
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_path = output_dir / DEFAULT_MODEL_PATH.name
+    bundle_path = output_dir / DEFAULT_BUNDLE_PATH.name
+    swap_model_file(model, model_path)
+    with open(output_dir / "model_features.txt", "w") as f:
+        f.writelines(f"{name}\n" for name in features)
+
+    model_info = {
+        "model_type": model_type,
+        "family": best["family"],
+        "accuracy": accuracy,
+        "cv_accuracy": best["cv_accuracy"],
+        "parameters": best["params"],
+        "features_used": features,
+        "model_path": model_path.name,
+        "search": {
+            "strategy": search.strategy,
+            "eta": args.eta,
+            "cv_folds": args.cv,
+            "workers": args.workers,
+            "seed": args.seed,
+            "total_fits": sum(rnd["fits"] for rnd in search.rounds),
+            "rounds": [{k: v for k, v in rnd.items() if k != "scores"} for rnd in search.rounds],
+        },
+        "timings": timings,
+        "candidates": search.candidate_report(),
+    }
+    with open(output_dir / "model_info.json", "w") as f:
+        json.dump(model_info, f, indent=2)
+    bundled = hasattr(model, "estimators_") or hasattr(model, "tree_")
+    if bundled:
+        stats = json.loads(DEFAULT_STATS_PATH.read_text()) if DEFAULT_STATS_PATH.exists() else None
+        export_bundle(model, bundle_path, features, stats,
+                      {k: v for k, v in model_info.items() if k != "candidates"})
+    elif is_bundle(bundle_path):
+        # Serving prefers a bundle, so a stale one would shadow the new model
+        shutil.rmtree(bundle_path)
+
+    print(f"\n💾 MODEL SAVED:")
+    print(f"   Location: {model_path}")
+    if bundled:
+        print(f"   Bundle: {bundle_path}")
+    print(f"   Fits: {model_info['search']['total_fits']:,} "
+          f"(search {timings['search_s']:.1f} s, refit {timings['refit_s']:.1f} s)")
+    return model_info
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+A/B testing engine for recommendation variants
+Consumes an exposure log (one row per recommendation shown, with its
+attributed outcome) in batches and keeps only per-variant sufficient
+statistics, so state size is independent of the number of events
+"""
+
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .assignment import VariantAssigner
+from .sequential import StreamingMoments, difference_stats, msprt_p_value, z_test_p_value
+
+STATE_FORMAT_VERSION = 1
+
+
+class ABTestEngine:
+    """Deterministic assignment plus streaming per-variant statistics
+
+    Each ``ingest`` call is one look at the data: the always-valid p-value
+    of every treatment against the first (control) variant is updated as a
+    running minimum, so stopping as soon as it drops below ``alpha`` keeps
+    the false-positive rate at ``alpha``. ``tau`` is the expected effect
+    size on the outcome's scale (e.g. 0.02 for a two-point conversion lift).
+    """
+
+    def __init__(self, experiment: str, variants: Sequence[str] = ("control", "treatment"),
+                 weights: Optional[Sequence[float]] = None, tau: float = 0.02,
+                 alpha: float = 0.05):
+        self.assigner = VariantAssigner(experiment, variants, weights)
+        self.tau = tau
+        self.alpha = alpha
+        self.moments = StreamingMoments(len(self.variants))
+        self.sequential_p = np.ones(len(self.variants))
+        self.n_batches = 0
+        self.n_mismatched = 0
+        # Rows already ingested per exposure log, so a resumed run reads only new events
+        self.consumed: Dict[str, int] = {}
+
+    @property
+    def experiment(self) -> str:
+        return self.assigner.experiment
+
+    @property
+    def variants(self) -> List[str]:
+        return self.assigner.variants
+
+    @property
+    def n_events(self) -> int:
+        return int(self.moments.count.sum())
+
+    def assign(self, user_ids) -> np.ndarray:
+        return self.assigner.assign(user_ids)
+
+    def ingest(self, user_ids, outcomes, logged_variants=None) -> None:
+        """Fold one batch of exposures into the statistics
+
+        Variants are recomputed from the user ids. If the log also records
+        the variant that was served, disagreements are counted in
+        ``n_mismatched`` (a sign of a broken assignment path).
+        """
+        groups = self.assign(user_ids)
+        if logged_variants is not None:
+            logged = np.asarray(logged_variants)
+            if logged.dtype.kind not in "iu":
+                codes = np.full(len(logged), -1)
+                for i, name in enumerate(self.variants):
+                    codes[logged == name] = i
+                logged = codes
+            self.n_mismatched += int((logged != groups).sum())
+
+        self.moments.update(groups, outcomes)
+        self.n_batches += 1
+        for treatment in range(1, len(self.variants)):
+            diff, variance = difference_stats(self.moments, 0, treatment)
+            self.sequential_p[treatment] = min(self.sequential_p[treatment],
+                                               msprt_p_value(diff, variance, self.tau))
+
+    def ingest_frame(self, df, check_variants: bool = False) -> None:
+        logged = df["variant"].to_numpy() if check_variants and "variant" in df else None
+        self.ingest(df["user_id"].to_numpy(), df["outcome"].to_numpy(), logged)
+
+    def ingest_csv(self, path, chunksize: int = 1_000_000, check_variants: bool = False,
+                   max_batches: Optional[int] = None) -> int:
+        """Stream an exposure log CSV, one look per chunk; returns rows read
+
+        Logs are append-only with one event per line. Rows ingested by an
+        earlier call (or a saved state) are skipped without being parsed.
+        """
+        import pandas as pd
+
+        columns = ["user_id", "outcome"] + (["variant"] if check_variants else [])
+        key = str(Path(path).resolve())
+        offset = self.consumed.get(key, 0)
+        rows = 0
+        with open(path, "rb") as f:
+            header = pd.read_csv(f, nrows=0).columns.tolist()
+            f.seek(0)
+            f.readline()
+            if sum(1 for _ in islice(f, offset)) < offset:
+                raise ValueError(f"{path} has fewer than the {offset:,} events already "
+                                 f"ingested; was the log truncated or replaced?")
+            reader = pd.read_csv(f, header=None, names=header, usecols=columns,
+                                 chunksize=chunksize, dtype={"outcome": np.float64})
+            for i, chunk in enumerate(reader):
+                if max_batches is not None and i >= max_batches:
+                    break
+                self.ingest_frame(chunk, check_variants=check_variants)
+                rows += len(chunk)
+                self.consumed[key] = offset + rows
+        return rows
+
+    def results(self) -> List[Dict]:
+        """Per-variant summary with lift and p-values against control"""
+        counts, means = self.moments.count, self.moments.mean
+        std = np.sqrt(self.moments.variance)
+        rows = []
+        for i, name in enumerate(self.variants):
+            row = {"variant": name, "exposures": int(counts[i]), "mean": float(means[i]),
+                   "std": float(std[i])}
+            if i > 0:
+                diff, variance = difference_stats(self.moments, 0, i)
+                row.update({
+                    "difference": diff,
+                    "relative_lift": diff / means[0] if means[0] else float("nan"),
+                    "z_p_value": z_test_p_value(diff, variance),
+                    "sequential_p_value": float(self.sequential_p[i]),
+                    "significant": bool(self.sequential_p[i] < self.alpha),
+                })
+            rows.append(row)
+        return rows
+
+    def save(self, path) -> Path:
+        """Write the engine state so a later run resumes without re-reading"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": STATE_FORMAT_VERSION, "experiment": self.experiment,
+            "variants": self.variants, "weights": self.assigner.weights.tolist(),
+            "tau": self.tau, "alpha": self.alpha, "moments": self.moments.to_dict(),
+            "sequential_p": self.sequential_p.tolist(), "n_batches": self.n_batches,
+            "n_mismatched": self.n_mismatched, "consumed": self.consumed,
+        }
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "ABTestEngine":
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != STATE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported A/B state version in {path}: {state.get('version')}")
+        engine = cls(state["experiment"], state["variants"], state["weights"],
+                     tau=state["tau"], alpha=state["alpha"])
+        engine.moments = StreamingMoments.from_dict(state["moments"])
+        engine.sequential_p = np.asarray(state["sequential_p"])
+        engine.n_batches = state["n_batches"]
+        engine.n_mismatched = state["n_mismatched"]
+        engine.consumed = dict(state.get("consumed", {}))
+        return engine
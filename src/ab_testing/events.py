@@ -0,0 +1,46 @@
+"""
+Synthetic exposure logs for load-testing the A/B engine
+Rows are generated and written chunk by chunk, so logs of tens of
+millions of events need only one chunk of memory
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .assignment import VariantAssigner
+
+
+def generate_event_log(path, n_events: int, experiment: str = "recommendations",
+                       variants: Sequence[str] = ("control", "treatment"),
+                       weights: Optional[Sequence[float]] = None, base_rate: float = 0.10,
+                       lifts: Optional[Dict[str, float]] = None, n_users: int = 1_000_000,
+                       chunk_size: int = 1_000_000, seed: int = 0) -> Path:
+    """Write ``n_events`` exposures with Bernoulli outcomes to a CSV
+
+    Users are served the variant their hash assigns them; ``lifts`` adds an
+    absolute amount to ``base_rate`` for the named variants.
+    """
+    import pandas as pd
+
+    assigner = VariantAssigner(experiment, variants, weights)
+    lifts = lifts or {}
+    rates = np.array([base_rate + lifts.get(v, 0.0) for v in assigner.variants])
+    names = np.array(assigner.variants, dtype=object)
+    rng = np.random.default_rng(seed)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as out:
+        for start in range(0, n_events, chunk_size):
+            n = min(chunk_size, n_events - start)
+            user_ids = rng.integers(0, n_users, n)
+            groups = assigner.assign(user_ids)
+            pd.DataFrame({
+                "timestamp": start + np.arange(n),
+                "user_id": user_ids,
+                "variant": names[groups],
+                "outcome": (rng.random(n) < rates[groups]).astype(np.int8),
+            }).to_csv(out, index=False, header=(start == 0))
+    return path
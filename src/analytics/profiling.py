@@ -0,0 +1,161 @@
+"""
+Per-stage instrumentation for data pipelines
+Records wall time, CPU time, peak RSS growth, rows and bytes allocated
+for each named stage and reports them as JSON or log records
+"""
+
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("spotify.pipeline")
+logger.addHandler(logging.NullHandler())
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, if available"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class PipelineProfiler:
+    """Collect metrics for named pipeline stages
+
+    Each ``stage`` block records:
+
+    - ``wall_s`` / ``cpu_s``: elapsed and process CPU time
+    - ``peak_rss_delta_bytes``: growth of the process's peak RSS. Peak RSS
+      only rises, so this is 0 when the stage stays under an earlier peak
+    - ``allocated_bytes``: peak Python/NumPy allocation above the level at
+      stage entry, from ``tracemalloc`` (None when ``trace_memory=False``)
+    - ``rows``: rows processed, as reported by the caller
+
+    Nested stages are supported; a parent's allocation peak includes its
+    children. Every finished stage is also logged to ``spotify.pipeline``
+    at INFO with the metrics attached as ``record.stage_metrics``.
+    """
+
+    def __init__(self, trace_memory: bool = True, logger: logging.Logger = logger):
+        self.trace_memory = trace_memory
+        self.logger = logger
+        self.stages: List[Dict] = []
+        self._peaks: List[int] = []
+        self._depth = 0
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """Measure the enclosed block; yields the record so it can be amended"""
+        record = {"stage": name, "rows": rows, "depth": self._depth}
+        self.stages.append(record)
+        tracing = self.trace_memory
+        if tracing:
+            self._start_tracing()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                # reset_peak below would hide the parent's peak so far
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(current)
+            start_bytes = current
+        self._depth += 1
+        rss_before = peak_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["wall_s"] = time.perf_counter() - wall_start
+            record["cpu_s"] = time.process_time() - cpu_start
+            rss_after = peak_rss_bytes()
+            record["peak_rss_delta_bytes"] = (
+                None if rss_before is None else rss_after - rss_before
+            )
+            record["allocated_bytes"] = None
+            if tracing:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["allocated_bytes"] = peak - start_bytes
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                else:
+                    self._stop_tracing()
+            self.logger.info("stage %s finished in %.3f s", name, record["wall_s"],
+                             extra={"stage_metrics": dict(record)})
+
+    def _start_tracing(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def _stop_tracing(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self) -> Dict:
+        """Stage records in start order plus top-level totals"""
+        top = [s for s in self.stages if s["depth"] == 0]
+        return {
+            "stages": [dict(s) for s in self.stages],
+            "totals": {
+                "wall_s": sum(s["wall_s"] for s in top),
+                "cpu_s": sum(s["cpu_s"] for s in top),
+                "peak_rss_bytes": peak_rss_bytes(),
+            },
+        }
+
+    def to_json(self, path=None, indent: int = 2) -> str:
+        """Serialize ``report()``; also write it to ``path`` if given"""
+        text = json.dumps(self.report(), indent=indent)
+        if path is not None:
+            Path(path).write_text(text + "\n")
+        return text
+
+    def print_summary(self) -> None:
+        print(f"\n⏱️ STAGE TIMINGS:")
+        for s in self.stages:
+            allocated = s["allocated_bytes"]
+            memory = f"{allocated / 1e6:8.1f} MB" if allocated is not None else "       n/a"
+            print(f"   {'  ' * s['depth']}{s['stage']:30s} {s['wall_s'] * 1000:9.1f} ms "
+                  f"(cpu {s['cpu_s'] * 1000:8.1f} ms) {memory}")
+
+
+class StageMetricsHandler(logging.Handler):
+    """Write each stage record logged by a profiler as one JSON line
+
+    Attach to the ``spotify.pipeline`` logger to stream metrics to a file
+    or log collector; records without stage metrics are ignored.
+    """
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stderr
+
+    def emit(self, record: logging.LogRecord) -> None:
+        metrics = getattr(record, "stage_metrics", None)
+        if metrics is None:
+            return
+        try:
+            self.stream.write(json.dumps(metrics) + "\n")
+            self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        if hasattr(self.stream, "flush"):
+            self.stream.flush()
@@ -0,0 +1,216 @@
+"""
+Shared descriptive statistics for the exploration plots and summaries
+One vectorized pass computes correlations, hit/non-hit means, quantiles,
+box-plot summaries, quartile hit rates and histograms; results are cached
+by dataset fingerprint so every consumer reuses the same numbers
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+STATS_FORMAT_VERSION = 1
+
+# Rows per block when accumulating the cross-product matrix
+BLOCK_ROWS = 1 << 18
+
+QUARTILE_LABELS = ['Q1', 'Q2', 'Q3', 'Q4']
+
+# In-process cache shared by every caller of get_statistics
+_MEMORY_CACHE: Dict[str, "DatasetStatistics"] = {}
+
+
+def numeric_columns(df: pd.DataFrame) -> List[str]:
+    return list(df.select_dtypes(include=[np.number]).columns)
+
+
+def dataset_fingerprint(df: pd.DataFrame, columns: Optional[List[str]] = None) -> str:
+    """Hash of the values and names of ``columns`` (default: numeric ones)"""
+    columns = numeric_columns(df) if columns is None else list(columns)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([len(df), columns]).encode())
+    for column in columns:
+        values = np.ascontiguousarray(df[column].to_numpy())
+        digest.update(str(values.dtype).encode())
+        digest.update(memoryview(values).cast("B"))
+    return digest.hexdigest()
+
+
+class DatasetStatistics:
+    """Statistics of the numeric columns of a dataset, split by target
+
+    Per-feature arrays are indexed like ``features`` (numeric columns minus
+    the target); group arrays have a leading axis of length 2 for
+    non-hits (0) and hits (1).
+
+    - ``corr``: Pearson correlation of all numeric columns incl. the target
+    - ``group_counts`` / ``group_means``: songs and feature means per group
+    - ``quartile_edges`` / ``quartile_hit_rates``: ``pd.qcut(q=4)`` bins of
+      each feature over all songs and the hit rate within each bin
+    - ``boxes``: per group and feature, ``q1``/``median``/``q3`` plus 1.5 IQR
+      whiskers clipped to the data, as consumed by ``Axes.bxp``
+    - ``hist_edges`` / ``hist_density``: shared bin edges per feature and
+      the density of each group over them
+    """
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    @classmethod
+    def compute(cls, df: pd.DataFrame, target: str = 'target', bins: int = 30,
+                fingerprint: Optional[str] = None) -> "DatasetStatistics":
+        columns = numeric_columns(df)
+        features = [c for c in columns if c != target]
+        X = df[features].to_numpy(dtype=np.float64)
+        y = df[target].to_numpy().astype(np.int64) if target in df.columns else None
+        has_nan = bool(np.isnan(X).any())
+
+        stats = {
+            "version": STATS_FORMAT_VERSION,
+            "fingerprint": fingerprint or dataset_fingerprint(df, columns),
+            "target": target if y is not None else None,
+            "n_rows": len(df),
+            "columns": columns,
+            "features": features,
+            "bins": bins,
+        }
+        if has_nan:
+            # Pairwise-complete correlations need pandas' masked algorithm
+            stats["corr"] = df[columns].corr().to_numpy()
+        else:
+            stats["corr"] = _correlation(df[columns].to_numpy(dtype=np.float64))
+
+        stats["hist_edges"] = np.stack([
+            np.histogram_bin_edges(_finite(X[:, j]), bins) for j in range(len(features))
+        ]) if len(df) else np.empty((len(features), bins + 1))
+
+        if y is None:
+            return cls(**stats)
+
+        groups = [X[y == 0], X[y == 1]]
+        stats["hit_rate"] = float(y.mean()) if len(y) else float("nan")
+        stats["group_counts"] = np.array([len(g) for g in groups])
+        stats["group_means"] = np.stack([np.nanmean(g, axis=0) if len(g) else
+                                         np.full(len(features), np.nan) for g in groups])
+
+        quantiles = np.nanquantile(X, [0, 0.25, 0.5, 0.75, 1], axis=0)
+        stats["quartile_edges"] = quantiles.T
+        stats["quartile_hit_rates"] = np.stack([
+            _binned_rate(X[:, j], y, quantiles[:, j]) for j in range(len(features))
+        ])
+
+        stats["boxes"] = [[_box(g[:, j]) for j in range(len(features))] for g in groups]
+        stats["hist_density"] = np.stack([
+            np.stack([_density(g[:, j], stats["hist_edges"][j]) for j in range(len(features))])
+            for g in groups
+        ])
+        return cls(**stats)
+
+    def correlation_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.corr, index=self.columns, columns=self.columns)
+
+    def target_correlations(self) -> pd.Series:
+        """Absolute correlation of every feature with the target, strongest first"""
+        corr = self.correlation_frame()[self.target].drop(self.target)
+        return corr.abs().sort_values(ascending=False)
+
+    def feature_index(self, feature: str) -> int:
+        return self.features.index(feature)
+
+    def to_dict(self) -> Dict:
+        return {key: value.tolist() if isinstance(value, np.ndarray) else value
+                for key, value in self.__dict__.items()}
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> "DatasetStatistics":
+        arrays = {"corr", "hist_edges", "hist_density", "group_counts", "group_means",
+                  "quartile_edges", "quartile_hit_rates"}
+        return cls(**{key: np.asarray(value, dtype=np.float64) if key in arrays else value
+                      for key, value in payload.items()})
+
+
+def get_statistics(df: pd.DataFrame, target: str = 'target', bins: int = 30,
+                   cache_dir: Optional[os.PathLike] = None) -> DatasetStatistics:
+    """Statistics for ``df``, reused across calls while the data is unchanged
+
+    Results are kept in memory for the process and, with ``cache_dir``,
+    as JSON on disk so later runs over the same data skip the computation.
+    """
+    key = f"{dataset_fingerprint(df)}-{target}-{bins}"
+    if key in _MEMORY_CACHE:
+        return _MEMORY_CACHE[key]
+
+    path = Path(cache_dir) / f"stats-{key}.json" if cache_dir is not None else None
+    stats = None
+    if path is not None and path.exists():
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            if payload.get("version") == STATS_FORMAT_VERSION:
+                stats = DatasetStatistics.from_dict(payload)
+        except (OSError, ValueError):
+            stats = None
+    if stats is None:
+        stats = DatasetStatistics.compute(df, target, bins, fingerprint=key.split("-")[0])
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(stats.to_dict(), f)
+            os.replace(tmp, path)
+    _MEMORY_CACHE[key] = stats
+    return stats
+
+
+def _correlation(X: np.ndarray) -> np.ndarray:
+    """Pearson correlation of the columns of a NaN-free matrix, in blocks"""
+    n, p = X.shape
+    if n < 2:
+        return np.full((p, p), np.nan)
+    means = X.mean(axis=0)
+    cross = np.zeros((p, p))
+    for start in range(0, n, BLOCK_ROWS):
+        block = X[start:start + BLOCK_ROWS] - means
+        cross += block.T @ block
+    std = np.sqrt(np.diag(cross))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cross / np.outer(std, std)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return np.clip(corr, -1, 1)
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    return values[np.isfinite(values)]
+
+
+def _binned_rate(values, y, edges) -> np.ndarray:
+    """Hit rate per right-closed quantile bin, like ``pd.qcut``"""
+    valid = ~np.isnan(values)
+    bins = np.searchsorted(edges[1:-1], values[valid], side='left')
+    counts = np.bincount(bins, minlength=4)
+    hits = np.bincount(bins, weights=y[valid], minlength=4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return hits / counts
+
+
+def _box(values) -> Dict[str, float]:
+    values = _finite(values)
+    if not len(values):
+        return {"q1": np.nan, "med": np.nan, "q3": np.nan, "whislo": np.nan, "whishi": np.nan}
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {"q1": float(q1), "med": float(med), "q3": float(q3),
+            "whislo": float(inside.min()), "whishi": float(inside.max())}
+
+
+def _density(values, edges) -> np.ndarray:
+    values = _finite(values)
+    if not len(values):
+        return np.zeros(len(edges) - 1)
+    return np.histogram(values, edges, density=True)[0]
@@ -0,0 +1,28 @@
+"""
+Data loading and processing
+Public names are imported on first use so ``import src.data_processing``
+does not pull in pandas
+"""
+
+_EXPORTS = {
+    "SpotifyDataLoader": "data_loader",
+    "load_dataset": "data_loader",
+    "ColumnarCache": "csv_cache",
+    "read_csv_cached": "csv_cache",
+    "compact_frame": "compact",
+    "memory_report": "compact",
+    "AggregateTable": "aggregates",
+    "load_norm_tables": "aggregates",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
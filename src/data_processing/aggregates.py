@@ -0,0 +1,133 @@
+"""
+Year and genre aggregate lookup tables
+Per-year and per-genre audio-feature means are held in one float array per
+table and joined into track rows by integer code, so "deviation from the
+norm" features need no per-row pandas merge
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.csv_cache import read_csv_cached
+
+AGGREGATES_DIR = Path(__file__).resolve().parents[2] / "data" / "raw" / "data 2"
+
+# Audio features shared by the track data and both aggregate files
+NORM_FEATURES = [
+    "acousticness", "danceability", "energy", "instrumentalness",
+    "liveness", "loudness", "speechiness", "tempo", "valence",
+]
+
+# Integer keys spanning at most this many slots per key are stored densely
+DENSE_KEY_SPREAD = 4
+
+
+class AggregateTable:
+    """Feature means for one key (year, genre, ...) as a lookup array
+
+    ``values`` has one row per slot plus a trailing all-NaN row that unknown
+    keys map to, so a join is ``np.take`` on integer codes. Integer keys with
+    a compact range (years) are addressed directly by ``key - offset``;
+    other keys are resolved once per distinct value through a hash index,
+    which keeps the per-row cost flat as the track count grows.
+    """
+
+    def __init__(self, name: str, column: str, keys, features: Sequence[str], values,
+                 offset: Optional[int] = None):
+        self.name = name
+        self.column = column
+        self.keys = keys
+        self.features = list(features)
+        self.values = values
+        self.offset = offset
+        self._positions = {f: i for i, f in enumerate(self.features)}
+        self._index = None if offset is not None else pd.Index(keys)
+
+    @classmethod
+    def from_frame(cls, df, name: str, column: str,
+                   features: Sequence[str] = NORM_FEATURES, dtype=np.float64) -> "AggregateTable":
+        """Build the table from a frame with one row per key"""
+        features = [f for f in features if f in df.columns]
+        keys = df[column].to_numpy()
+        means = df[features].to_numpy(dtype=dtype)
+
+        offset = None
+        if keys.dtype.kind in "iu" and len(keys):
+            low, high = int(keys.min()), int(keys.max())
+            if high - low + 1 <= DENSE_KEY_SPREAD * len(keys):
+                offset = low
+                slots = np.full((high - low + 1, len(features)), np.nan, dtype=dtype)
+                slots[keys - low] = means
+                means = slots
+        if offset is None and pd.Index(keys).has_duplicates:
+            raise ValueError(f"Duplicate {column!r} keys in the {name} aggregate table")
+
+        values = np.vstack([means, np.full((1, len(features)), np.nan, dtype=dtype)])
+        return cls(name, column, keys, features, values, offset)
+
+    @classmethod
+    def from_csv(cls, path, name: str, column: str,
+                 features: Sequence[str] = NORM_FEATURES, dtype=np.float64,
+                 cache_dir: Optional[os.PathLike] = None) -> "AggregateTable":
+        """Load the key and feature columns of an aggregate CSV"""
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [column] + [f for f in features if f in header]
+        df = read_csv_cached(path, columns=columns, cache_dir=cache_dir)
+        return cls.from_frame(df, name, column, features, dtype)
+
+    @property
+    def n_keys(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def codes(self, keys) -> np.ndarray:
+        """Row of ``values`` for every key; unknown keys get the NaN row"""
+        missing = len(self.values) - 1
+        if self.offset is not None:
+            keys = pd.to_numeric(pd.Series(keys, copy=False), errors="coerce").to_numpy()
+            valid = ~np.isnan(keys) if keys.dtype.kind == "f" else np.ones(len(keys), bool)
+            codes = np.full(len(keys), missing, dtype=np.intp)
+            slots = keys[valid].astype(np.int64) - self.offset
+            in_range = (slots >= 0) & (slots < missing)
+            codes[np.flatnonzero(valid)[in_range]] = slots[in_range]
+            return codes
+
+        # Hash each distinct key once, then broadcast by factorized code
+        row_codes, uniques = pd.factorize(np.asarray(keys, dtype=object))
+        lookup = self._index.get_indexer(uniques)
+        lookup[lookup < 0] = missing
+        codes = np.take(np.append(lookup, missing), row_codes)
+        return codes.astype(np.intp, copy=False)
+
+    def lookup(self, keys, features: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Norm values for ``keys``, one row per key and column per feature"""
+        values = self.values
+        if features is not None:
+            values = values[:, [self._positions[f] for f in features]]
+        return np.take(values, self.codes(keys), axis=0)
+
+    def deviations(self, df, features: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """``<feature>_vs_<name>`` columns: track value minus its key's norm"""
+        features = [f for f in (features or self.features) if f in df.columns]
+        norms = self.lookup(df[self.column].to_numpy(), features)
+        tracks = np.column_stack([df[f].to_numpy(dtype=norms.dtype) for f in features])
+        return pd.DataFrame(tracks - norms, index=df.index,
+                            columns=[f"{f}_vs_{self.name}" for f in features])
+
+
+def load_norm_tables(directory=AGGREGATES_DIR,
+                     features: Sequence[str] = NORM_FEATURES) -> Dict[str, AggregateTable]:
+    """The shipped per-year and per-genre tables, keyed by table name"""
+    directory = Path(directory)
+    return {
+        "year": AggregateTable.from_csv(directory / "data_by_year.csv", "year", "year", features),
+        "genre": AggregateTable.from_csv(directory / "data_by_genres.csv", "genre", "genres",
+                                         features),
+    }
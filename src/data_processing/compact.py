@@ -0,0 +1,130 @@
+"""
+Compact dtypes for resident track frames
+Schema-aware downcasting (float32 features, int8 codes, categorical
+strings) and bytes-per-row reporting
+"""
+
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+AUDIO_FEATURES = [
+    "acousticness", "danceability", "energy", "instrumentalness",
+    "liveness", "loudness", "speechiness", "tempo", "valence",
+]
+
+# Known columns of the raw and engineered track files
+COMPACT_DTYPES = {
+    **{name: "float32" for name in AUDIO_FEATURES},
+    "duration_ms": "int32",
+    "key": "int8",
+    "mode": "int8",
+    "target": "int8",
+    "time_signature": "int8",
+    "artist": "category",
+    "song_title": "category",
+}
+
+# Columns written by ``to_csv`` with the default index
+INDEX_COLUMN_PREFIX = "Unnamed: "
+
+# Unlisted string columns become categorical below this distinct-value ratio
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def _is_index_column(name) -> bool:
+    return str(name).startswith(INDEX_COLUMN_PREFIX) or name == ""
+
+
+def _fits(series: pd.Series, dtype: str) -> bool:
+    """Whether ``series`` converts to ``dtype`` without losing values"""
+    target = np.dtype(dtype) if dtype != "category" else None
+    if target is None or target.kind == "f":
+        return True
+    if series.dtype.kind not in "iuf" or series.isna().any():
+        return False
+    values = series.to_numpy()
+    if values.dtype.kind == "f" and not np.array_equal(values, np.round(values)):
+        return False
+    info = np.iinfo(target)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_dtypes(df: pd.DataFrame,
+                   schema: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """Target dtype for every column of ``df`` that can be made smaller
+
+    Schema columns get their listed dtype when the values fit; other float64
+    columns (and integral schema columns that do not fit) become float32,
+    and repetitive string columns categorical.
+    """
+    schema = COMPACT_DTYPES if schema is None else schema
+    casts = {}
+    for name in df.columns:
+        series = df[name]
+        target = schema.get(name)
+        if target is None:
+            if series.dtype == np.float64:
+                target = "float32"
+            elif (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)) \
+                    and not isinstance(series.dtype, pd.CategoricalDtype) \
+                    and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+                target = "category"
+            else:
+                continue
+        if not _fits(series, target):
+            # Integral schema columns holding NaN or fractions stay float
+            target = "float32" if series.dtype == np.float64 else None
+        if target is not None and str(series.dtype) != target:
+            casts[name] = target
+    return casts
+
+
+def compact_frame(df: pd.DataFrame, schema: Optional[Mapping[str, str]] = None,
+                  drop_index: bool = True) -> pd.DataFrame:
+    """Downcast ``df`` and drop the redundant CSV index column"""
+    if drop_index:
+        index_columns = [c for c in df.columns if _is_index_column(c)]
+        if index_columns:
+            df = df.drop(columns=index_columns)
+    casts = compact_dtypes(df, schema)
+    return df.astype(casts) if casts else df
+
+
+def memory_report(df: pd.DataFrame) -> Dict:
+    """Deep memory use of ``df``, in total, per row and per column"""
+    usage = df.memory_usage(deep=True, index=False)
+    total = int(usage.sum())
+    return {
+        "n_rows": len(df),
+        "total_bytes": total,
+        "bytes_per_row": total / len(df) if len(df) else 0.0,
+        "columns": {name: int(nbytes) for name, nbytes in usage.items()},
+    }
+
+
+def compare_memory(before: Dict, after: Dict) -> Dict:
+    """Bytes per row before and after compaction, and the reduction factor"""
+    return {
+        "n_rows": after["n_rows"],
+        "before_bytes_per_row": before["bytes_per_row"],
+        "after_bytes_per_row": after["bytes_per_row"],
+        "reduction": (before["total_bytes"] / after["total_bytes"]
+                      if after["total_bytes"] else float("inf")),
+    }
+
+
+def compact_with_report(df: pd.DataFrame, schema: Optional[Mapping[str, str]] = None,
+                        drop_index: bool = True) -> Tuple[pd.DataFrame, Dict]:
+    """``compact_frame`` plus a before/after memory comparison"""
+    before = memory_report(df)
+    compacted = compact_frame(df, schema, drop_index)
+    return compacted, compare_memory(before, memory_report(compacted))
+
+
+def print_memory_report(report: Dict, label: str = "Frame") -> None:
+    """Print a compare_memory() result in the pipeline's console style"""
+    print(f"🗜️ {label} memory: {report['before_bytes_per_row']:,.1f} → "
+          f"{report['after_bytes_per_row']:,.1f} bytes/row "
+          f"({report['reduction']:.1f}x smaller, {report['n_rows']:,} rows)")
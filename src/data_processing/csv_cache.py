@@ -0,0 +1,201 @@
+"""
+Columnar binary cache for CSV files
+The first read parses the CSV once and stores every column as an
+uncompressed .npy file; later reads memory-map only the requested columns
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = ".csv_cache"
+CACHE_FORMAT_VERSION = 1
+
+# Sources the cache could not hold (unsupported columns, unwritable cache
+# directory), mapped to the signature they had then; read with pandas directly
+_UNCACHEABLE = {}
+
+
+def _file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class ColumnarCache:
+    """Typed, per-column binary copy of one CSV file
+
+    Numeric and boolean columns are stored as ``.npy`` arrays. String
+    columns are dictionary-encoded into int32 codes plus a JSON list of
+    distinct values. The manifest records the source size, mtime and
+    SHA-256 so edits to the CSV invalidate the cache; a touched but
+    unchanged file is re-validated by hash instead of being re-parsed.
+    """
+
+    def __init__(self, csv_path, cache_dir: Optional[os.PathLike] = None):
+        self.csv_path = Path(csv_path)
+        root = Path(cache_dir) if cache_dir is not None else self.csv_path.parent / CACHE_DIR_NAME
+        self.path = root / self.csv_path.name
+        self.manifest_path = self.path / "manifest.json"
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def is_valid(self) -> bool:
+        return self._validated_manifest() is not None
+
+    def _validated_manifest(self) -> Optional[dict]:
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+        source = manifest["source"]
+        current = _source_signature(self.csv_path)
+        if current == {"size": source["size"], "mtime_ns": source["mtime_ns"]}:
+            return manifest
+        if current["size"] != source["size"] or _file_digest(self.csv_path) != source["sha256"]:
+            return None
+
+        # Same bytes, new mtime: refresh the manifest instead of rebuilding
+        manifest["source"].update(current)
+        self._write_json(self.manifest_path, manifest)
+        return manifest
+
+    def build(self) -> dict:
+        """Parse the CSV and write the columnar copy atomically"""
+        signature = _source_signature(self.csv_path)
+        df = pd.read_csv(self.csv_path)
+
+        staging = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            manifest = self._write_columns(df, staging, signature)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Swap the finished directory into place
+        if self.path.exists():
+            retired = self.path.with_name(f"{self.path.name}.old-{os.getpid()}")
+            os.replace(self.path, retired)
+            shutil.rmtree(retired, ignore_errors=True)
+        os.replace(staging, self.path)
+        return manifest
+
+    def _write_columns(self, df: pd.DataFrame, staging: Path, signature: dict) -> dict:
+        columns = []
+        for position, name in enumerate(df.columns):
+            series = df[name]
+            entry = {"name": name, "dtype": str(series.dtype), "file": f"{position}.npy"}
+            if series.dtype.kind in "biuf":
+                np.save(staging / entry["file"], series.to_numpy())
+                entry["kind"] = "numeric"
+            else:
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                if not all(isinstance(v, str) for v in uniques):
+                    raise TypeError(f"Column {name!r} of {self.csv_path.name} holds non-string "
+                                    f"values and cannot be cached")
+                np.save(staging / entry["file"], codes.astype(np.int32))
+                entry["kind"] = "string"
+                entry["categories"] = f"{position}.categories.json"
+                self._write_json(staging / entry["categories"], list(uniques))
+            columns.append(entry)
+
+        manifest = {
+            "version": CACHE_FORMAT_VERSION,
+            "source": {**signature, "sha256": _file_digest(self.csv_path)},
+            "n_rows": len(df),
+            "columns": columns,
+        }
+        self._write_json(staging / "manifest.json", manifest)
+        return manifest
+
+    def load(self, columns: Optional[Iterable[str]] = None,
+             categorical: Union[bool, Iterable[str]] = False, mmap: bool = False) -> pd.DataFrame:
+        """Read (building if needed) the requested columns from the cache
+
+        ``categorical=True`` keeps string columns as pandas categoricals
+        instead of restoring their original string dtype; a list of names
+        does so for just those columns. Numeric columns are read into
+        ordinary writable arrays unless ``mmap=True``, which memory-maps
+        them read-only for callers that never modify the frame.
+        """
+        manifest = self._validated_manifest() or self.build()
+        entries = {entry["name"]: entry for entry in manifest["columns"]}
+        names = list(entries) if columns is None else list(columns)
+        missing = [name for name in names if name not in entries]
+        if missing:
+            raise KeyError(f"Columns not in {self.csv_path.name}: {missing}")
+
+        keep_codes = set() if isinstance(categorical, bool) else set(categorical)
+        mode = "r" if mmap else None
+        data = {}
+        for name in names:
+            entry = entries[name]
+            # With mmap, plain ndarray views still share the mapped pages
+            values = np.asarray(np.load(self.path / entry["file"], mmap_mode=mode))
+            if entry["kind"] == "string":
+                with open(self.path / entry["categories"]) as f:
+                    categories = json.load(f)
+                values = pd.Categorical.from_codes(values, categories=categories)
+                if categorical is not True and name not in keep_codes:
+                    values = pd.Series(values, copy=False).astype(entry["dtype"])
+            data[name] = values
+        return pd.DataFrame(data, index=pd.RangeIndex(manifest["n_rows"]), copy=False)
+
+    @staticmethod
+    def _write_json(path: Path, payload) -> None:
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+
+def read_csv_cached(path, columns: Optional[Iterable[str]] = None,
+                    categorical: Union[bool, Iterable[str]] = False,
+                    cache_dir: Optional[os.PathLike] = None, mmap: bool = False) -> pd.DataFrame:
+    """Drop-in for ``pd.read_csv(path)`` backed by a columnar binary cache
+
+    Files with columns the cache cannot represent exactly, or whose cache
+    directory cannot be written, are read with ``pd.read_csv`` instead; that
+    outcome is remembered until the file changes, so they are parsed once
+    per call. ``mmap=True`` returns read-only numeric columns backed by the
+    cache files (see ``ColumnarCache.load``).
+    """
+    key = (str(Path(path).resolve()), None if cache_dir is None else str(cache_dir))
+    try:
+        signature = _source_signature(Path(path))
+    except OSError:
+        signature = None  # pd.read_csv raises the same error below
+    if signature is not None and _UNCACHEABLE.get(key) != signature:
+        try:
+            return ColumnarCache(path, cache_dir).load(columns, categorical=categorical,
+                                                       mmap=mmap)
+        except (TypeError, OSError):
+            _UNCACHEABLE[key] = signature
+    df = pd.read_csv(path, usecols=None if columns is None else list(columns))
+    if columns is not None:
+        df = df[list(columns)]
+    as_category = (df.select_dtypes(exclude="number").columns if categorical is True
+                   else [] if categorical is False else list(categorical))
+    return df.astype({name: "category" for name in as_category})
@@ -1,18 +1,108 @@
-import pandas as pd
-import yaml
+"""
+Config-driven loader for the project's named datasets
+Paths in config/data_config.yaml resolve relative to the config file, and
+pandas is only imported when a dataset is actually read, so CLIs that just
+resolve paths start fast
+"""
+
 import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_CONFIG_PATH = ROOT_DIR / "config" / "data_config.yaml"
+
 
 class SpotifyDataLoader:
-    def __init__(self, config_path: str = "config/data_config.yaml"):
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        self.data_path = config["data_path"]
-
-    def load_data(self) -> pd.DataFrame:
-        try:
-            df = pd.read_csv(self.data_path)
-            print(f"[INFO] Data loaded successfully from {self.data_path}")
+    """Resolve and load datasets declared in ``data_config.yaml``
+
+    Each dataset has a ``path`` (relative to ``data_dir``) and an optional
+    ``dtypes`` map. Loads go through the columnar CSV cache, so projecting a
+    few columns only reads those columns; ``category`` columns are restored
+    straight from the cache's dictionary codes.
+    """
+
+    def __init__(self, config_path: os.PathLike = DEFAULT_CONFIG_PATH):
+        import yaml
+
+        self.config_path = Path(config_path)
+        with open(self.config_path) as f:
+            config = yaml.safe_load(f) or {}
+        if "datasets" not in config:
+            raise ValueError(f"{self.config_path} does not define any datasets")
+
+        self.data_dir = self._resolve(config.get("data_dir", "."))
+        self.datasets: Dict[str, dict] = config["datasets"]
+        self.default = config.get("default", next(iter(self.datasets)))
+
+        # Bytes per row before/after the last ``compact=True`` load
+        self.last_memory_report: Optional[dict] = None
+
+    def _resolve(self, path) -> Path:
+        path = Path(os.path.expanduser(path))
+        if not path.is_absolute():
+            path = self.config_path.parent / path
+        return Path(os.path.normpath(path))
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.datasets)
+
+    def _spec(self, name: Optional[str]) -> dict:
+        name = name or self.default
+        if name not in self.datasets:
+            raise KeyError(f"Unknown dataset {name!r}; configured: {self.names}")
+        return self.datasets[name]
+
+    def path(self, name: Optional[str] = None) -> Path:
+        """Absolute path of a named dataset"""
+        path = Path(os.path.expanduser(self._spec(name)["path"]))
+        return path if path.is_absolute() else self.data_dir / path
+
+    def dtypes(self, name: Optional[str] = None) -> Dict[str, str]:
+        """Configured column dtypes of a named dataset"""
+        return dict(self._spec(name).get("dtypes") or {})
+
+    def first_existing(self, names: Iterable[str]) -> Optional[str]:
+        """First dataset in ``names`` whose file exists, else None"""
+        return next((name for name in names if self.path(name).exists()), None)
+
+    def load(self, name: Optional[str] = None, columns: Optional[Iterable[str]] = None,
+             dtypes: Optional[Dict[str, str]] = None, apply_dtypes: bool = True,
+             compact: bool = False):
+        """Read a named dataset, optionally projecting ``columns``
+
+        ``dtypes`` overrides entries of the configured map; pass
+        ``apply_dtypes=False`` to keep the types pandas infers. ``compact=True``
+        downcasts every known column (see ``compact.COMPACT_DTYPES``), drops
+        the CSV index column and records ``last_memory_report``.
+        """
+        from .csv_cache import read_csv_cached
+
+        path = self.path(name)
+        if compact:
+            from .compact import COMPACT_DTYPES, compact_with_report
+
+            df, self.last_memory_report = compact_with_report(
+                read_csv_cached(path, columns=columns), {**COMPACT_DTYPES, **(dtypes or {})}
+            )
             return df
-        except Exception as e:
-            print(f"[ERROR] Failed to load data: {e}")
-            raise
+
+        dtype_map = {**self.dtypes(name), **(dtypes or {})} if apply_dtypes else {}
+        columns = list(columns) if columns is not None else None
+        if columns is not None:
+            dtype_map = {c: t for c, t in dtype_map.items() if c in columns}
+
+        categorical = [c for c, t in dtype_map.items() if t == "category"]
+        df = read_csv_cached(path, columns=columns, categorical=categorical)
+        numeric = {c: t for c, t in dtype_map.items() if t != "category" and c in df.columns}
+        return df.astype(numeric) if numeric else df
+
+    def load_data(self, columns: Optional[Iterable[str]] = None):
+        """Load the default dataset"""
+        return self.load(columns=columns)
+
+
+def load_dataset(name: Optional[str] = None, columns: Optional[Iterable[str]] = None, **kwargs):
+    """Shortcut for ``SpotifyDataLoader().load(name, columns, ...)``"""
+    return SpotifyDataLoader().load(name, columns, **kwargs)
@@ -0,0 +1,262 @@
+"""
+Batch scoring of track files
+Reads CSV/Parquet in chunks and runs read → engineer → predict → write as
+concurrent stages joined by bounded queues, so I/O overlaps compute and
+memory is capped at a few chunks regardless of the file size
+"""
+
+import threading
+import time
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+STAGES = ("read", "engineer", "predict", "write")
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+def _is_parquet(path) -> bool:
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def read_track_batches(path, batch_size: int = 50_000,
+                       columns: Optional[Sequence[str]] = None) -> Iterator:
+    """Yield DataFrame chunks of a CSV or Parquet track file"""
+    import pandas as pd
+
+    if _is_parquet(path):
+        pa = _import_pyarrow()
+        parquet = pa.parquet.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=batch_size, usecols=columns)
+
+
+class ScoreWriter:
+    """Append scored chunks to a CSV or Parquet file, replaced atomically on close"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(f"{self.path.name}.tmp")
+        self._parquet = _is_parquet(path)
+        self._writer = None
+        self._file = None
+        self.rows = 0
+
+    def write(self, df) -> None:
+        if self._parquet:
+            pa = _import_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pa.parquet.ParquetWriter(self._tmp, table.schema)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self._tmp, "w", newline="")
+            df.to_csv(self._file, index=False, header=(self.rows == 0))
+        self.rows += len(df)
+
+    def close(self, commit: bool = True) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        if commit and self._tmp.exists():
+            self._tmp.replace(self.path)
+        elif self._tmp.exists():
+            self._tmp.unlink()
+
+
+class StageStats:
+    """Rows and busy time of one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.batches = 0
+        self.busy_s = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.busy_s if self.busy_s > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {"stage": self.name, "rows": self.rows, "batches": self.batches,
+                "busy_s": self.busy_s, "rows_per_s": self.rows_per_s}
+
+
+class BatchScoringPipeline:
+    """Score chunks through engineer and predict stages on worker threads
+
+    ``engineer_fn`` maps a raw chunk to its model-feature matrix and
+    ``predict_fn`` maps that matrix to hit probabilities. Reading, feature
+    engineering and prediction each run on their own thread and hand chunks
+    on through queues of at most ``queue_size`` items; writing happens on
+    the calling thread. pandas parsing and NumPy release the GIL, so the
+    stages genuinely overlap. An error in any stage stops the others and is
+    re-raised by ``run``.
+    """
+
+    def __init__(self, engineer_fn: Callable, predict_fn: Callable, queue_size: int = 4):
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.engineer_fn = engineer_fn
+        self.predict_fn = predict_fn
+        self.queue_size = queue_size
+        self.stats = {name: StageStats(name) for name in STAGES}
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, batches: Iterable, write_fn: Callable) -> Dict:
+        """Score every chunk of ``batches``; ``write_fn(chunk, probabilities)`` stores them"""
+        start = time.perf_counter()
+        raw, features, scored = (Queue(self.queue_size) for _ in range(3))
+        workers = [
+            threading.Thread(target=self._read, args=(batches, raw), name="score-read"),
+            threading.Thread(target=self._map, args=("engineer", self.engineer_fn, raw, features),
+                             name="score-engineer"),
+            threading.Thread(target=self._map, args=("predict", self.predict_fn, features, scored),
+                             name="score-predict"),
+        ]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        try:
+            stats = self.stats["write"]
+            while True:
+                item = self._get(scored)
+                if item is _DONE:
+                    break
+                chunk, probabilities = item
+                began = time.perf_counter()
+                write_fn(chunk, probabilities)
+                stats.busy_s += time.perf_counter() - began
+                stats.rows += len(chunk)
+                stats.batches += 1
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+            self.seconds = time.perf_counter() - start
+        if self._errors:
+            raise self._errors[0]
+        return self.report()
+
+    def report(self) -> Dict:
+        rows = self.stats["write"].rows
+        return {
+            "rows": rows,
+            "seconds": self.seconds,
+            "rows_per_s": rows / self.seconds if self.seconds > 0 else 0.0,
+            "stages": [stats.to_dict() for stats in self.stats.values()],
+        }
+
+    def _read(self, batches: Iterable, out: Queue) -> None:
+        stats = self.stats["read"]
+        try:
+            iterator = iter(batches)
+            while not self._stop.is_set():
+                began = time.perf_counter()
+                chunk = next(iterator, _DONE)
+                stats.busy_s += time.perf_counter() - began
+                if chunk is _DONE:
+                    break
+                stats.rows += len(chunk)
+                stats.batches += 1
+                self._put(out, (chunk, chunk))
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            self._put(out, _DONE, force=True)
+
+    def _map(self, name: str, fn: Callable, source: Queue, out: Queue) -> None:
+        stats = self.stats[name]
+        try:
+            while True:
+                item = self._get(source)
+                if item is _DONE:
+                    break
+                chunk, data = item
+                began = time.perf_counter()
+                result = fn(data)
+                stats.busy_s += time.perf_counter() - began
+                stats.rows += len(chunk)
+                stats.batches += 1
+                self._put(out, (chunk, result))
+        except BaseException as exc:
+            self._fail(exc)
+        finally:
+            self._put(out, _DONE, force=True)
+
+    def _fail(self, exc: BaseException) -> None:
+        self._errors.append(exc)
+        self._stop.set()
+
+    def _get(self, source: Queue):
+        while True:
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _put(self, out: Queue, item, force: bool = False) -> None:
+        """Block while the queue is full, unless the pipeline is stopping"""
+        while True:
+            try:
+                out.put(item, timeout=_POLL_SECONDS)
+                return
+            except Full:
+                if self._stop.is_set():
+                    if force:
+                        # Make room so the end marker always gets through
+                        try:
+                            out.get_nowait()
+                        except Empty:
+                            pass
+                        continue
+                    return
+
+
+def score_file(input_path, output_path, engineer_fn: Callable, predict_fn: Callable,
+               keep_columns: Sequence[str] = (), batch_size: int = 50_000,
+               queue_size: int = 4, score_column: str = "hit_probability") -> Dict:
+    """Score a CSV/Parquet track file into ``output_path``
+
+    The output holds ``keep_columns`` (e.g. ids and titles) that exist in
+    the input, followed by ``score_column``. Returns the pipeline report.
+    """
+    writer = ScoreWriter(output_path)
+
+    def write_fn(chunk, probabilities):
+        out = chunk[[c for c in keep_columns if c in chunk.columns]].copy()
+        out[score_column] = np.asarray(probabilities, dtype=np.float32)
+        writer.write(out)
+
+    pipeline = BatchScoringPipeline(engineer_fn, predict_fn, queue_size)
+    try:
+        report = pipeline.run(read_track_batches(input_path, batch_size), write_fn)
+    except BaseException:
+        writer.close(commit=False)
+        raise
+    writer.close()
+    return report
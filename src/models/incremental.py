@@ -0,0 +1,226 @@
+"""
+Incremental retraining for the hit prediction forest
+Appends newly labelled tracks to a segmented feature store, checks them for
+drift and either grows the forest with warm_start or refits it from scratch
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+
+# Population stability index above which a feature counts as drifted
+PSI_THRESHOLD = 0.2
+# Drop in accuracy on a new batch (vs. the reference) that forces a refit
+ACCURACY_DROP_THRESHOLD = 0.05
+
+
+class FeatureStore:
+    """Append-only store of engineered feature rows and labels
+
+    Each append is written as its own ``.npy`` segment, so adding a batch
+    costs time proportional to the batch and never rewrites the history.
+    ``manifest.json`` lists the segments plus the reference distribution
+    used for drift checks, and is replaced atomically.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest_path = self.path / "manifest.json"
+        with open(self.manifest_path) as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def create(cls, path, features: List[str], X, y) -> "FeatureStore":
+        """Start a store from the full training history"""
+        path = Path(path)
+        (path / "segments").mkdir(parents=True, exist_ok=True)
+        _write_json(path / "manifest.json", {
+            "version": STORE_FORMAT_VERSION, "features": list(features),
+            "segments": [], "reference": None,
+        })
+        store = cls(path)
+        store.append(X, y)
+        return store
+
+    @property
+    def features(self) -> List[str]:
+        return self.manifest["features"]
+
+    @property
+    def n_rows(self) -> int:
+        return sum(segment["rows"] for segment in self.manifest["segments"])
+
+    def append(self, X, y) -> Dict:
+        """Write one batch as a new segment"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if X.shape[1] != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} features, got {X.shape[1]}")
+        segment_id = len(self.manifest["segments"])
+        name = f"segments/{segment_id:06d}"
+        np.save(self.path / f"{name}.X.npy", X)
+        np.save(self.path / f"{name}.y.npy", y)
+        segment = {"name": name, "rows": len(X), "added_at": time.time()}
+        self.manifest["segments"].append(segment)
+        self._save()
+        return segment
+
+    def load(self, last_rows: Optional[int] = None):
+        """All rows, or only the most recent ``last_rows``, as ``(X, y)``"""
+        X_parts, y_parts, remaining = [], [], last_rows
+        for segment in reversed(self.manifest["segments"]):
+            X = np.load(self.path / f"{segment['name']}.X.npy", mmap_mode="r")
+            y = np.load(self.path / f"{segment['name']}.y.npy", mmap_mode="r")
+            if remaining is not None:
+                X, y = X[-remaining:], y[-remaining:]
+                remaining -= len(X)
+            X_parts.append(X)
+            y_parts.append(y)
+            if remaining is not None and remaining <= 0:
+                break
+        if not X_parts:
+            return np.empty((0, len(self.features))), np.empty(0)
+        return np.concatenate(X_parts[::-1]), np.concatenate(y_parts[::-1])
+
+    @property
+    def reference(self) -> Optional[Dict]:
+        return self.manifest.get("reference")
+
+    def set_reference(self, X, accuracy: Optional[float] = None, n_bins: int = 10) -> None:
+        """Record the distribution a freshly fitted model was trained on"""
+        X = np.asarray(X, dtype=np.float64)
+        edges = np.quantile(X, np.linspace(0, 1, n_bins + 1)[1:-1], axis=0).T
+        self.manifest["reference"] = {
+            "edges": edges.tolist(),
+            "proportions": [_bin_proportions(X[:, j], edges[j]).tolist()
+                            for j in range(X.shape[1])],
+            "accuracy": accuracy,
+            "rows": len(X),
+        }
+        self._save()
+
+    def _save(self) -> None:
+        _write_json(self.manifest_path, self.manifest)
+
+
+def population_stability(reference: Dict, X) -> np.ndarray:
+    """PSI of each feature in ``X`` against the stored reference bins"""
+    X = np.asarray(X, dtype=np.float64)
+    psi = np.empty(X.shape[1])
+    for j in range(X.shape[1]):
+        expected = np.asarray(reference["proportions"][j])
+        actual = _bin_proportions(X[:, j], np.asarray(reference["edges"][j]))
+        expected, actual = np.maximum(expected, 1e-4), np.maximum(actual, 1e-4)
+        psi[j] = float(np.sum((actual - expected) * np.log(actual / expected)))
+    return psi
+
+
+def check_drift(store: FeatureStore, model, X_new, y_new,
+                psi_threshold: float = PSI_THRESHOLD,
+                accuracy_drop: float = ACCURACY_DROP_THRESHOLD) -> Dict:
+    """Compare a new batch with the reference the current model was fit on"""
+    reference = store.reference
+    accuracy = float((model.predict(X_new) == np.asarray(y_new)).mean())
+    report = {"accuracy": accuracy, "drifted_features": [], "drift": reference is None}
+    if reference is None:
+        report["reason"] = "no reference distribution"
+        return report
+
+    psi = population_stability(reference, X_new)
+    report["psi"] = dict(zip(store.features, psi.round(4).tolist()))
+    report["drifted_features"] = [f for f, v in zip(store.features, psi) if v > psi_threshold]
+    if report["drifted_features"]:
+        report["drift"] = True
+        report["reason"] = f"PSI > {psi_threshold} for {', '.join(report['drifted_features'])}"
+    elif reference.get("accuracy") is not None and \
+            accuracy < reference["accuracy"] - accuracy_drop:
+        report["drift"] = True
+        report["reason"] = (f"accuracy {accuracy:.1%} is more than {accuracy_drop:.0%} "
+                            f"below {reference['accuracy']:.1%}")
+    return report
+
+
+def upgrade_legacy_model(model):
+    """Make a model unpickled from an older sklearn usable by this one, in place
+
+    Constructor parameters added since it was pickled (e.g. ``monotonic_cst``)
+    are set to their defaults, so ``clone``, ``set_params`` and warm starts
+    work. Trees that still store class counts in their leaves are normalized
+    to the class fractions current sklearn stores and averages.
+    """
+    estimators = [model, getattr(model, "estimator", None), *getattr(model, "estimators_", [])]
+    for estimator in estimators:
+        if estimator is None:
+            continue
+        fresh = type(estimator)()
+        for name, default in fresh.get_params(deep=False).items():
+            if not hasattr(estimator, name):
+                setattr(estimator, name, default)
+        if hasattr(fresh, "estimator_params"):
+            estimator.estimator_params = fresh.estimator_params
+        tree = getattr(estimator, "tree_", None)
+        if tree is not None:
+            value = tree.value
+            totals = value.sum(axis=2, keepdims=True)
+            if not np.allclose(totals, 1.0):
+                value /= np.where(totals > 0, totals, 1.0)
+    return model
+
+
+def grow_forest(model, X, y, n_new_trees: int, max_trees: Optional[int] = None):
+    """Add ``n_new_trees`` fitted on ``(X, y)`` to a fitted forest, in place
+
+    Uses sklearn's ``warm_start``: existing trees are kept and only the new
+    ones are trained. With ``max_trees`` the oldest trees are retired so the
+    ensemble tracks recent data and inference cost stays bounded.
+    """
+    upgrade_legacy_model(model)
+    n_before = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=n_before + n_new_trees)
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    if max_trees is not None and len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+    return model
+
+
+def swap_model_file(model, path) -> Path:
+    """Atomically replace the model file a scorer loads
+
+    The model is written to a temporary file in the same directory, flushed
+    to disk and renamed over ``path``, so readers see either the old or the
+    new model, never a partial file.
+    """
+    import joblib
+
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    try:
+        with open(tmp, "wb") as f:
+            joblib.dump(model, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def _bin_proportions(values, edges) -> np.ndarray:
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return counts / max(len(values), 1)
+
+
+def _write_json(path: Path, payload) -> None:
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
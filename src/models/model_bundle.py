@@ -0,0 +1,191 @@
+"""
+Versioned model bundle for hit prediction
+One directory holds the flattened forest as uncompressed .npy arrays, the
+feature list, the normalization stats and a manifest with checksums, so
+workers memory-map one shared read-only copy without importing sklearn
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .prediction_cache import MANIFEST_NAME, file_digest
+from .tree_engine import ARRAY_NAMES, CompactForest
+
+BUNDLE_FORMAT_VERSION = 1
+DEFAULT_BUNDLE_PATH = Path(__file__).resolve().parents[2] / "models" / "hit_model"
+
+
+def is_bundle(path) -> bool:
+    return (Path(path) / MANIFEST_NAME).is_file()
+
+
+def export_bundle(model, path, feature_names: Sequence[str],
+                  normalization_stats: Optional[Dict] = None,
+                  info: Optional[Dict] = None) -> Path:
+    """Write a fitted sklearn forest as a bundle directory, atomically
+
+    ``feature_names`` is the column order the model was trained on and
+    ``normalization_stats`` the fitted ``SpotifyFeatureEngineer`` stats
+    that produced its inputs; ``info`` is free-form metadata (accuracy,
+    parameters, ...). The bundle's ``model_version`` is a digest of the
+    arrays, feature list and stats, so it changes with anything that can
+    change a score.
+    """
+    forest = CompactForest.from_sklearn(model)
+    feature_names = list(feature_names)
+    n_features = getattr(model, "n_features_in_", forest.n_features)
+    if len(feature_names) != n_features:
+        raise ValueError(f"Model expects {n_features} features, got {len(feature_names)} names")
+    if forest.feature_names is not None and forest.feature_names != feature_names:
+        raise ValueError(f"Model was fitted on {forest.feature_names}, not {feature_names}")
+
+    path = Path(path)
+    staging = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    checksums = {}
+    for name in ARRAY_NAMES:
+        np.save(staging / f"{name}.npy", np.ascontiguousarray(getattr(forest, name)))
+        checksums[name] = file_digest(staging / f"{name}.npy")
+
+    version = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        version.update(checksums[name].encode())
+    version.update(json.dumps([feature_names, normalization_stats], sort_keys=True).encode())
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_version": version.hexdigest(),
+        "created": time.time(),
+        "feature_names": feature_names,
+        "normalization_stats": normalization_stats,
+        "classes": forest.classes,
+        "max_depth": forest.max_depth,
+        "n_trees": forest.n_trees,
+        "n_nodes": forest.n_nodes,
+        "checksums": checksums,
+        "info": info or {},
+    }
+    with open(staging / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    if path.exists():
+        retired = path.with_name(f"{path.name}.old-{os.getpid()}")
+        os.replace(path, retired)
+        shutil.rmtree(retired, ignore_errors=True)
+    os.replace(staging, path)
+    return path
+
+
+class ModelBundle:
+    """A loaded bundle: forest arrays, feature schema and metadata
+
+    Arrays are memory-mapped read-only, so every process that loads the
+    same bundle shares one copy in the page cache. Scoring refuses inputs
+    whose schema differs from the training feature list: frames must have
+    every feature column (they are reordered by name) and arrays must have
+    exactly one column per feature, in order.
+    """
+
+    def __init__(self, forest: CompactForest, manifest: Dict, path: Optional[Path] = None):
+        self.forest = forest
+        self.manifest = manifest
+        self.path = path
+        self.feature_names = list(manifest["feature_names"])
+        self.classes_ = np.asarray(manifest["classes"])
+        self.hit_index = list(manifest["classes"]).index(1)
+
+    @property
+    def model_version(self) -> str:
+        return self.manifest["model_version"]
+
+    @property
+    def normalization_stats(self) -> Optional[Dict]:
+        return self.manifest.get("normalization_stats")
+
+    @property
+    def info(self) -> Dict:
+        return self.manifest.get("info", {})
+
+    @classmethod
+    def load(cls, path, verify: bool = False, mmap: bool = True,
+             attempts: int = 5) -> "ModelBundle":
+        """Open a bundle; ``verify`` re-hashes every array against the manifest
+
+        A re-export can replace the directory while it is being read. The
+        manifest is read again after the arrays, and the load is retried if
+        it changed (or vanished mid-swap), so the arrays always belong to
+        the manifest returned with them.
+        """
+        path = Path(path)
+        for attempt in range(attempts):
+            try:
+                manifest_bytes = (path / MANIFEST_NAME).read_bytes()
+                try:
+                    bundle = cls._load_arrays(path, json.loads(manifest_bytes), verify, mmap)
+                except ValueError:
+                    # A checksum "mismatch" against a manifest that was since replaced
+                    if (path / MANIFEST_NAME).read_bytes() == manifest_bytes:
+                        raise
+                else:
+                    if (path / MANIFEST_NAME).read_bytes() == manifest_bytes:
+                        return bundle
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+            time.sleep(0.01 * (attempt + 1))
+        raise OSError(f"Model bundle at {path} kept changing while being loaded")
+
+    @classmethod
+    def _load_arrays(cls, path: Path, manifest: Dict, verify: bool, mmap: bool) -> "ModelBundle":
+        if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model bundle version in {path}: "
+                             f"{manifest.get('format_version')}")
+        if verify:
+            for name, expected in manifest["checksums"].items():
+                if file_digest(path / f"{name}.npy") != expected:
+                    raise ValueError(f"Checksum mismatch for {name}.npy in {path}")
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in ARRAY_NAMES}
+        forest = CompactForest(max_depth=manifest["max_depth"], classes=manifest["classes"],
+                               feature_names=manifest["feature_names"], **arrays)
+        return cls(forest, manifest, path)
+
+    def check_features(self, feature_names: Sequence[str]) -> None:
+        """Raise ValueError unless ``feature_names`` is the training feature list"""
+        feature_names = list(feature_names)
+        if feature_names == self.feature_names:
+            return
+        missing = [c for c in self.feature_names if c not in feature_names]
+        extra = [c for c in feature_names if c not in self.feature_names]
+        detail = f"missing {missing}, unexpected {extra}" if missing or extra else "wrong order"
+        raise ValueError(f"Feature schema does not match model bundle ({detail})")
+
+    def matrix(self, X) -> np.ndarray:
+        """Validated feature matrix in training column order"""
+        if hasattr(X, "columns"):
+            missing = [c for c in self.feature_names if c not in X.columns]
+            if missing:
+                raise ValueError(f"Feature schema does not match model bundle "
+                                 f"(missing {missing})")
+            X = X[self.feature_names].to_numpy()
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Feature schema does not match model bundle: expected "
+                             f"{len(self.feature_names)} features, got {X.shape[1]}")
+        return X
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, sklearn-style (one column per class)"""
+        return self.forest.predict_proba(self.matrix(X))
+
+    def predict_hit_proba(self, X) -> np.ndarray:
+        return self.predict_proba(X)[:, self.hit_index]
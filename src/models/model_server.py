@@ -0,0 +1,383 @@
+"""
+In-process model server for Spotify hit prediction
+Loads the trained model once and micro-batches concurrent requests
+into a single predict_proba call
+"""
+
+import json
+import threading
+import traceback
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .model_bundle import ModelBundle, is_bundle
+from .prediction_cache import cache_keys, track_id_of
+from .tree_engine import CompactForest
+
+MODELS_DIR = Path(__file__).resolve().parents[2] / "models"
+DEFAULT_MODEL_PATH = MODELS_DIR / "best_spotify_model_random_forest.pkl"
+DEFAULT_FEATURES_PATH = MODELS_DIR / "model_features.txt"
+
+# Batch size from which sklearn's compiled traversal beats the CompactForest
+# (see benchmarks/bench_tree_engine.py)
+COMPACT_MAX_ROWS = 1_000
+
+
+class RecommendationsDisabled(Exception):
+    """The server was started without a catalog to recommend from"""
+
+
+def read_feature_list(path=DEFAULT_FEATURES_PATH) -> List[str]:
+    """Read the ordered feature list the model was trained on"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class HitPredictor:
+    """Wrap a fitted classifier and return hit probabilities
+
+    Tree models are also flattened into a CompactForest, which scores up to
+    about a thousand rows far faster than sklearn's per-call overhead allows
+    and always normalizes leaf values. Batches of ``compact_max_rows`` or
+    more go to sklearn's compiled traversal, provided a probe shows both
+    engines agree: pickles from older sklearn versions store leaf counts
+    that current sklearn returns unnormalized, and those stay on the
+    CompactForest.
+    """
+
+    def __init__(self, model, feature_names: Sequence[str],
+                 compact_max_rows: int = COMPACT_MAX_ROWS):
+        self.model = model
+        self.feature_names = list(feature_names)
+        self.hit_index = list(model.classes_).index(1)
+        # Models fitted on DataFrames warn when given bare arrays
+        self._wants_frame = hasattr(model, "feature_names_in_")
+        self.compact_max_rows = compact_max_rows
+        self.forest = None
+        self.sklearn_agrees = True
+        if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+            self.forest = CompactForest.from_sklearn(model)
+            self._forest_hit_index = self.forest.classes.index(1)
+            probe = np.random.default_rng(0).random((64, len(self.feature_names)))
+            self.sklearn_agrees = np.allclose(self._sklearn_proba(probe),
+                                              self._forest_proba(probe), atol=1e-9)
+
+    @classmethod
+    def load(cls, model_path=DEFAULT_MODEL_PATH, features_path=DEFAULT_FEATURES_PATH):
+        """Load a joblib model and its feature list, or a model bundle directory
+
+        Bundles carry their own feature list; a ``features_path`` that
+        disagrees with it is refused rather than silently mis-scored.
+        """
+        if is_bundle(model_path):
+            bundle = ModelBundle.load(model_path)
+            if features_path is not None and Path(features_path).exists():
+                bundle.check_features(read_feature_list(features_path))
+            return cls(bundle, bundle.feature_names)
+
+        import joblib
+
+        return cls(joblib.load(model_path), read_feature_list(features_path))
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Hit probability for each row of ``X`` (columns in feature order)"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.forest is not None and (len(X) < self.compact_max_rows
+                                        or not self.sklearn_agrees):
+            return self._forest_proba(X)
+        return self._sklearn_proba(X)
+
+    def _forest_proba(self, X) -> np.ndarray:
+        return self.forest.predict_proba(X)[:, self._forest_hit_index]
+
+    def _sklearn_proba(self, X) -> np.ndarray:
+        if self._wants_frame:
+            import pandas as pd
+
+            X = pd.DataFrame(X, columns=self.feature_names)
+        return self.model.predict_proba(X)[:, self.hit_index]
+
+
+class LatencyTracker:
+    """Keep a rolling window of latencies and report percentiles"""
+
+    def __init__(self, window: int = 10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds * 1000.0)
+            self.count += 1
+
+    def percentiles(self, quantiles=(50, 90, 99)) -> Dict[str, float]:
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        if samples.size == 0:
+            return {f"p{q}_ms": 0.0 for q in quantiles}
+        values = np.percentile(samples, quantiles)
+        return {f"p{q}_ms": float(v) for q, v in zip(quantiles, values)}
+
+
+class MicroBatcher:
+    """Coalesce concurrent predict requests into one model call
+
+    Requests are queued; a single worker thread waits up to ``max_wait_ms``
+    for more work after the first request arrives, stacks everything it
+    collected (up to ``max_batch_size`` rows) and calls ``predict_fn`` once.
+    """
+
+    def __init__(self, predict_fn: Callable, max_batch_size: int = 256,
+                 max_wait_ms: float = 2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_latency = LatencyTracker()
+        self.batches = 0
+        self.rows = 0
+        self._queue = Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, rows) -> Future:
+        """Queue a 2D block of feature rows; the future yields probabilities"""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((np.asarray(rows, dtype=np.float64), future))
+        return future
+
+    def predict(self, rows, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(rows).result(timeout=timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch, size = [first], len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            start = time.perf_counter()
+            try:
+                probabilities = self.predict_fn(np.vstack([rows for rows, _ in batch]))
+            except Exception as exc:  # surface model errors to every caller
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            self.batch_latency.record(time.perf_counter() - start)
+            self.batches += 1
+            offset = 0
+            for rows, future in batch:
+                future.set_result(probabilities[offset:offset + len(rows)])
+                offset += len(rows)
+            self.rows += offset
+
+
+class ScoringService:
+    """Turn JSON track payloads into hit probabilities
+
+    With a ``recommender`` (see ``recommender.HitAwareRecommender``) the
+    service also answers "songs like this" queries. With a ``cache`` (see
+    ``prediction_cache.PredictionCache``) only cache misses reach the model.
+    With a ``score_table`` (see ``score_table.ScoreTable``) tracks sent by
+    catalog ``track_id`` are answered from the precomputed table and need no
+    features at all.
+    """
+
+    def __init__(self, predictor: HitPredictor, feature_fn: Optional[Callable] = None,
+                 max_batch_size: int = 256, max_wait_ms: float = 2.0, recommender=None,
+                 cache=None, score_table=None):
+        self.predictor = predictor
+        self.cache = cache
+        self.score_table = score_table
+        self.feature_fn = feature_fn or self._model_features
+        self.batcher = MicroBatcher(predictor.predict_proba, max_batch_size, max_wait_ms)
+        self.latency = LatencyTracker()
+        self.recommender = recommender
+        self.recommend_latency = LatencyTracker()
+
+    def swap_predictor(self, predictor: HitPredictor) -> None:
+        """Serve a retrained model; queued batches finish on the old one"""
+        if predictor.feature_names != self.predictor.feature_names:
+            raise ValueError("Replacement model expects different features")
+        self.predictor = predictor
+        self.batcher.predict_fn = predictor.predict_proba
+        # Precomputed scores belong to the old model
+        self.score_table = None
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _model_features(self, track: Dict) -> List[float]:
+        return [track[name] for name in self.predictor.feature_names]
+
+    def score(self, payload: Dict) -> Dict:
+        """Score ``{"track": {...}}`` or ``{"tracks": [...]}``"""
+        start = time.perf_counter()
+        if "tracks" in payload:
+            tracks, single = payload["tracks"], False
+        elif "track" in payload:
+            tracks, single = [payload["track"]], True
+        else:
+            raise ValueError('Request must contain "track" or "tracks"')
+        if not tracks:
+            return {"hit_probabilities": []}
+
+        probabilities = np.full(len(tracks), np.nan)
+        if self.score_table is not None:
+            ids = [track_id_of(track) for track in tracks]
+            with_id = [i for i, track_id in enumerate(ids) if track_id is not None]
+            if with_id:
+                probabilities[with_id] = self.score_table.lookup([ids[i] for i in with_id])
+        todo = np.flatnonzero(np.isnan(probabilities))
+
+        if len(todo):
+            try:
+                rows = [self.feature_fn(tracks[i]) for i in todo]
+            except KeyError as exc:
+                raise ValueError(f"Track is missing feature {exc}") from None
+            if self.cache is not None:
+                keys = cache_keys(self.cache, [tracks[i] for i in todo], rows)
+                probabilities[todo] = self.cache.get_or_compute(keys, rows, self.batcher.predict)
+            else:
+                probabilities[todo] = self.batcher.predict(rows)
+        probabilities = probabilities.tolist()
+        self.latency.record(time.perf_counter() - start)
+        if single:
+            return {"hit_probability": probabilities[0]}
+        return {"hit_probabilities": probabilities}
+
+    def recommend(self, payload: Dict) -> Dict:
+        """Recommend for ``{"track_id": n}`` or ``{"track": {audio features}}``"""
+        if self.recommender is None:
+            raise RecommendationsDisabled("Recommendations are not enabled on this server")
+        start = time.perf_counter()
+        k = int(payload.get("k", 10))
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if "track_id" in payload:
+            try:
+                results = self.recommender.recommend(track_id=int(payload["track_id"]), k=k)
+            except KeyError as exc:
+                raise ValueError(exc.args[0]) from None
+        elif "track" in payload:
+            track = payload["track"]
+            try:
+                features = [[track[name] for name in self.recommender.index.feature_names]]
+            except KeyError as exc:
+                raise ValueError(f"Track is missing feature {exc}") from None
+            results = self.recommender.recommend(features=features, k=k)
+        else:
+            raise ValueError('Request must contain "track_id" or "track"')
+        self.recommend_latency.record(time.perf_counter() - start)
+        return {"recommendations": results}
+
+    def metrics(self) -> Dict:
+        metrics = {
+            "requests": self.latency.count,
+            "request_latency": self.latency.percentiles(),
+            "model_calls": self.batcher.batches,
+            "rows_scored": self.batcher.rows,
+            "mean_batch_rows": self.batcher.rows / self.batcher.batches if self.batcher.batches else 0.0,
+            "model_call_latency": self.batcher.batch_latency.percentiles(),
+        }
+        if self.cache is not None:
+            metrics["prediction_cache"] = self.cache.stats()
+        if self.score_table is not None:
+            metrics["score_table_tracks"] = self.score_table.n_tracks
+        if self.recommender is not None:
+            cache = self.recommender.cache
+            metrics.update({
+                "recommend_requests": self.recommend_latency.count,
+                "recommend_latency": self.recommend_latency.percentiles(),
+                "hit_cache_hits": cache.hits,
+                "hit_cache_misses": cache.misses,
+            })
+        return metrics
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+class _ScoringHandler(BaseHTTPRequestHandler):
+    """Minimal JSON-over-HTTP front end for a ScoringService"""
+
+    routes_get = {"/health", "/metrics"}
+
+    def log_message(self, format, *args):  # keep request logs off stderr
+        pass
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "features": service.predictor.feature_names})
+        elif self.path == "/metrics":
+            self._send_json(200, service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        routes_post = {"/predict": service.score, "/recommend": service.recommend}
+        if self.path not in routes_post:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, routes_post[self.path](payload))
+        except RecommendationsDisabled as exc:
+            self._send_json(404, {"error": str(exc)})
+        except (ValueError, TypeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+        except Exception as exc:
+            # A bug, not a bad request: report it as such and keep the traceback
+            self.log_error("Error handling %s: %r", self.path, exc)
+            traceback.print_exc()
+            self._send_json(500, {"error": f"Internal error: {type(exc).__name__}"})
+
+
+def make_server(service: ScoringService, host: str = "127.0.0.1", port: int = 8000):
+    """Create a threaded HTTP server bound to ``service`` (call serve_forever)"""
+    server = ThreadingHTTPServer((host, port), _ScoringHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,200 @@
+"""
+Prediction cache for hit probabilities
+Bounded LRU/TTL map keyed by track id or by the quantized model-feature
+vector, cleared automatically when the model file's contents change
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+# Approximate per-entry overhead of the OrderedDict and its tuple values
+_ENTRY_OVERHEAD_BYTES = 120
+
+
+# Model bundles (see model_bundle.py) are directories identified by their
+# manifest, which records a checksum of every array
+MANIFEST_NAME = "manifest.json"
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    path = Path(path)
+    if path.is_dir():
+        path = path / MANIFEST_NAME
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """LRU cache of hit probabilities with optional time-to-live
+
+    Catalog tracks are keyed by id. Ad-hoc inputs are keyed by their model
+    feature vector rounded to ``decimals`` places, so inputs that differ by
+    less than that (e.g. repeated slider positions) share one entry. When
+    ``model_path`` is set, the file's SHA-256 is re-checked whenever its
+    size or mtime changes (at most every ``check_interval`` seconds) and a
+    new hash clears the cache.
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: Optional[float] = None,
+                 decimals: int = 4, model_path=None, check_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self.check_interval = check_interval
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+        self.model_path = Path(model_path) if model_path is not None else None
+        self._model_signature = None
+        self._model_digest = None
+        self._next_check = 0.0
+        if self.model_path is not None:
+            self.check_model(force=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def track_key(self, track_id) -> tuple:
+        return ("id", track_id)
+
+    def feature_key(self, features: Sequence[float]) -> tuple:
+        """Key for a model-feature vector, quantized to ``decimals`` places"""
+        scaled = np.round(np.asarray(features, dtype=np.float64) * 10.0 ** self.decimals)
+        return ("q", scaled.astype(np.int64).tobytes())
+
+    def check_model(self, force: bool = False) -> bool:
+        """Clear the cache if the model file changed; True when it did"""
+        if self.model_path is None:
+            return False
+        now = self.clock()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+
+        stat = self.model_path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._model_signature:
+            return False
+        self._model_signature = signature
+        digest = file_digest(self.model_path)
+        if digest == self._model_digest:
+            return False
+        changed = self._model_digest is not None
+        self._model_digest = digest
+        if changed:
+            self.invalidations += 1
+            self.clear()
+        return changed
+
+    @property
+    def model_digest(self) -> Optional[str]:
+        return self._model_digest
+
+    def get(self, key) -> Optional[float]:
+        """Cached probability for ``key``, or None"""
+        self.check_model()
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key, value: float) -> None:
+        with self._lock:
+            self._put(key, float(value))
+
+    def get_or_compute(self, keys: Sequence, rows, predict_fn: Callable) -> np.ndarray:
+        """Probabilities for ``keys``; misses are scored in one ``predict_fn`` call"""
+        self.check_model()
+        with self._lock:
+            values = [self._get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            computed = np.asarray(predict_fn([rows[i] for i in missing]), dtype=np.float64)
+            with self._lock:
+                for i, value in zip(missing, computed):
+                    values[i] = float(value)
+                    self._put(keys[i], values[i])
+        return np.asarray(values, dtype=np.float64)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "memory_bytes": self._bytes,
+        }
+
+    def _get(self, key) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires = entry
+        if expires is not None and self.clock() >= expires:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key, value: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        expires = self.clock() + self.ttl_seconds if self.ttl_seconds is not None else None
+        self._entries[key] = (value, expires)
+        self._bytes += self._entry_bytes(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key) -> None:
+        del self._entries[key]
+        self._bytes -= self._entry_bytes(key)
+
+    @staticmethod
+    def _entry_bytes(key) -> int:
+        return (sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+                + sys.getsizeof(0.0) + _ENTRY_OVERHEAD_BYTES)
+
+
+def track_id_of(track) -> Optional[int]:
+    """Catalog id of a request track (``track_id`` or ``id``), if any"""
+    if not isinstance(track, dict):
+        return None
+    return track.get("track_id", track.get("id"))
+
+
+def cache_keys(cache: PredictionCache, tracks: List[Dict], rows) -> List[tuple]:
+    """Track-id key where a track carries one, else its quantized features"""
+    keys = []
+    for track, row in zip(tracks, rows):
+        track_id = track_id_of(track)
+        keys.append(cache.track_key(track_id) if track_id is not None else cache.feature_key(row))
+    return keys
@@ -0,0 +1,173 @@
+"""
+Hit-aware "songs like this" recommendations
+Fetches audio-feature neighbours of a seed track from the similarity index
+and re-ranks them by the model's predicted hit probability
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .similarity import SimilarityIndex
+
+
+class HitScoreCache:
+    """Hit probability per catalog track, computed on first use
+
+    Unknown scores are NaN. ``get`` fills every missing entry of a request
+    with one ``score_fn`` call, so a query costs at most one model call and
+    repeat queries none. The cache can be persisted next to the model; the
+    ``key`` recorded with it (e.g. model and catalog signatures) decides
+    whether a saved cache is still valid.
+    """
+
+    def __init__(self, n_tracks: int, score_fn: Callable[[np.ndarray], np.ndarray]):
+        self.scores = np.full(n_tracks, np.nan, dtype=np.float32)
+        self.score_fn = score_fn
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        scores = self.scores[ids]
+        missing = np.isnan(scores)
+        if missing.any():
+            todo = np.unique(ids[missing])
+            computed = np.asarray(self.score_fn(todo), dtype=np.float32)
+            with self._lock:
+                self.scores[todo] = computed
+            scores = self.scores[ids]
+        self.hits += int((~missing).sum())
+        self.misses += int(missing.sum())
+        return scores
+
+    def warm(self, chunk_size: int = 100_000) -> None:
+        """Score every unknown track ahead of time, in chunks"""
+        todo = np.flatnonzero(np.isnan(self.scores))
+        for start in range(0, len(todo), chunk_size):
+            self.get(todo[start:start + chunk_size])
+
+    def grow(self, n_tracks: int) -> None:
+        """Make room for tracks appended to the catalog"""
+        extra = n_tracks - len(self.scores)
+        if extra > 0:
+            with self._lock:
+                self.scores = np.concatenate([self.scores, np.full(extra, np.nan, np.float32)])
+
+    def adopt(self, scores) -> None:
+        """Serve precomputed scores (e.g. a memory-mapped score table column)
+
+        A complete read-only column is shared as-is. One with NaN gaps is
+        copied, since ``get`` fills gaps in place.
+        """
+        if len(scores) != len(self.scores):
+            raise ValueError(f"Got {len(scores)} scores for {len(self.scores)} tracks")
+        if not scores.flags.writeable and np.isnan(scores).any():
+            scores = np.array(scores, dtype=np.float32)
+        with self._lock:
+            self.scores = scores
+
+    def save(self, path, key: str) -> Path:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "hit_scores.npy", self.scores)
+        with open(path / "hit_scores.json", "w") as f:
+            json.dump({"key": key, "n_tracks": len(self.scores)}, f)
+        return path
+
+    def load(self, path, key: str) -> bool:
+        """Adopt a saved cache if it was written for ``key``; returns success"""
+        path = Path(path)
+        try:
+            with open(path / "hit_scores.json") as f:
+                meta = json.load(f)
+            scores = np.load(path / "hit_scores.npy")
+        except (OSError, ValueError):
+            return False
+        if meta.get("key") != key or len(scores) > len(self.scores):
+            return False
+        self.scores[:len(scores)] = scores
+        return True
+
+
+class HitAwareRecommender:
+    """Re-rank audio neighbours of a seed track by hit probability
+
+    ``model_features`` holds the model-ready feature row of every catalog
+    track (row = track id). Candidates are the ``n_candidates`` nearest
+    tracks; each gets ``hit_weight * p_hit + (1 - hit_weight) * similarity``
+    with ``similarity = 1 / (1 + distance)``, and the top ``k`` are returned.
+    """
+
+    def __init__(self, index: SimilarityIndex, model_features, predict_fn: Callable,
+                 hit_weight: float = 0.5, n_candidates: int = 200,
+                 n_probe: Optional[int] = None, labels: Optional[Dict[str, list]] = None):
+        self.index = index
+        self.model_features = np.ascontiguousarray(model_features, dtype=np.float64)
+        self.predict_fn = predict_fn
+        self.hit_weight = hit_weight
+        self.n_candidates = n_candidates
+        self.n_probe = n_probe
+        self.labels = labels or {}
+        self.cache = HitScoreCache(len(self.model_features), self._score_rows)
+
+    @classmethod
+    def from_catalog(cls, df, plan, predict_fn: Callable, index: Optional[SimilarityIndex] = None,
+                     n_lists: int = 0, label_columns=("song_title", "artist"), **kwargs):
+        """Build from a track DataFrame and a FeaturePlan for the model's columns"""
+        if index is None:
+            index = SimilarityIndex.from_frame(df, n_lists=n_lists)
+        model_features = plan.execute(df).to_numpy(dtype=np.float64)
+        labels = {c: df[c].astype(str).tolist() for c in label_columns if c in df.columns}
+        return cls(index, model_features, predict_fn, labels=labels, **kwargs)
+
+    def set_predict_fn(self, predict_fn: Callable) -> None:
+        """Switch to a new model; cached hit scores are discarded"""
+        self.predict_fn = predict_fn
+        self.cache = HitScoreCache(len(self.model_features), self._score_rows)
+
+    def _score_rows(self, ids) -> np.ndarray:
+        return self.predict_fn(self.model_features[ids])
+
+    def recommend(self, track_id: Optional[int] = None, features=None, k: int = 10) -> List[Dict]:
+        """Top-k recommendations for a catalog track or raw audio features"""
+        n_candidates = max(self.n_candidates, k)
+        if track_id is not None:
+            ids, dists = self.index.similar_to(track_id, n_candidates, self.n_probe)
+        elif features is not None:
+            ids, dists = self.index.search(features, n_candidates, self.n_probe)
+            ids, dists = ids[0], dists[0]
+        else:
+            raise ValueError("Pass a track_id or audio features")
+
+        hit = self.cache.get(ids)
+        scores = self.hit_weight * hit + (1 - self.hit_weight) / (1 + dists)
+        top = np.argsort(-scores, kind="stable")[:k]
+
+        results = []
+        for i in top:
+            item = {
+                "track_id": int(ids[i]),
+                "score": float(scores[i]),
+                "hit_probability": float(hit[i]),
+                "distance": float(dists[i]),
+            }
+            for name, values in self.labels.items():
+                item[name] = values[ids[i]]
+            results.append(item)
+        return results
+
+    def add_tracks(self, features, model_features, labels: Optional[Dict[str, list]] = None):
+        """Append tracks to the index and catalog without rebuilding either"""
+        ids = self.index.add(features)
+        self.model_features = np.concatenate(
+            [self.model_features, np.asarray(model_features, dtype=np.float64)]
+        )
+        self.cache.grow(len(self.model_features))
+        for name, values in self.labels.items():
+            values.extend((labels or {}).get(name, [""] * len(ids)))
+        return ids
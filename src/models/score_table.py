@@ -0,0 +1,209 @@
+"""
+Precomputed hit probabilities for the whole catalog
+One uncompressed .npy per column (track id, probability, feature hash) so
+readers memory-map the table instead of running the forest; refreshes only
+re-score rows whose model features changed
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .prediction_cache import file_digest
+
+TABLE_FORMAT_VERSION = 1
+COLUMNS = ("track_ids", "probabilities", "feature_hashes")
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_INT64 = np.iinfo(np.int64)
+
+
+def model_version(*paths) -> str:
+    """Digest over the model and everything that shapes its inputs"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def feature_hashes(X) -> np.ndarray:
+    """64-bit hash of every row of ``X``, vectorized over rows
+
+    Columns are folded in one at a time through SplitMix64's finalizer on
+    the float64 bit patterns, so any change to any feature changes the hash.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    h = np.zeros(len(X), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in X.T:
+            z = h ^ (np.ascontiguousarray(column).view(np.uint64) + _GOLDEN_GAMMA)
+            z = (z ^ (z >> np.uint64(30))) * _MIX_1
+            z = (z ^ (z >> np.uint64(27))) * _MIX_2
+            h = z ^ (z >> np.uint64(31))
+    return h
+
+
+def catalog_ids(track_ids):
+    """``(ids, valid)``: int64 ids and which entries are real integer ids
+
+    Anything else a client might send as an id (strings, floats, bools,
+    integers beyond int64) is marked invalid rather than cast, so 3.7 never
+    becomes track 3 and a huge id never overflows.
+    """
+    if isinstance(track_ids, np.ndarray) and track_ids.dtype.kind in "iu":
+        if track_ids.dtype.kind == "u":
+            valid = track_ids <= _INT64.max
+            return np.where(valid, track_ids, 0).astype(np.int64), valid
+        return track_ids.astype(np.int64, copy=False), np.ones(len(track_ids), dtype=bool)
+    valid = np.array([isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_))
+                      and _INT64.min <= v <= _INT64.max for v in track_ids], dtype=bool)
+    ids = np.array([int(v) if ok else 0 for v, ok in zip(track_ids, valid)], dtype=np.int64)
+    return ids, valid
+
+
+class ScoreTable:
+    """Memory-mapped (track id, hit probability, feature hash) columns"""
+
+    def __init__(self, track_ids, probabilities, feature_hashes, meta: Dict):
+        self.track_ids = track_ids
+        self.probabilities = probabilities
+        self.feature_hashes = feature_hashes
+        self.meta = meta
+        # Ids 0..n-1 in order (row = track id) are looked up without a search
+        self._dense = bool(meta.get("dense_ids"))
+        self._order = None
+
+    @property
+    def n_tracks(self) -> int:
+        return len(self.track_ids)
+
+    @property
+    def model_version(self) -> str:
+        return self.meta["model_version"]
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "ScoreTable":
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        if meta.get("version") != TABLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported score table version in {path}: {meta.get('version')}")
+        # Copy-on-write: pages stay shared between readers unless written
+        mode = "c" if mmap else None
+        arrays = [np.load(path / f"{name}.npy", mmap_mode=mode) for name in COLUMNS]
+        return cls(*arrays, meta)
+
+    def positions(self, track_ids) -> np.ndarray:
+        """Row of each id in the table, -1 where the id is unknown or not an integer"""
+        ids, valid = catalog_ids(track_ids)
+        if self._dense:
+            return np.where(valid & (ids >= 0) & (ids < self.n_tracks), ids, -1)
+        if self._order is None:
+            self._order = np.argsort(self.track_ids, kind="stable")
+        sorted_ids = self.track_ids[self._order]
+        found = np.minimum(np.searchsorted(sorted_ids, ids), self.n_tracks - 1)
+        hit = sorted_ids[found] == ids if self.n_tracks else np.zeros(len(ids), bool)
+        return np.where(valid & hit, self._order[found], -1)
+
+    def lookup(self, track_ids) -> np.ndarray:
+        """Hit probability per id; NaN for ids not in the table"""
+        rows = self.positions(track_ids)
+        scores = np.full(len(rows), np.nan, dtype=np.float32)
+        known = rows >= 0
+        scores[known] = self.probabilities[rows[known]]
+        return scores
+
+
+def refresh_score_table(path, track_ids, X, predict_fn: Callable, version: str,
+                        chunk_size: int = 100_000, full: bool = False,
+                        source: Optional[str] = None) -> Dict:
+    """Write the table for the catalog ``(track_ids, X)``, re-scoring only what changed
+
+    Rows keep their previous probability when the table was written for the
+    same ``version`` and their id and feature hash are unchanged. Everything
+    is re-scored when the version differs or ``full`` is set. The new table
+    replaces the old one atomically; returns a summary of the work done.
+    ``source`` (e.g. the catalog's file signature) is recorded so readers can
+    tell whether the table still describes the catalog they loaded.
+    """
+    path = Path(path)
+    start = time.perf_counter()
+    track_ids = np.asarray(track_ids, dtype=np.int64)
+    hashes = feature_hashes(X)
+    probabilities = np.full(len(track_ids), np.nan, dtype=np.float32)
+
+    previous = None
+    if not full and (path / "meta.json").exists():
+        try:
+            previous = ScoreTable.load(path)
+        except (OSError, ValueError):
+            previous = None
+    reason = "full refresh requested" if full else "no previous table"
+    if previous is not None and previous.model_version != version:
+        reason, previous = "model version changed", None
+
+    if previous is not None:
+        rows = previous.positions(track_ids)
+        known = rows >= 0
+        same = np.zeros(len(track_ids), dtype=bool)
+        same[known] = previous.feature_hashes[rows[known]] == hashes[known]
+        probabilities[same] = previous.probabilities[rows[same]]
+        reason = "feature hashes changed" if not same.all() else "up to date"
+        del previous, rows
+
+    todo = np.flatnonzero(np.isnan(probabilities))
+    X = np.asarray(X)
+    for chunk_start in range(0, len(todo), chunk_size):
+        chunk = todo[chunk_start:chunk_start + chunk_size]
+        probabilities[chunk] = predict_fn(X[chunk])
+
+    staging = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name, values in zip(COLUMNS, (track_ids, probabilities, hashes)):
+        np.save(staging / f"{name}.npy", values)
+    meta = {
+        "version": TABLE_FORMAT_VERSION,
+        "model_version": version,
+        "n_tracks": int(len(track_ids)),
+        "dense_ids": bool(np.array_equal(track_ids, np.arange(len(track_ids)))),
+        "source": source,
+        "created": time.time(),
+    }
+    with open(staging / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+    if path.exists():
+        retired = path.with_name(f"{path.name}.old-{os.getpid()}")
+        os.replace(path, retired)
+        shutil.rmtree(retired, ignore_errors=True)
+    os.replace(staging, path)
+
+    return {
+        "n_tracks": int(len(track_ids)),
+        "rescored": int(len(todo)),
+        "reused": int(len(track_ids) - len(todo)),
+        "reason": reason,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def open_score_table(path, version: Optional[str] = None,
+                     source: Optional[str] = None) -> Optional[ScoreTable]:
+    """Memory-map a table if it exists and matches ``version``/``source`` when given"""
+    try:
+        table = ScoreTable.load(path)
+    except (OSError, ValueError):
+        return None
+    if version is not None and table.model_version != version:
+        return None
+    if source is not None and table.meta.get("source") != source:
+        return None
+    return table
@@ -0,0 +1,294 @@
+"""
+Audio-feature similarity index for "songs like this" recommendations
+Standardizes the audio feature vectors and answers top-k nearest-neighbour
+queries exactly (batched matrix products) or approximately (IVF lists)
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+AUDIO_FEATURES = [
+    "acousticness", "danceability", "energy", "instrumentalness",
+    "liveness", "loudness", "speechiness", "tempo", "valence",
+]
+
+ARRAY_NAMES = ("vectors", "ids", "mean", "scale", "centroids", "list_offsets", "list_order")
+
+# Rows of the catalog scored per matrix product in exact search
+BLOCK_ROWS = 65536
+
+
+class SimilarityIndex:
+    """Nearest-neighbour index over standardized audio features
+
+    Distances are Euclidean in z-score space, so each feature counts
+    equally regardless of its units. Vectors are stored as float32.
+
+    With ``n_lists > 0`` the catalog is also partitioned by k-means into
+    inverted lists (IVF). An approximate query scans only the ``n_probe``
+    lists whose centroids are closest to it. Tracks added with ``add`` go
+    to a small delta segment that every query scans exactly; ``compact``
+    files them into the lists using the existing centroids, so inserts
+    never retrain the partitioning.
+    """
+
+    def __init__(self, vectors, ids, mean, scale, centroids=None, list_offsets=None,
+                 list_order=None, feature_names: Sequence[str] = AUDIO_FEATURES):
+        self.vectors = vectors
+        self.ids = ids
+        self.mean = mean
+        self.scale = scale
+        self.centroids = centroids if centroids is not None else np.empty((0, len(mean)), np.float32)
+        self.list_offsets = list_offsets if list_offsets is not None else np.zeros(1, np.int64)
+        self.list_order = list_order if list_order is not None else np.empty(0, np.int64)
+        self.feature_names = list(feature_names)
+        self._norms = _squared_norms(vectors)
+
+    @property
+    def n_tracks(self) -> int:
+        return len(self.ids)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def n_pending(self) -> int:
+        """Tracks added since the inverted lists were last compacted"""
+        return self.n_tracks - len(self.list_order) if self.n_lists else 0
+
+    @classmethod
+    def build(cls, features, ids=None, n_lists: int = 0, n_iter: int = 10,
+              feature_names: Sequence[str] = AUDIO_FEATURES, seed: int = 0) -> "SimilarityIndex":
+        """Index raw feature rows (columns in ``feature_names`` order)"""
+        features = np.asarray(features, dtype=np.float64)
+        if ids is None:
+            ids = np.arange(len(features))
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+
+        index = cls(
+            ((features - mean) / scale).astype(np.float32),
+            np.asarray(ids, dtype=np.int64),
+            mean, scale, feature_names=feature_names,
+        )
+        if n_lists:
+            index.centroids = _kmeans(index.vectors, n_lists, n_iter, seed)
+            index._assign_lists()
+        return index
+
+    @classmethod
+    def from_frame(cls, df, n_lists: int = 0, feature_names: Sequence[str] = AUDIO_FEATURES,
+                   **kwargs) -> "SimilarityIndex":
+        """Index a track DataFrame; ids are its row positions"""
+        return cls.build(df[list(feature_names)].to_numpy(), np.arange(len(df)),
+                         n_lists=n_lists, feature_names=feature_names, **kwargs)
+
+    def transform(self, features) -> np.ndarray:
+        """Standardize raw feature rows with the index's statistics"""
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        return ((features - self.mean) / self.scale).astype(np.float32)
+
+    def add(self, features, ids=None) -> np.ndarray:
+        """Append new tracks without rebuilding; returns their ids"""
+        vectors = self.transform(features)
+        if ids is None:
+            start = int(self.ids.max()) + 1 if self.n_tracks else 0
+            ids = np.arange(start, start + len(vectors))
+        ids = np.asarray(ids, dtype=np.int64)
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.ids = np.concatenate([self.ids, ids])
+        self._norms = np.concatenate([self._norms, _squared_norms(vectors)])
+        return ids
+
+    def compact(self) -> None:
+        """File pending tracks into the inverted lists (centroids unchanged)"""
+        if not (self.n_lists and self.n_pending):
+            return
+        # Only the pending vectors need a centroid lookup
+        assignment = np.empty(self.n_tracks, dtype=np.int64)
+        assignment[self.list_order] = np.repeat(np.arange(self.n_lists),
+                                                np.diff(self.list_offsets))
+        filed = len(self.list_order)
+        assignment[filed:] = _nearest(self.vectors[filed:], self.centroids)
+        self._set_lists(assignment)
+
+    def search(self, features, k: int = 10, n_probe: Optional[int] = None,
+               exclude_ids=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k neighbours of each raw feature row
+
+        Exact unless the index has inverted lists and ``n_probe`` is given.
+        ``exclude_ids`` (one id per query, e.g. the seed track) is dropped
+        from that query's results. Returns ``(ids, distances)``, each of
+        shape ``(n_queries, k)`` and sorted by distance.
+        """
+        queries = self.transform(features)
+        extra = 0 if exclude_ids is None else 1
+        if n_probe is None or not self.n_lists:
+            rows, dists = self._search_exact(queries, k + extra)
+        else:
+            rows, dists = self._search_ivf(queries, k + extra, n_probe)
+
+        ids = self.ids[rows]
+        if exclude_ids is not None:
+            ids, dists = _drop_excluded(ids, dists, np.asarray(exclude_ids), k)
+        return ids, dists
+
+    def similar_to(self, track_id: int, k: int = 10,
+                   n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k neighbours of an indexed track, excluding the track itself"""
+        if 0 <= track_id < self.n_tracks and self.ids[track_id] == track_id:
+            row = track_id  # ids are row positions unless given explicitly
+        else:
+            rows = np.flatnonzero(self.ids == track_id)
+            if not len(rows):
+                raise KeyError(f"Track {track_id} is not in the index")
+            row = rows[0]
+        features = self.vectors[row:row + 1] * self.scale + self.mean
+        ids, dists = self.search(features, k, n_probe, exclude_ids=[track_id])
+        return ids[0], dists[0]
+
+    def _search_exact(self, queries, k):
+        """Brute force with one matrix product per catalog block"""
+        k = min(k, self.n_tracks)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_dists = np.empty((len(queries), 0), dtype=np.float32)
+        q_norms = _squared_norms(queries)[:, None]
+
+        for start in range(0, self.n_tracks, BLOCK_ROWS):
+            block = self.vectors[start:start + BLOCK_ROWS]
+            dists = q_norms + self._norms[start:start + BLOCK_ROWS] - 2 * (queries @ block.T)
+            top = _top_k(dists, k)
+            block_rows = top + start
+            block_dists = np.take_along_axis(dists, top, axis=1)
+            # Merge the running best with this block's best
+            best_rows = np.concatenate([best_rows, block_rows], axis=1)
+            best_dists = np.concatenate([best_dists, block_dists], axis=1)
+            keep = _top_k(best_dists, k)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+            best_dists = np.take_along_axis(best_dists, keep, axis=1)
+
+        order = np.argsort(best_dists, axis=1, kind="stable")
+        return (np.take_along_axis(best_rows, order, axis=1),
+                np.sqrt(np.maximum(np.take_along_axis(best_dists, order, axis=1), 0)))
+
+    def _search_ivf(self, queries, k, n_probe):
+        """Scan the closest ``n_probe`` lists plus the pending delta segment
+
+        More lists are probed when the first ``n_probe`` hold fewer than
+        ``k`` tracks, so every query gets a full result.
+        """
+        k = min(k, self.n_tracks)
+        centroid_dists = (_squared_norms(queries)[:, None] + _squared_norms(self.centroids)
+                          - 2 * (queries @ self.centroids.T))
+        list_rank = np.argsort(centroid_dists, axis=1)
+        sizes = np.diff(self.list_offsets)
+        pending = np.arange(len(self.list_order), self.n_tracks)
+
+        rows_out = np.empty((len(queries), k), dtype=np.int64)
+        dists_out = np.empty((len(queries), k), dtype=np.float32)
+        for i, query in enumerate(queries):
+            covered = np.cumsum(sizes[list_rank[i]]) + len(pending)
+            n_lists = max(n_probe, int(np.searchsorted(covered, k)) + 1)
+            candidates = np.concatenate(
+                [self.list_order[self.list_offsets[p]:self.list_offsets[p + 1]]
+                 for p in list_rank[i, :n_lists]] + [pending]
+            )
+            dists = (self._norms[candidates] - 2 * (self.vectors[candidates] @ query)
+                     + query @ query)
+            top = _top_k(dists[None, :], k)[0]
+            top = top[np.argsort(dists[top], kind="stable")]
+            rows_out[i] = candidates[top]
+            dists_out[i] = np.sqrt(np.maximum(dists[top], 0))
+        return rows_out, dists_out
+
+    def _assign_lists(self) -> None:
+        """Rebuild the CSR inverted lists from each vector's nearest centroid"""
+        self._set_lists(_nearest(self.vectors, self.centroids))
+
+    def _set_lists(self, assignment) -> None:
+        # Stable sorts of 16-bit keys use radix sort, linear in the catalog size
+        keys = assignment.astype(np.int16) if self.n_lists <= np.iinfo(np.int16).max else assignment
+        self.list_order = np.argsort(keys, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=self.n_lists)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def save(self, path) -> Path:
+        """Write one ``.npy`` per array plus ``meta.json``; pending tracks are compacted"""
+        self.compact()
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = {"n_tracks": self.n_tracks, "n_lists": self.n_lists,
+                "feature_names": self.feature_names}
+        with open(path / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "SimilarityIndex":
+        """Load an index written by ``save``, memory-mapped by default"""
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in ARRAY_NAMES}
+        return cls(feature_names=meta["feature_names"], **arrays)
+
+
+def _squared_norms(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors)
+    return np.einsum("ij,ij->i", vectors, vectors)
+
+
+def _top_k(dists, k) -> np.ndarray:
+    """Column indices of the k smallest entries per row (unordered)"""
+    if k >= dists.shape[1]:
+        return np.broadcast_to(np.arange(dists.shape[1]), dists.shape).copy()
+    return np.argpartition(dists, k - 1, axis=1)[:, :k]
+
+
+def _nearest(vectors, centroids, block_rows: int = BLOCK_ROWS) -> np.ndarray:
+    """Index of the nearest centroid for every vector"""
+    c_norms = _squared_norms(centroids)
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_rows):
+        block = vectors[start:start + block_rows]
+        out[start:start + block_rows] = np.argmin(c_norms - 2 * (block @ centroids.T), axis=1)
+    return out
+
+
+def _kmeans(vectors, n_lists, n_iter, seed, sample_per_list: int = 256) -> np.ndarray:
+    """Lloyd's k-means on a sample of the catalog"""
+    rng = np.random.default_rng(seed)
+    n_lists = min(n_lists, len(vectors))
+    sample_size = min(len(vectors), n_lists * sample_per_list)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignment = _nearest(sample, centroids)
+        counts = np.bincount(assignment, minlength=n_lists)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Reseed empty lists from random sample points
+        empty = np.flatnonzero(~filled)
+        centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+    return centroids
+
+
+def _drop_excluded(ids, dists, exclude_ids, k):
+    """Remove each query's excluded id and trim the results to k"""
+    keep = ids != exclude_ids[:, None]
+    # Keep the first k surviving columns of each row
+    order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(dists, order, axis=1)
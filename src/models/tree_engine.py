@@ -0,0 +1,219 @@
+"""
+Compact tree-ensemble inference engine
+Flattens a fitted sklearn forest into contiguous NumPy node arrays and
+scores batches with a vectorized, depth-synchronous traversal
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+ARRAY_NAMES = ("nodes", "value", "roots")
+
+# One record per node so a traversal step needs a single gather
+NODE_DTYPE = np.dtype([("threshold", "<f4"), ("left", "<i4"), ("feature", "<i4")])
+
+# Leaves are dropped from the working set every few levels
+COMPACT_EVERY = 3
+
+
+class CompactForest:
+    """Tree ensemble stored as flat node arrays
+
+    Nodes of every tree are renumbered breadth-first so that the right child
+    of a split always sits directly after its left child. A traversal step is
+    then ``node = left[node] + (x > threshold[node])``. Leaves point at
+    themselves with an infinite threshold, so rows that reach a leaf early
+    simply stay there.
+
+    Thresholds are stored as the largest float32 not above sklearn's float64
+    threshold. sklearn casts inputs to float32, and for any float32 ``x`` the
+    comparison ``x <= t`` is unchanged by that rounding, so traversal is exact.
+    """
+
+    def __init__(self, nodes, value, roots, max_depth: int, classes: Sequence,
+                 feature_names: Optional[Sequence[str]] = None):
+        self.nodes = nodes
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = list(classes)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_features = int(nodes["feature"].max()) + 1 if len(nodes) else 0
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompactForest":
+        """Flatten a fitted RandomForest/ExtraTrees (or single tree) classifier"""
+        estimators = getattr(model, "estimators_", [model])
+        blocks, values, roots = [], [], []
+        offset, max_depth = 0, 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            order = np.asarray(_breadth_first_order(tree.children_left, tree.children_right))
+            new_id = np.empty(tree.node_count, dtype=np.int64)
+            new_id[order] = np.arange(tree.node_count) + offset
+
+            is_leaf = tree.children_left[order] == -1
+            block = np.empty(tree.node_count, dtype=NODE_DTYPE)
+            block["left"] = np.where(is_leaf, new_id[order], new_id[tree.children_left[order]])
+            block["threshold"] = np.where(is_leaf, np.inf, _float32_floor(tree.threshold[order]))
+            block["feature"] = np.where(is_leaf, 0, tree.feature[order])
+
+            # Older sklearn stores class counts in the leaves; normalize both kinds
+            value = tree.value[order, 0, :].astype(np.float64)
+            value /= value.sum(axis=1, keepdims=True)
+
+            blocks.append(block)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        feature_names = getattr(model, "feature_names_in_", None)
+        return cls(
+            np.concatenate(blocks),
+            np.ascontiguousarray(np.concatenate(values)),
+            np.asarray(roots, dtype=np.int32),
+            max_depth,
+            [c.item() if hasattr(c, "item") else c for c in model.classes_],
+            feature_names,
+        )
+
+    def save(self, path) -> Path:
+        """Write one uncompressed ``.npy`` per array plus ``meta.json``"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(path / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "classes": self.classes,
+            "feature_names": self.feature_names,
+        }
+        with open(path / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "CompactForest":
+        """Load arrays written by ``save``, memory-mapped by default"""
+        path = Path(path)
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in ARRAY_NAMES}
+        return cls(max_depth=meta["max_depth"], classes=meta["classes"],
+                   feature_names=meta.get("feature_names"), **arrays)
+
+    def predict_proba(self, X, chunk_size: int = 512, n_threads: int = 1) -> np.ndarray:
+        """Average leaf class probabilities over all trees, like sklearn
+
+        Chunks are independent, so ``n_threads > 1`` scores them on a thread
+        pool (NumPy releases the GIL inside the gathers).
+        """
+        # sklearn compares float32 inputs against the thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] < self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+
+        out = np.empty((len(X), len(self.classes)), dtype=np.float64)
+        starts = range(0, len(X), chunk_size)
+
+        def score(start):
+            out[start:start + chunk_size] = self._predict_chunk(X[start:start + chunk_size])
+
+        if n_threads > 1 and len(starts) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=n_threads) as pool:
+                list(pool.map(score, starts))
+        else:
+            for start in starts:
+                score(start)
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(self.classes)[self.predict_proba(X).argmax(axis=1)]
+
+    def _leaves(self, X) -> np.ndarray:
+        n_rows, n_columns = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        # Offset of each (tree, row) pair's row inside the flattened chunk
+        row_base = np.tile(np.arange(n_rows, dtype=np.int32) * n_columns, self.n_trees)
+
+        leaves = np.repeat(np.asarray(self.roots, dtype=np.int32), n_rows)
+        current, active = leaves, None
+        for depth in range(self.max_depth):
+            node = np.take(self.nodes, current)
+            x = np.take(flat, node["feature"] + row_base)
+            current = node["left"] + (x > node["threshold"])
+
+            if depth % COMPACT_EVERY == COMPACT_EVERY - 1 and depth < self.max_depth - 1:
+                # Write back and keep only the pairs still at a split
+                keep = np.flatnonzero(np.take(self.nodes["threshold"], current) != np.inf)
+                if active is None:
+                    leaves, active = current, keep
+                else:
+                    leaves[active] = current
+                    active = active[keep]
+                current, row_base = current[keep], row_base[keep]
+
+        if active is None:
+            return current
+        leaves[active] = current
+        return leaves
+
+    def _predict_chunk(self, X) -> np.ndarray:
+        n_rows = len(X)
+        leaves = self._leaves(X)
+        if len(self.classes) == 2:
+            hit = np.take(self.value[:, 1], leaves).reshape(self.n_trees, n_rows)
+            proba = np.empty((n_rows, 2))
+            proba[:, 1] = hit.sum(axis=0) / self.n_trees
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+        leaf_values = np.take(self.value, leaves, axis=0).reshape(self.n_trees, n_rows, -1)
+        return leaf_values.sum(axis=0) / self.n_trees
+
+
+def _float32_floor(threshold) -> np.ndarray:
+    """Largest float32 that is not greater than each float64 threshold"""
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _breadth_first_order(children_left, children_right) -> List[int]:
+    """Node order in which each split's two children are adjacent"""
+    order, queue, head = [0], [0], 0
+    while head < len(queue):
+        node = queue[head]
+        head += 1
+        if children_left[node] != -1:
+            for child in (children_left[node], children_right[node]):
+                order.append(child)
+                queue.append(child)
+    return order
+
+
+def export_forest(model, path) -> Path:
+    """Flatten a fitted sklearn forest and save it to ``path``"""
+    return CompactForest.from_sklearn(model).save(path)
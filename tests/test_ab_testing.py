@@ -0,0 +1,124 @@
+"""
+Test the A/B testing engine: assignment, streaming statistics and resumption
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.ab_testing.assignment import VariantAssigner, user_keys
+from src.ab_testing.engine import ABTestEngine
+from src.ab_testing.events import generate_event_log
+from src.ab_testing.sequential import StreamingMoments, msprt_p_value
+
+
+def test_assignment_is_deterministic_and_weighted():
+    assigner = VariantAssigner('exp-1', ['a', 'b', 'c'], weights=[2, 1, 1])
+    users = np.arange(200_000)
+    groups = assigner.assign(users)
+    np.testing.assert_array_equal(groups, VariantAssigner('exp-1', ['a', 'b', 'c'],
+                                                          [2, 1, 1]).assign(users))
+    np.testing.assert_allclose(np.bincount(groups) / len(users), [0.5, 0.25, 0.25], atol=0.01)
+
+    # A different experiment reshuffles users independently
+    other = VariantAssigner('exp-2', ['a', 'b', 'c'], [2, 1, 1]).assign(users)
+    assert 0.3 < (groups == other).mean() < 0.45
+    assert assigner.variant_of('user-42') == assigner.variant_of('user-42')
+
+
+def test_streaming_moments_match_a_full_pass():
+    rng = np.random.default_rng(1)
+    groups = rng.integers(0, 3, 10_000)
+    values = rng.normal(100, 15, 10_000)
+    moments = StreamingMoments(3)
+    for batch in np.array_split(np.arange(10_000), 7):
+        moments.update(groups[batch], values[batch])
+
+    for g in range(3):
+        np.testing.assert_allclose(moments.mean[g], values[groups == g].mean())
+        np.testing.assert_allclose(moments.variance[g], values[groups == g].var(ddof=1))
+    assert msprt_p_value(0.0, 1e-4, tau=0.02) == 1.0
+
+
+def test_engine_detects_lift_and_resumes_from_state(tmp_path):
+    log_path = generate_event_log(tmp_path / 'events.csv', 200_000, experiment='recs',
+                                  lifts={'treatment': 0.03}, chunk_size=50_000)
+    log = pd.read_csv(log_path)
+
+    engine = ABTestEngine('recs')
+    assert engine.ingest_csv(log_path, chunksize=20_000, check_variants=True) == len(log)
+    assert engine.n_mismatched == 0 and engine.n_batches == 10
+    control, treatment = engine.results()
+    assert treatment['significant'] and treatment['difference'] > 0.02
+
+    # Ingesting the first half, saving, then only the second half gives the same state
+    first = ABTestEngine('recs')
+    first.ingest_frame(log.iloc[:100_000])
+    first.save(tmp_path / 'state.json')
+    resumed = ABTestEngine.load(tmp_path / 'state.json')
+    resumed.ingest_frame(log.iloc[100_000:])
+    np.testing.assert_allclose(resumed.moments.mean, engine.moments.mean)
+    np.testing.assert_array_equal(resumed.moments.count, engine.moments.count)
+
+
+def test_resuming_from_state_skips_events_already_ingested(tmp_path):
+    log = pd.read_csv(generate_event_log(tmp_path / 'full.csv', 60_000, experiment='recs',
+                                         lifts={'treatment': 0.03}, chunk_size=20_000))
+    log_path = tmp_path / 'events.csv'
+    log.iloc[:25_000].to_csv(log_path, index=False)
+
+    first = ABTestEngine('recs')
+    assert first.ingest_csv(log_path, chunksize=10_000) == 25_000
+    first.save(tmp_path / 'state.json')
+
+    # The log grows; a resumed run reads only the appended events
+    log.iloc[25_000:].to_csv(log_path, mode='a', header=False, index=False)
+    resumed = ABTestEngine.load(tmp_path / 'state.json')
+    assert resumed.ingest_csv(log_path, chunksize=10_000, check_variants=True) == 35_000
+    assert resumed.ingest_csv(log_path) == 0
+
+    full = ABTestEngine('recs')
+    full.ingest_frame(log)
+    np.testing.assert_array_equal(resumed.moments.count, full.moments.count)
+    np.testing.assert_allclose(resumed.moments.mean, full.moments.mean)
+    assert resumed.n_mismatched == 0
+
+    log.iloc[:10_000].to_csv(log_path, index=False)
+    with pytest.raises(ValueError, match='truncated or replaced'):
+        resumed.ingest_csv(log_path)
+
+
+def test_string_user_ids_are_read_from_the_log(tmp_path):
+    users = np.array([f'user-{i}' for i in range(3_000)] + [str(i) for i in range(3_000)],
+                     dtype=object)
+    assigner = VariantAssigner('recs')
+    log = pd.DataFrame({'user_id': users, 'outcome': np.arange(len(users)) % 7 == 0,
+                        'variant': [assigner.variants[g] for g in assigner.assign(users)]})
+    log.to_csv(tmp_path / 'events.csv', index=False)
+
+    # The numeric tail is parsed as int64; those users keep the same keys
+    engine = ABTestEngine('recs')
+    assert engine.ingest_csv(tmp_path / 'events.csv', chunksize=1_000,
+                             check_variants=True) == len(users)
+    assert engine.n_mismatched == 0 and engine.n_events == len(users)
+    np.testing.assert_array_equal(user_keys(['42', 42, np.int64(-1)]),
+                                  user_keys(np.array([42, 42, -1])))
+    assert user_keys(['4.2'])[0] != user_keys([4])[0]
+
+
+def test_no_effect_rarely_reaches_significance():
+    rng = np.random.default_rng(7)
+    false_positives = 0
+    for trial in range(40):
+        engine = ABTestEngine(f'null-{trial}', tau=0.02)
+        for _ in range(20):
+            users = rng.integers(0, 10**9, 5_000)
+            engine.ingest(users, rng.random(5_000) < 0.1)
+        false_positives += engine.results()[1]['significant']
+    assert false_positives <= 5
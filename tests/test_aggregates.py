@@ -0,0 +1,58 @@
+"""
+Test the year/genre aggregate lookup tables and their pipeline join
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+from src.data_processing.aggregates import (AGGREGATES_DIR, NORM_FEATURES,
+                                            load_norm_tables)
+
+
+def test_lookup_matches_a_pandas_merge(tmp_path):
+    tables = load_norm_tables()
+    by_year = pd.read_csv(AGGREGATES_DIR / 'data_by_year.csv')
+    by_genre = pd.read_csv(AGGREGATES_DIR / 'data_by_genres.csv')
+    assert tables['year'].offset == 1921 and tables['genre'].n_keys == len(by_genre)
+
+    years = pd.Series([1999, 2020, 1921, 1850, np.nan, 1999])
+    expected = pd.DataFrame({'year': years}).merge(by_year, on='year', how='left')
+    np.testing.assert_array_equal(tables['year'].lookup(years, ['energy', 'tempo']),
+                                  expected[['energy', 'tempo']].to_numpy())
+
+    genres = pd.Series(['pop', 'not a genre', None, 'k-pop', 'pop'])
+    expected = pd.DataFrame({'genres': genres}).merge(by_genre, on='genres', how='left')
+    np.testing.assert_array_equal(tables['genre'].lookup(genres),
+                                  expected[tables['genre'].features].to_numpy())
+
+
+def test_engineer_adds_deviation_features():
+    from create_features import SpotifyFeatureEngineer
+
+    tables = load_norm_tables()
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({f: rng.random(300) for f in NORM_FEATURES})
+    df['year'] = rng.integers(1950, 2021, 300)
+    df['genres'] = rng.choice(['pop', 'rock', 'jazz', 'unknown'], 300)
+
+    plain = SpotifyFeatureEngineer().create_all_features(df)
+    engineer = SpotifyFeatureEngineer(norms=tables)
+    result = engineer.create_all_features(df, copy=False)
+    assert list(result.columns[:len(plain.columns)]) == list(plain.columns)
+    assert 'energy_vs_year' in engineer.feature_names
+
+    norm = tables['year'].lookup(df['year'], ['energy'])[:, 0]
+    np.testing.assert_allclose(result['energy_vs_year'], df['energy'] - norm)
+    assert result.loc[df['genres'] == 'unknown', 'tempo_vs_genre'].isna().all()
+    assert result.loc[df['genres'] != 'unknown', 'tempo_vs_genre'].notna().all()
+
+    # Frames without the key columns are left untouched
+    no_keys = engineer.create_all_features(df[NORM_FEATURES])
+    assert not any('_vs_' in c for c in no_keys.columns)
@@ -0,0 +1,95 @@
+"""
+Test the batch scoring pipeline: results, bounded queues and error handling
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.batch_scoring import BatchScoringPipeline, score_file
+
+FEATURES = ['energy', 'danceability', 'valence']
+
+
+@pytest.fixture
+def tracks(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((1000, len(FEATURES))), columns=FEATURES)
+    df.insert(0, 'song_title', [f'track {i}' for i in range(len(df))])
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    model.fit(df[FEATURES].to_numpy(), (df['energy'] > 0.5).astype(int))
+    return df, model
+
+
+def engineer(chunk):
+    return chunk[FEATURES].to_numpy()
+
+
+def test_score_file_matches_direct_prediction(tmp_path, tracks):
+    df, model = tracks
+    df.to_csv(tmp_path / 'tracks.csv', index=False)
+    report = score_file(tmp_path / 'tracks.csv', tmp_path / 'scores.csv', engineer,
+                        lambda X: model.predict_proba(X)[:, 1], keep_columns=['song_title'],
+                        batch_size=128, queue_size=2)
+
+    scores = pd.read_csv(tmp_path / 'scores.csv')
+    assert list(scores.columns) == ['song_title', 'hit_probability']
+    assert scores['song_title'].tolist() == df['song_title'].tolist()
+    np.testing.assert_allclose(scores['hit_probability'],
+                               model.predict_proba(df[FEATURES].to_numpy())[:, 1], rtol=1e-6)
+    assert report['rows'] == len(df)
+    assert [s['stage'] for s in report['stages']] == ['read', 'engineer', 'predict', 'write']
+    assert all(s['rows'] == len(df) and s['batches'] == 8 for s in report['stages'])
+
+
+def test_parquet_round_trip(tmp_path, tracks):
+    pytest.importorskip('pyarrow')
+    df, model = tracks
+    df.to_parquet(tmp_path / 'tracks.parquet')
+    score_file(tmp_path / 'tracks.parquet', tmp_path / 'scores.parquet', engineer,
+               lambda X: model.predict_proba(X)[:, 1], batch_size=300)
+    assert len(pd.read_parquet(tmp_path / 'scores.parquet')) == len(df)
+
+
+def test_queues_bound_how_far_reading_runs_ahead():
+    read = []
+
+    def batches():
+        for i in range(50):
+            read.append(i)
+            yield np.zeros((10, 1))
+
+    written = []
+
+    def slow_write(chunk, probabilities):
+        # Stages in flight: 3 queues of 1 plus one chunk held by each thread
+        assert len(read) - len(written) <= 8
+        written.append(len(chunk))
+        time.sleep(0.002)
+
+    pipeline = BatchScoringPipeline(lambda X: X, lambda X: X[:, 0], queue_size=1)
+    report = pipeline.run(batches(), slow_write)
+    assert report['rows'] == 500 and len(written) == 50
+
+
+def test_stage_errors_stop_the_pipeline_and_keep_the_old_output(tmp_path, tracks):
+    df, _ = tracks
+    df.to_csv(tmp_path / 'tracks.csv', index=False)
+    (tmp_path / 'scores.csv').write_text('previous\n')
+
+    def failing_predict(X):
+        raise RuntimeError('model exploded')
+
+    with pytest.raises(RuntimeError, match='model exploded'):
+        score_file(tmp_path / 'tracks.csv', tmp_path / 'scores.csv', engineer,
+                   failing_predict, batch_size=10, queue_size=1)
+    assert (tmp_path / 'scores.csv').read_text() == 'previous\n'
+    assert not (tmp_path / 'scores.csv.tmp').exists()
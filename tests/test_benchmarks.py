@@ -0,0 +1,46 @@
+"""
+Smoke test for the benchmark suite and its regression check
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+
+from run_benchmarks import compare, main
+from synthetic_data import make_labelled_tracks, write_tracks_csv
+
+
+def test_generated_tracks_match_fixture_shape(tmp_path):
+    df = make_labelled_tracks(1000)
+    assert len(df) == 1000 and df['target'].mean() == 0.5
+
+    path = write_tracks_csv(2500, tmp_path / 'tracks.csv')
+    written = pd.read_csv(path)
+    assert len(written) == 2500 and list(written.columns) == list(df.columns)
+
+
+def test_suite_writes_json_and_flags_regressions(tmp_path):
+    output = tmp_path / 'results.json'
+    results = main(['--rows', '1000', '--repeat', '1', '--n-estimators', '5',
+                    '--data-dir', str(tmp_path), '--output', str(output)])
+    saved = json.loads(output.read_text())
+    metrics = saved['results'][0]['metrics']
+    for name in ('load.read_csv_s', 'features.copying.interaction_features_s',
+                 'features.single_pass.all_features_s', 'train.fit_s',
+                 'predict.sklearn.single_p50_ms', 'predict.compact.batch_rows_per_s'):
+        assert metrics[name] > 0
+    assert saved['environment']['commit']
+    assert compare(results, saved) == []
+
+    slower = json.loads(output.read_text())
+    slower['results'][0]['metrics']['train.fit_s'] *= 2
+    slower['results'][0]['metrics']['predict.compact.batch_rows_per_s'] /= 2
+    assert {r['metric'] for r in compare(slower, saved)} == {
+        'train.fit_s', 'predict.compact.batch_rows_per_s'
+    }
@@ -0,0 +1,59 @@
+"""
+Test compact dtypes and memory reporting for loaded track frames
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+from src.data_processing.compact import compact_frame, compact_with_report
+from src.data_processing.data_loader import SpotifyDataLoader
+
+
+def test_compact_load_downcasts_the_raw_schema():
+    loader = SpotifyDataLoader()
+    full = loader.load('raw', apply_dtypes=False)
+    df = loader.load('raw', compact=True)
+
+    assert 'Unnamed: 0' in full.columns and 'Unnamed: 0' not in df.columns
+    assert df['energy'].dtype == np.float32
+    assert all(df[c].dtype == np.int8 for c in ('key', 'mode', 'target', 'time_signature'))
+    assert isinstance(df['artist'].dtype, pd.CategoricalDtype)
+    assert (df['artist'].astype(str) == full['artist']).all()
+    np.testing.assert_array_equal(df['time_signature'], full['time_signature'])
+
+    report = loader.last_memory_report
+    assert report['n_rows'] == len(df)
+    assert report['after_bytes_per_row'] < report['before_bytes_per_row']
+    numeric = full.drop(columns=['song_title', 'artist'])
+    _, numeric_report = compact_with_report(numeric)
+    assert numeric_report['reduction'] > 2.5
+
+
+def test_values_that_do_not_fit_keep_their_dtype():
+    df = pd.DataFrame({'key': [1, 2, 300], 'mode': [1.0, np.nan, 0.0],
+                       'time_signature': [4.0, 3.5, 4.0], 'genre': ['pop'] * 3})
+    compacted = compact_frame(df)
+    assert compacted['key'].dtype == np.int64
+    assert compacted['mode'].dtype == np.float32
+    assert compacted['time_signature'].dtype == np.float32
+    assert isinstance(compacted['genre'].dtype, pd.CategoricalDtype)
+
+
+def test_engineer_compacts_its_output():
+    from create_features import SpotifyFeatureEngineer
+
+    df = SpotifyDataLoader().load('raw', apply_dtypes=False)
+    expected = SpotifyFeatureEngineer().create_all_features(df, copy=False)
+    engineer = SpotifyFeatureEngineer(compact=True)
+    result = engineer.create_all_features(df, copy=False)
+
+    assert result['energy_dance'].dtype == np.float32
+    np.testing.assert_allclose(result['chill_factor'], expected['chill_factor'], rtol=1e-6)
+    assert engineer.last_memory_report['reduction'] > 1
@@ -0,0 +1,101 @@
+"""
+Test the columnar CSV cache
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.data_processing import csv_cache
+from src.data_processing.csv_cache import ColumnarCache, read_csv_cached
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+
+
+def test_cached_read_matches_read_csv(tmp_path):
+    expected = pd.read_csv(RAW_CSV)
+    pd.testing.assert_frame_equal(read_csv_cached(RAW_CSV, cache_dir=tmp_path), expected)
+    # Second read comes from the memory-mapped cache
+    pd.testing.assert_frame_equal(read_csv_cached(RAW_CSV, cache_dir=tmp_path), expected)
+
+    projected = read_csv_cached(RAW_CSV, columns=['tempo', 'artist'], categorical=True,
+                                cache_dir=tmp_path)
+    assert list(projected.columns) == ['tempo', 'artist']
+    assert isinstance(projected['artist'].dtype, pd.CategoricalDtype)
+    assert (projected['artist'].astype(str) == expected['artist']).all()
+
+
+def test_cache_is_invalidated_by_source_changes(tmp_path):
+    csv_path = tmp_path / 'tracks.csv'
+    pd.DataFrame({'energy': [0.1, 0.2], 'artist': ['a', None]}).to_csv(csv_path, index=False)
+    cache = ColumnarCache(csv_path, cache_dir=tmp_path / 'cache')
+    first = cache.load()
+    assert first['artist'].isna().tolist() == [False, True]
+
+    # Touching without changing bytes keeps the cache
+    os.utime(csv_path, ns=(1, 1))
+    assert cache.is_valid()
+
+    pd.DataFrame({'energy': [0.5], 'artist': ['b']}).to_csv(csv_path, index=False)
+    assert not cache.is_valid()
+    pd.testing.assert_frame_equal(cache.load(), pd.read_csv(csv_path))
+
+
+def test_loaded_frames_are_writable_unless_mmap_requested(tmp_path):
+    csv_path = tmp_path / 'tracks.csv'
+    pd.DataFrame({'energy': [0.1, 0.2], 'artist': ['a', 'b']}).to_csv(csv_path, index=False)
+    df = read_csv_cached(csv_path, cache_dir=tmp_path / 'cache')
+    df.loc[0, 'energy'] = 1.0
+    assert df['energy'].tolist() == [1.0, 0.2]
+
+    mapped = read_csv_cached(csv_path, cache_dir=tmp_path / 'cache', mmap=True)
+    assert not mapped['energy'].to_numpy().flags.writeable
+
+
+def test_non_string_object_columns_are_not_cached(tmp_path):
+    # True/False with a gap parses as an object column of Python bools
+    csv_path = tmp_path / 'flags.csv'
+    csv_path.write_text('energy,explicit\n0.1,True\n0.2,\n0.3,False\n')
+    expected = pd.read_csv(csv_path)
+    assert expected['explicit'].dtype == object
+
+    pd.testing.assert_frame_equal(read_csv_cached(csv_path, cache_dir=tmp_path / 'cache'),
+                                  expected)
+    assert not ColumnarCache(csv_path, cache_dir=tmp_path / 'cache').is_valid()
+
+
+def test_uncacheable_sources_fall_back_to_a_single_parse(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'flags.csv'
+    csv_path.write_text('energy,explicit\n0.1,True\n0.2,\n0.3,False\n')
+    tracks_path = tmp_path / 'tracks.csv'
+    pd.DataFrame({'energy': [0.1, 0.2], 'artist': ['a', 'b']}).to_csv(tracks_path, index=False)
+    expected = {path: pd.read_csv(path) for path in (csv_path, tracks_path)}
+
+    parses = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(csv_cache.pd, 'read_csv',
+                        lambda path, **kwargs: parses.append(path) or read_csv(path, **kwargs))
+
+    # Unsupported columns: only the first call tries the cache
+    for _ in range(3):
+        pd.testing.assert_frame_equal(read_csv_cached(csv_path, cache_dir=tmp_path / 'cache'),
+                                      expected[csv_path])
+    assert len(parses) == 4
+
+    # A cache directory that cannot be created (e.g. read-only data) is not an error
+    parses.clear()
+    blocked = tmp_path / 'not_a_dir'
+    blocked.write_text('')
+    for _ in range(2):
+        pd.testing.assert_frame_equal(read_csv_cached(tracks_path, cache_dir=blocked / 'cache'),
+                                      expected[tracks_path])
+    assert len(parses) == 3
+
+    # Editing the file gives the cache another chance
+    csv_path.write_text('energy,explicit\n0.1,yes\n0.2,no\n')
+    read_csv_cached(csv_path, cache_dir=tmp_path / 'cache')
+    assert ColumnarCache(csv_path, cache_dir=tmp_path / 'cache').is_valid()
@@ -1,5 +1,6 @@
 import sys
 import os
+import subprocess
 import pandas as pd
 
 # Dynamically add the root directory to sys.path
@@ -9,11 +10,36 @@ sys.path.append(ROOT_DIR)
 from src.data_processing.data_loader import SpotifyDataLoader
 
 def test_load_data():
-    loader = SpotifyDataLoader("data/raw/Spotify_Data.csv")
+    loader = SpotifyDataLoader()
     df = loader.load_data()
     assert isinstance(df, pd.DataFrame)
     assert not df.empty
     print("✅ Data loaded successfully!")
 
+def test_named_datasets_projection_and_dtypes(tmp_path):
+    loader = SpotifyDataLoader()
+    assert loader.path('raw') == loader.data_dir / 'raw' / 'Spotify_Data.csv'
+    assert loader.first_existing(['clean', 'raw']) == 'raw'
+    
+    df = loader.load('raw', columns=['energy', 'artist', 'target'])
+    assert list(df.columns) == ['energy', 'artist', 'target']
+    assert df['energy'].dtype == 'float32'
+    assert isinstance(df['artist'].dtype, pd.CategoricalDtype)
+    assert loader.load('by_year', columns=['year', 'tempo'])['tempo'].dtype == 'float32'
+    assert loader.load('raw', columns=['energy'], apply_dtypes=False)['energy'].dtype == 'float64'
+    
+    # Relative paths resolve against the config file, not the working directory
+    config = tmp_path / 'data_config.yaml'
+    config.write_text(f"data_dir: {os.path.relpath(ROOT_DIR, tmp_path)}/data\n"
+                      "datasets:\n  tracks:\n    path: raw/Spotify_Data.csv\n")
+    assert len(SpotifyDataLoader(config).load(columns=['tempo'])) == len(df)
+
+def test_import_defers_pandas():
+    code = ("import sys; from src.data_processing import SpotifyDataLoader; "
+            "SpotifyDataLoader().path('raw'); print('pandas' in sys.modules)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == 'False'
+
 if __name__ == "__main__":
     test_load_data()
@@ -125,8 +125,181 @@ def test_feature_engineering():
     print(f"\n✅ FEATURE ENGINEERING TEST PASSED!")
     return df_final
 
+def _load_engineer():
+    """Import SpotifyFeatureEngineer from the scripts folder"""
+    sys.path.append(str(Path(__file__).resolve().parent.parent / 'scripts'))
+    from create_features import SpotifyFeatureEngineer
+    return SpotifyFeatureEngineer
+
+
+def test_single_pass_matches_copying_path():
+    """copy=False must produce exactly the same frame as the default path"""
+    SpotifyFeatureEngineer = _load_engineer()
+    df = create_sample_data_with_target()
+    
+    for frame in (df, df.astype({f: 'float32' for f in SpotifyFeatureEngineer().audio_features})):
+        expected_engineer = SpotifyFeatureEngineer()
+        expected = expected_engineer.create_all_features(frame)
+        engineer = SpotifyFeatureEngineer()
+        result = engineer.create_all_features(frame, copy=False)
+        
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        assert result.to_csv(index=False) == expected.to_csv(index=False)
+        assert engineer.feature_names == expected_engineer.feature_names
+
+
+def test_single_pass_memory_regression():
+    """The single-pass mode reuses the input columns and needs far less memory"""
+    import tracemalloc
+    
+    SpotifyFeatureEngineer = _load_engineer()
+    df = pd.concat([create_sample_data_with_target()] * 200, ignore_index=True)
+    
+    def measure(copy):
+        tracemalloc.start()
+        result = SpotifyFeatureEngineer().create_all_features(df, copy=copy)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak, result
+    
+    copy_peak, expected = measure(copy=True)
+    fast_peak, result = measure(copy=False)
+    print(f"📉 Peak memory: {copy_peak / 1e6:.1f} MB -> {fast_peak / 1e6:.1f} MB")
+    
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    # Peak memory, not buffer identity: whether columns are shared with the
+    # input depends on the pandas version (Copy-on-Write is default from 3.0)
+    frame_bytes = df.memory_usage(deep=True).sum()
+    assert fast_peak < copy_peak / 2
+    assert fast_peak < frame_bytes * 2
+
+
+def test_fit_transform_supports_single_track_inference(tmp_path):
+    """Fitted stats let one track be engineered exactly like the full batch"""
+    SpotifyFeatureEngineer = _load_engineer()
+    df = create_sample_data_with_target()
+    expected = SpotifyFeatureEngineer().create_all_features(df)
+    
+    engineer = SpotifyFeatureEngineer().fit(df)
+    stats_path = engineer.save_stats(tmp_path / "feature_stats.json")
+    online = SpotifyFeatureEngineer().load_stats(stats_path)
+    
+    single = online.transform(df.iloc[[7]])
+    pd.testing.assert_frame_equal(single, expected.iloc[[7]], check_exact=True)
+    
+    record = online.transform_record(df.iloc[7].to_dict())
+    for name, value in record.items():
+        assert value == expected.iloc[7][name], name
+
+
+def test_feature_plan_computes_only_model_columns():
+    """A plan for the model's features matches the full pipeline and skips the rest"""
+    SpotifyFeatureEngineer = _load_engineer()
+    from create_features import FeaturePlan
+    
+    df = create_sample_data_with_target()
+    expected = SpotifyFeatureEngineer().create_all_features(df)
+    
+    plan = FeaturePlan.from_model_features()
+    result = plan.execute(df)
+    pd.testing.assert_frame_equal(result, expected[plan.columns], check_exact=True)
+    
+    report = plan.report()
+    assert 'energy_level' in report['skipped_categorical']
+    assert 'chill_factor' in report['skipped_features']
+    assert 'liveness' in report['unused_audio_features']
+    assert 0 < report['skipped_fraction'] < 1
+
+
+def test_streaming_matches_whole_file_run(tmp_path):
+    """Chunked engineering with a stats pass writes the same CSV as one pass"""
+    SpotifyFeatureEngineer = _load_engineer()
+    from create_features import stream_features
+    
+    input_path = tmp_path / "tracks.csv"
+    create_sample_data_with_target().to_csv(input_path, index=False)
+    df = pd.read_csv(input_path)
+    expected = SpotifyFeatureEngineer().fit(df).transform(df).to_csv(index=False)
+    
+    engineer = SpotifyFeatureEngineer().fit_csv(input_path, chunksize=64)
+    assert engineer.normalization_stats['n_rows'] == len(df)
+    output_path = tmp_path / "engineered.csv"
+    rows, chunks = stream_features(engineer, input_path, output_path, chunksize=77)
+    
+    assert (rows, chunks) == (len(df), -(-len(df) // 77))
+    assert output_path.read_text() == expected
+
+
+def test_parallel_matches_serial_pipeline():
+    """Shared-memory worker partitions reassemble into the serial result"""
+    SpotifyFeatureEngineer = _load_engineer()
+    from create_features import parallel_create_features
+    
+    df = create_sample_data_with_target()
+    expected = SpotifyFeatureEngineer().create_all_features(df)
+    result = parallel_create_features(SpotifyFeatureEngineer(), df, workers=3)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_engineer_is_quiet_and_profiles_each_stage(capsys):
+    """Library use prints nothing; a profiler sees every create_* step"""
+    SpotifyFeatureEngineer = _load_engineer()
+    from src.analytics.profiling import PipelineProfiler
+    
+    df = create_sample_data_with_target()
+    capsys.readouterr()
+    profiler = PipelineProfiler()
+    SpotifyFeatureEngineer(profiler=profiler).create_all_features(df)
+    assert capsys.readouterr().out == ""
+    
+    stages = {s['stage']: s for s in profiler.report()['stages']}
+    for name in ('interaction_features', 'composite_scores',
+                 'categorical_features', 'ratio_features'):
+        assert stages[name]['rows'] == len(df)
+        assert stages[name]['depth'] == 1
+        assert stages[name]['allocated_bytes'] > 0
+    assert stages['all_features']['allocated_bytes'] >= max(
+        s['allocated_bytes'] for s in profiler.stages if s['depth'] == 1
+    )
+
+
+def test_fitted_stats_never_overwrite_the_deployed_file(tmp_path, monkeypatch):
+    """Stats fitted on an arbitrary input only replace the default file on request"""
+    SpotifyFeatureEngineer = _load_engineer()
+    import create_features
+    
+    deployed = tmp_path / "feature_stats.json"
+    deployed.write_text('{"deployed": true}')
+    monkeypatch.setattr(create_features, 'DEFAULT_STATS_PATH', deployed)
+    engineer = SpotifyFeatureEngineer().fit(create_sample_data_with_target())
+    
+    assert create_features.save_fitted_stats(engineer) is None
+    assert deployed.read_text() == '{"deployed": true}'
+    
+    explicit = create_features.save_fitted_stats(engineer, tmp_path / "delta_stats.json")
+    assert SpotifyFeatureEngineer().load_stats(explicit).normalization_stats == \
+        engineer.normalization_stats
+    
+    deployed.unlink()
+    assert create_features.save_fitted_stats(engineer) == deployed
+
+def test_feature_plan_records_include_binned_columns():
+    """execute_record labels binned columns exactly like the frame path"""
+    SpotifyFeatureEngineer = _load_engineer()
+    from create_features import FeaturePlan
+    
+    df = create_sample_data_with_target()
+    expected = SpotifyFeatureEngineer().create_all_features(df)
+    engineer = SpotifyFeatureEngineer().fit(df)
+    for _, _, _, name in SpotifyFeatureEngineer.CATEGORY_BINS:
+        plan = FeaturePlan([name, 'tempo'], engineer=engineer)
+        for i in (0, 7, 42):
+            label, tempo = plan.execute_record(df.iloc[i].to_dict())
+            assert label == expected.iloc[i][name], (name, i)
+            assert tempo == df.iloc[i]['tempo']
+
 if __name__ == "__main__":
     df_engineered = test_feature_engineering()
     
     if df_engineered is not None:
-        print(f"\n🚀 SUCCESS! Ready for machine learning with {df_engineered.shape[1]} features!")
\ No newline at end of file
+        print(f"\n🚀 SUCCESS! Ready for machine learning with {df_engineered.shape[1]} features!")
@@ -0,0 +1,250 @@
+"""
+Test incremental retraining: feature store, drift checks and model swaps
+"""
+
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+from src.models.incremental import FeatureStore, check_drift, grow_forest, swap_model_file
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+FEATURES = ['danceability', 'energy', 'speechiness', 'valence']
+
+
+def _shuffled_tracks():
+    # The raw file is sorted by target, so batches must be drawn at random
+    return pd.read_csv(RAW_CSV).sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+
+def _raw_matrix():
+    df = _shuffled_tracks()
+    return df[FEATURES].to_numpy(dtype=np.float64), df['target'].to_numpy()
+
+
+def test_store_drift_and_warm_start(tmp_path):
+    X, y = _raw_matrix()
+    store = FeatureStore.create(tmp_path / 'store', FEATURES, X[:1500], y[:1500])
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X[:1500], y[:1500])
+    store.set_reference(X[:1500], accuracy=0.6)
+
+    # Rows from the same distribution don't drift; shifted ones do
+    same = check_drift(store, model, X[1500:], y[1500:])
+    assert not same['drift'] and same['drifted_features'] == []
+    shifted = X[1500:].copy()
+    shifted[:, 1] = 1.0 - shifted[:, 1] * 0.3
+    assert 'energy' in check_drift(store, model, shifted, y[1500:])['drifted_features']
+
+    store.append(X[1500:], y[1500:])
+    reopened = FeatureStore(tmp_path / 'store')
+    assert reopened.n_rows == len(y)
+    X_recent, y_recent = reopened.load(last_rows=600)
+    np.testing.assert_array_equal(X_recent, X[-600:])
+    np.testing.assert_array_equal(y_recent, y[-600:])
+
+    old_trees = list(model.estimators_)
+    grow_forest(model, X_recent, y_recent, n_new_trees=5, max_trees=12)
+    assert len(model.estimators_) == 12 and model.n_estimators == 12
+    assert model.estimators_[:7] == old_trees[3:]
+    assert model.predict_proba(X[:5]).shape == (5, 2)
+
+
+def _swap_while_reading(swap, read, versions, n_swaps=40):
+    """Swap between ``versions`` in a thread while reading; returns every read"""
+    import threading
+
+    done = threading.Event()
+    errors, reads = [], []
+
+    def writer():
+        try:
+            for i in range(n_swaps):
+                swap(versions[i % len(versions)])
+        except Exception as exc:  # surfaced by the assertion below
+            errors.append(exc)
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while not done.is_set():
+            reads.append(read())
+    finally:
+        thread.join()
+    assert not errors
+    return reads
+
+
+def test_swap_model_file_is_atomic_for_concurrent_readers(tmp_path):
+    X, y = _raw_matrix()
+    models = [RandomForestClassifier(n_estimators=n, random_state=0).fit(X[:500], y[:500])
+              for n in (3, 8)]
+    path = tmp_path / 'model.pkl'
+    swap_model_file(models[0], path)
+
+    reads = _swap_while_reading(lambda model: swap_model_file(model, path),
+                                lambda: len(joblib.load(path).estimators_), models)
+    assert reads and set(reads) <= {3, 8}
+    assert len(joblib.load(path).estimators_) == 8
+    assert not list(tmp_path.glob('.model.pkl.tmp-*'))
+
+
+def test_bundle_reexport_is_atomic_for_concurrent_readers(tmp_path):
+    from src.models.model_bundle import ModelBundle, export_bundle
+
+    X, y = _raw_matrix()
+    models = [RandomForestClassifier(n_estimators=n, random_state=0).fit(X[:500], y[:500])
+              for n in (3, 8)]
+    expected = {n: model.predict_proba(X[:20]) for n, model in zip((3, 8), models)}
+    path = tmp_path / 'hit_model'
+    export_bundle(models[0], path, FEATURES)
+
+    def read():
+        # Manifest and arrays must always come from the same export
+        bundle = ModelBundle.load(path, verify=True)
+        n_trees = bundle.manifest['n_trees']
+        np.testing.assert_allclose(bundle.predict_proba(X[:20]), expected[n_trees])
+        return n_trees
+
+    reads = _swap_while_reading(lambda model: export_bundle(model, path, FEATURES), read,
+                                models, n_swaps=20)
+    assert reads and set(reads) <= {3, 8}
+    assert ModelBundle.load(path).manifest['n_trees'] == 8
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['hit_model']
+
+
+def test_retrain_script_swaps_model(tmp_path):
+    from retrain_incremental import main
+
+    df = _shuffled_tracks()
+    history, new = tmp_path / 'history.csv', tmp_path / 'new.csv'
+    df.iloc[:1500].to_csv(history, index=False)
+    df.iloc[1500:].to_csv(new, index=False)
+
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'model_features.txt'
+    features_path.write_text('\n'.join(FEATURES) + '\n')
+    model = RandomForestClassifier(n_estimators=10, random_state=0)
+    X, y = df[FEATURES].to_numpy(), df['target'].to_numpy()
+    joblib.dump(model.fit(X[:1500], y[:1500]), model_path)
+    (tmp_path / 'model_info.json').write_text(json.dumps({"accuracy": 0.6}))
+
+    args = ['--new', str(new), '--model', str(model_path), '--features', str(features_path),
+            '--store', str(tmp_path / 'store'), '--history', str(history), '--new-trees', '4']
+    entry = main(args)
+    assert entry['mode'] == 'warm_start' and entry['trees'] == 14
+    assert len(joblib.load(model_path).estimators_) == 14
+    assert FeatureStore(tmp_path / 'store').n_rows == len(df)
+
+    entry = main(args + ['--full'])
+    assert entry['mode'] == 'refit' and entry['rows_fit'] == 2 * len(df) - 1500
+    info = json.loads((tmp_path / 'model_info.json').read_text())
+    assert [e['mode'] for e in info['retrain_history']] == ['warm_start', 'refit']
+    assert not list(tmp_path.glob('.model.pkl.tmp-*'))
+
+
+def test_retrain_reexports_the_served_bundle(tmp_path):
+    import threading
+    from types import SimpleNamespace
+
+    from retrain_incremental import main
+    from serve_model import watch_model
+    from src.models.model_bundle import ModelBundle, export_bundle
+    from src.models.model_server import HitPredictor, ScoringService
+
+    df = _shuffled_tracks()
+    history, new = tmp_path / 'history.csv', tmp_path / 'new.csv'
+    df.iloc[:1500].to_csv(history, index=False)
+    df.iloc[1500:].to_csv(new, index=False)
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'model_features.txt'
+    bundle_path = tmp_path / 'hit_model'
+    features_path.write_text('\n'.join(FEATURES) + '\n')
+    X, y = df[FEATURES].to_numpy(), df['target'].to_numpy()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X[:1500], y[:1500])
+    joblib.dump(model, model_path)
+    stats = {'tempo': {'min': 50.0, 'max': 200.0}}
+    export_bundle(model, bundle_path, FEATURES, stats)
+
+    # Serve the bundle, as serve_model does by default, and watch it for swaps
+    served = HitPredictor.load(bundle_path, features_path)
+    service = ScoringService(served)
+    stop = threading.Event()
+    args = SimpleNamespace(model=str(bundle_path), features=str(features_path), catalog='')
+    watcher = threading.Thread(target=watch_model, args=(service, args, 0.05, stop))
+    watcher.start()
+    try:
+        main(['--new', str(new), '--model', str(model_path), '--features', str(features_path),
+              '--store', str(tmp_path / 'store'), '--history', str(history),
+              '--new-trees', '4'])
+        bundle = ModelBundle.load(bundle_path, verify=True)
+        assert bundle.manifest['n_trees'] == 14 and bundle.normalization_stats == stats
+        assert bundle.info['retrain_history'][-1]['mode'] == 'warm_start'
+
+        for _ in range(200):
+            if service.predictor is not served:
+                break
+            stop.wait(0.05)
+        assert service.predictor is not served
+        retrained = joblib.load(model_path)
+        np.testing.assert_allclose(service.predictor.predict_proba(X[:50]),
+                                   retrained.predict_proba(X[:50])[:, 1])
+    finally:
+        stop.set()
+        watcher.join()
+        service.close()
+    assert not list(tmp_path.glob('hit_model.*'))
+
+
+def test_retrain_handles_the_shipped_legacy_pickle(tmp_path, monkeypatch):
+    import shutil
+
+    import pytest
+    import retrain_incremental
+    from src.models.model_server import HitPredictor
+
+    models_dir = os.path.join(ROOT_DIR, 'models')
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'model_features.txt'
+    shutil.copy(os.path.join(models_dir, 'best_spotify_model_random_forest.pkl'), model_path)
+    shutil.copy(os.path.join(models_dir, 'model_features.txt'), features_path)
+    shutil.copy(os.path.join(models_dir, 'model_info.json'), tmp_path / 'model_info.json')
+    accuracy = json.loads((tmp_path / 'model_info.json').read_text())['accuracy']
+
+    df = pd.read_csv(os.path.join(ROOT_DIR, 'data', 'processed',
+                                  'spotify_features_engineered.csv'))
+    df = df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    history, new = tmp_path / 'history.csv', tmp_path / 'new.csv'
+    df.iloc[:-299].to_csv(history, index=False)
+    df.iloc[-299:].to_csv(new, index=False)
+    args = ['--new', str(new), '--model', str(model_path), '--features', str(features_path),
+            '--store', str(tmp_path / 'store'), '--history', str(history), '--new-trees', '4']
+
+    # A failed swap leaves the batch out of the store, so the run can be repeated
+    def failing_swap(model, path):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(retrain_incremental, 'swap_model_file', failing_swap)
+    with pytest.raises(OSError, match='disk full'):
+        retrain_incremental.main(args + ['--full'])
+    assert FeatureStore(tmp_path / 'store').n_rows == len(df) - 299
+    monkeypatch.undo()
+
+    grown = retrain_incremental.main(args)
+    refit = retrain_incremental.main(args + ['--full'])
+    assert grown['mode'] == 'warm_start' and refit['mode'] == 'refit'
+    assert FeatureStore(tmp_path / 'store').n_rows == len(df) + 299
+
+    info = json.loads((tmp_path / 'model_info.json').read_text())
+    assert info['accuracy'] == accuracy
+    assert info['oob_accuracy'] == refit['oob_accuracy'] and 0 < refit['oob_accuracy'] < 1
+    predictor = HitPredictor.load(model_path, features_path)
+    p = predictor.predict_proba(df[predictor.feature_names].to_numpy())
+    assert ((p >= 0) & (p <= 1)).all() and predictor.sklearn_agrees
@@ -0,0 +1,88 @@
+"""
+Test the model bundle: round trip, checksums, mmap loading and schema checks
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.model_bundle import ModelBundle, export_bundle, is_bundle
+from src.models.model_server import HitPredictor
+from src.models.prediction_cache import file_digest
+
+FEATURES = ['energy', 'danceability', 'valence']
+STATS = {'tempo': {'min': 50.0, 'max': 200.0}}
+
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((400, len(FEATURES))), columns=FEATURES)
+    y = (X['energy'] + X['danceability'] > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(X, y)
+    path = export_bundle(model, tmp_path / 'hit_model', FEATURES, STATS, {'accuracy': 0.9})
+    return path, model, X
+
+
+def test_round_trip_matches_sklearn(bundle_path):
+    path, model, X = bundle_path
+    bundle = ModelBundle.load(path, verify=True)
+    assert is_bundle(path)
+    assert bundle.feature_names == FEATURES and bundle.normalization_stats == STATS
+    assert bundle.info == {'accuracy': 0.9} and bundle.manifest['n_trees'] == 15
+    np.testing.assert_allclose(bundle.predict_proba(X), model.predict_proba(X))
+
+    # Arrays are shared read-only maps, not private copies
+    assert isinstance(bundle.forest.nodes, np.memmap)
+    assert not bundle.forest.nodes.flags.writeable
+
+
+def test_version_tracks_contents_and_checksums_catch_corruption(bundle_path, tmp_path):
+    path, model, _ = bundle_path
+    version = ModelBundle.load(path).model_version
+    digest = file_digest(path)
+    other = export_bundle(model, tmp_path / 'other', FEATURES, {'tempo': {'min': 0, 'max': 1}})
+    assert ModelBundle.load(other).model_version != version
+
+    export_bundle(model, path, FEATURES, STATS)
+    assert ModelBundle.load(path).model_version == version
+    assert file_digest(path) != digest  # the manifest records a new creation time
+
+    values = np.load(path / 'value.npy')
+    values[0] = 1 - values[0]
+    np.save(path / 'value.npy', values)
+    ModelBundle.load(path)
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        ModelBundle.load(path, verify=True)
+
+
+def test_scoring_refuses_mismatched_schemas(bundle_path, tmp_path):
+    path, model, X = bundle_path
+    bundle = ModelBundle.load(path)
+
+    # Frames are matched by column name, so a reordered frame is fine
+    reordered = X[FEATURES[::-1]]
+    np.testing.assert_allclose(bundle.predict_proba(reordered), model.predict_proba(X))
+    with pytest.raises(ValueError, match='missing'):
+        bundle.predict_proba(X.drop(columns='valence'))
+    with pytest.raises(ValueError, match='expected 3 features, got 4'):
+        bundle.predict_proba(np.zeros((2, 4)))
+
+    features_path = tmp_path / 'features.txt'
+    features_path.write_text("\n".join(FEATURES) + "\n")
+    predictor = HitPredictor.load(path, features_path)
+    np.testing.assert_allclose(predictor.predict_proba(X.to_numpy()),
+                               model.predict_proba(X)[:, 1])
+
+    features_path.write_text("\n".join(FEATURES[::-1]) + "\n")
+    with pytest.raises(ValueError, match='wrong order'):
+        HitPredictor.load(path, features_path)
+    with pytest.raises(ValueError, match='Model was fitted on'):
+        export_bundle(model, tmp_path / 'bad', FEATURES[::-1])
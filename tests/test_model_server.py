@@ -0,0 +1,142 @@
+"""
+Test the micro-batching model server
+Fits a small forest, serves it on a random port and scores concurrently
+"""
+
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.model_server import (
+    DEFAULT_FEATURES_PATH, DEFAULT_MODEL_PATH, HitPredictor, ScoringService, make_server
+)
+
+FEATURES = ['energy', 'danceability', 'valence']
+
+
+def _fit_predictor(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((300, len(FEATURES))), columns=FEATURES)
+    y = (X['energy'] + X['danceability'] > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=20, max_depth=4, random_state=0).fit(X, y)
+
+    model_path = tmp_path / "model.pkl"
+    features_path = tmp_path / "features.txt"
+    joblib.dump(model, model_path)
+    features_path.write_text("\n".join(FEATURES) + "\n")
+    return HitPredictor.load(model_path, features_path), model, X
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), method='POST')
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_server_batches_concurrent_requests(tmp_path):
+    predictor, model, X = _fit_predictor(tmp_path)
+    service = ScoringService(predictor, max_wait_ms=20)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        tracks = X.head(40).to_dict('records')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            singles = list(pool.map(lambda t: _post(f"{url}/predict", {"track": t}), tracks))
+        batch = _post(f"{url}/predict", {"tracks": tracks})
+
+        expected = model.predict_proba(X.head(40))[:, 1]
+        np.testing.assert_allclose([r['hit_probability'] for r in singles], expected)
+        np.testing.assert_allclose(batch['hit_probabilities'], expected)
+
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            metrics = json.loads(response.read())
+        assert metrics['requests'] == 41
+        assert metrics['model_calls'] < 41
+        assert metrics['request_latency']['p99_ms'] >= metrics['request_latency']['p50_ms'] > 0
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_missing_feature_is_a_client_error(tmp_path):
+    predictor, _, _ = _fit_predictor(tmp_path)
+    service = ScoringService(predictor)
+    try:
+        service.score({"track": {"energy": 0.5}})
+        assert False, "expected ValueError"
+    except ValueError as exc:
+        assert "danceability" in str(exc)
+    finally:
+        service.close()
+
+
+def test_only_disabled_recommendations_are_not_found(tmp_path):
+    predictor, _, X = _fit_predictor(tmp_path)
+    service = ScoringService(predictor)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    def status(path, payload):
+        try:
+            _post(f"{url}{path}", payload)
+            return 200
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    try:
+        assert status("/recommend", {"track_id": 0}) == 404
+        # A stray KeyError inside the scoring code is a server bug, not "not found"
+        service.score = lambda payload: {}["boom"]
+        assert status("/predict", {"track": X.iloc[0].to_dict()}) == 500
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_shipped_model_scores_are_probabilities():
+    # The shipped pickle predates current sklearn and stores leaf counts
+    predictor = HitPredictor.load(DEFAULT_MODEL_PATH, DEFAULT_FEATURES_PATH)
+    X = pd.read_csv(os.path.join(ROOT_DIR, 'data', 'processed',
+                                 'spotify_features_engineered.csv'))[predictor.feature_names]
+    for rows in (X[:50], X):  # CompactForest and large-batch paths
+        p = predictor.predict_proba(rows.to_numpy())
+        assert len(p) == len(rows) and ((p >= 0) & (p <= 1)).all()
+
+    service = ScoringService(predictor)
+    try:
+        result = service.score({'track': X.iloc[0].to_dict()})['hit_probability']
+        assert 0 <= result <= 1
+    finally:
+        service.close()
+
+
+def test_dashboard_slider_scores_are_probabilities():
+    # Mirrors app.py: the median engineered track with slider overrides
+    sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+    from create_features import DEFAULT_STATS_PATH, FeaturePlan, SpotifyFeatureEngineer
+    from src.data_processing.data_loader import SpotifyDataLoader
+
+    predictor = HitPredictor.load(DEFAULT_MODEL_PATH, DEFAULT_FEATURES_PATH)
+    engineer = SpotifyFeatureEngineer().load_stats(DEFAULT_STATS_PATH)
+    plan = FeaturePlan(predictor.feature_names, engineer=engineer)
+    df = pd.read_csv(SpotifyDataLoader().path('engineered'))
+    track = df[list(engineer.audio_features)].median().to_dict()
+    for level in (0.0, 0.5, 1.0):
+        track.update(danceability=level, energy=level, valence=level)
+        score = float(predictor.predict_proba([plan.execute_record(track)])[0])
+        assert 0 <= score <= 1
@@ -0,0 +1,72 @@
+"""
+Test the prediction cache: LRU/TTL bounds, model invalidation and service use
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.model_server import HitPredictor, ScoringService
+from src.models.prediction_cache import PredictionCache
+
+FEATURES = ['energy', 'danceability', 'valence']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl_expiry():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=clock)
+    for i in range(3):
+        cache.put(cache.track_key(i), i / 10)
+    assert cache.get(cache.track_key(0)) is None
+    assert cache.get(cache.track_key(2)) == 0.2
+
+    clock.now = 11
+    assert cache.get(cache.track_key(2)) is None
+    stats = cache.stats()
+    assert (stats['evictions'], stats['expirations'], stats['hits']) == (1, 1, 1)
+    assert stats['entries'] == 1 and stats['memory_bytes'] > 0
+
+    # Vectors equal after rounding share one entry
+    assert cache.feature_key([0.50001, 1.0]) == cache.feature_key([0.5, 1.0])
+    assert cache.feature_key([0.5001, 1.0]) != cache.feature_key([0.5, 1.0])
+
+
+def test_service_skips_the_model_on_hits_and_invalidates_on_new_model(tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((300, len(FEATURES))), columns=FEATURES)
+    y = (X['energy'] + X['danceability'] > 1).astype(int)
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'features.txt'
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), model_path)
+    features_path.write_text("\n".join(FEATURES) + "\n")
+
+    cache = PredictionCache(model_path=model_path, check_interval=0)
+    service = ScoringService(HitPredictor.load(model_path, features_path), cache=cache)
+    try:
+        tracks = [dict(zip(FEATURES, row)) for row in X.to_numpy()[:20]]
+        first = service.score({'tracks': tracks})['hit_probabilities']
+        again = service.score({'tracks': tracks + [{**tracks[0], 'track_id': 7}]})
+        assert again['hit_probabilities'][:20] == first
+        assert service.batcher.rows == 21
+        assert service.metrics()['prediction_cache']['hits'] == 20
+
+        # Replacing the model file clears every cached prediction
+        joblib.dump(RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y), model_path)
+        service.score({'tracks': tracks})
+        assert cache.invalidations == 1 and service.batcher.rows == 41
+    finally:
+        service.close()
@@ -0,0 +1,63 @@
+"""
+Test per-stage pipeline profiling
+"""
+
+import io
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.analytics.profiling import PipelineProfiler, StageMetricsHandler
+
+
+def test_nested_stages_report_allocations_and_json(tmp_path):
+    profiler = PipelineProfiler()
+    with profiler.stage('outer', rows=1000):
+        with profiler.stage('inner', rows=1000):
+            buffer = np.ones(1_000_000)
+        del buffer
+        with profiler.stage('small'):
+            np.ones(10)
+
+    outer, inner, small_stage = profiler.stages
+    assert inner['allocated_bytes'] >= buffer_bytes(1_000_000)
+    assert small_stage['allocated_bytes'] < buffer_bytes(1_000_000)
+    # The parent's peak survives the child's reset
+    assert outer['allocated_bytes'] >= inner['allocated_bytes']
+    assert outer['depth'] == 0 and inner['depth'] == 1
+    assert outer['wall_s'] >= inner['wall_s'] and outer['cpu_s'] >= 0
+
+    report = json.loads(profiler.to_json(tmp_path / 'profile.json'))
+    assert report == json.loads((tmp_path / 'profile.json').read_text())
+    assert report['totals']['wall_s'] == outer['wall_s']
+
+
+def test_handler_streams_one_json_line_per_stage():
+    logger = logging.getLogger('test.profiling')
+    logger.setLevel(logging.INFO)
+    stream = io.StringIO()
+    handler = StageMetricsHandler(stream)
+    logger.addHandler(handler)
+    try:
+        profiler = PipelineProfiler(trace_memory=False, logger=logger)
+        with profiler.stage('load', rows=3):
+            pass
+        logger.info('not a stage record')
+    finally:
+        logger.removeHandler(handler)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['stage'] == 'load' and record['rows'] == 3
+    assert record['allocated_bytes'] is None
+
+
+def buffer_bytes(n):
+    return n * np.dtype(np.float64).itemsize
@@ -0,0 +1,117 @@
+"""
+Test hit-aware re-ranking and the /recommend route
+"""
+
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+from create_features import FeaturePlan, SpotifyFeatureEngineer
+from src.models.model_server import HitPredictor, ScoringService, make_server
+from src.models.recommender import HitAwareRecommender, HitScoreCache
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+FEATURES = ['energy_dance', 'happiness_score', 'dancefloor_potential', 'speechiness']
+
+
+def _build(calls):
+    df = pd.read_csv(RAW_CSV)
+    plan = FeaturePlan(FEATURES, engineer=SpotifyFeatureEngineer().fit(df))
+    X = plan.execute(df)
+    model = RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0).fit(X, df['target'])
+    predictor = HitPredictor(model, FEATURES)
+
+    def predict_fn(rows):
+        calls.append(len(rows))
+        return predictor.predict_proba(rows)
+
+    recommender = HitAwareRecommender.from_catalog(df, plan, predict_fn, n_candidates=50)
+    return recommender, predictor, X
+
+
+def test_reranks_neighbours_with_one_model_call_per_query():
+    calls = []
+    recommender, predictor, X = _build(calls)
+
+    results = recommender.recommend(track_id=0, k=10)
+    assert len(results) == 10 and len(calls) == 1 and calls[0] == 50
+    assert all(r['track_id'] != 0 for r in results)
+    scores = [r['score'] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+    ids = [r['track_id'] for r in results]
+    expected = predictor.predict_proba(X.to_numpy()[ids])
+    np.testing.assert_allclose([r['hit_probability'] for r in results], expected, rtol=1e-6)
+    assert results[0]['song_title'] and results[0]['artist']
+
+    # Repeat queries are served from the hit-score cache
+    assert recommender.recommend(track_id=0, k=10) == results
+    assert len(calls) == 1
+    # Pure hit ranking picks the likeliest hits among the candidates
+    recommender.hit_weight = 1.0
+    top = recommender.recommend(track_id=0, k=5)
+    assert [r['hit_probability'] for r in top] == sorted(
+        (r['hit_probability'] for r in top), reverse=True)
+
+
+def test_recommend_route(tmp_path):
+    recommender, predictor, _ = _build([])
+    service = ScoringService(predictor, recommender=recommender)
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/recommend"
+
+    def post(payload):
+        request = urllib.request.Request(url, data=json.dumps(payload).encode(), method='POST')
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    try:
+        by_id = post({"track_id": 3, "k": 4})['recommendations']
+        assert len(by_id) == 4
+        track = pd.read_csv(RAW_CSV).iloc[3].to_dict()
+        by_features = post({"track": track, "k": 5})['recommendations']
+        assert len(by_features) == 5
+        # A raw-feature query does not exclude the matching catalog track
+        assert recommender.recommend(features=[[track[f] for f in recommender.index.feature_names]],
+                                     k=5) == by_features
+
+        try:
+            post({"track_id": 10 ** 6})
+            assert False, "expected HTTP 400"
+        except urllib.error.HTTPError as exc:
+            assert exc.code == 400
+        assert service.metrics()['recommend_requests'] == 2
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_adopted_read_only_scores_with_gaps_are_filled(tmp_path):
+    column = np.array([0.1, np.nan, 0.3, np.nan], dtype=np.float32)
+    np.save(tmp_path / 'probabilities.npy', column)
+    mapped = np.load(tmp_path / 'probabilities.npy', mmap_mode='r')
+
+    cache = HitScoreCache(4, lambda ids: ids / 10)
+    cache.adopt(mapped)
+    np.testing.assert_allclose(cache.get([0, 1, 3]), [0.1, 0.1, 0.3], rtol=1e-6)
+    assert cache.misses == 2 and np.isnan(mapped[1])
+
+    # Complete columns stay shared with the map
+    complete = np.load(tmp_path / 'probabilities.npy', mmap_mode='r')[[0, 2]]
+    np.save(tmp_path / 'complete.npy', complete)
+    mapped = np.load(tmp_path / 'complete.npy', mmap_mode='r')
+    cache = HitScoreCache(2, lambda ids: ids / 10)
+    cache.adopt(mapped)
+    assert cache.scores is mapped
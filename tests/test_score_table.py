@@ -0,0 +1,139 @@
+"""
+Test the precomputed score table: delta refresh, lookups and service reads
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.model_server import HitPredictor, ScoringService
+from src.models.score_table import (
+    ScoreTable, feature_hashes, open_score_table, refresh_score_table
+)
+
+FEATURES = ['energy', 'danceability', 'valence']
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.rows = 0
+
+    def __call__(self, X):
+        self.rows += len(X)
+        return self.model.predict_proba(X)[:, 1]
+
+
+def fitted_forest(n=400):
+    rng = np.random.default_rng(0)
+    X = rng.random((n, len(FEATURES)))
+    y = (X[:, 0] + X[:, 1] > 1).astype(int)
+    return X, RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+
+def test_feature_hashes_change_with_any_feature():
+    X = np.random.default_rng(1).random((50, 4))
+    hashes = feature_hashes(X)
+    assert len(np.unique(hashes)) == 50
+    changed = X.copy()
+    changed[7, 3] += 1e-9
+    assert (feature_hashes(changed) != hashes).sum() == 1
+
+
+def test_refresh_rescores_only_changed_rows(tmp_path):
+    X, model = fitted_forest()
+    predict = CountingModel(model)
+    path = tmp_path / 'score_table'
+    ids = np.arange(len(X))
+
+    summary = refresh_score_table(path, ids, X, predict, version='v1', chunk_size=64)
+    assert summary['rescored'] == len(X) and predict.rows == len(X)
+    table = ScoreTable.load(path)
+    np.testing.assert_allclose(table.lookup(ids), model.predict_proba(X)[:, 1], rtol=1e-6)
+
+    summary = refresh_score_table(path, ids, X, predict, version='v1')
+    assert (summary['rescored'], summary['reused']) == (0, len(X))
+
+    X[[3, 99], 2] += 0.5
+    summary = refresh_score_table(path, ids, X, predict, version='v1')
+    assert summary['rescored'] == 2 and summary['reason'] == 'feature hashes changed'
+    np.testing.assert_allclose(ScoreTable.load(path).lookup([3, 99]),
+                               model.predict_proba(X[[3, 99]])[:, 1], rtol=1e-6)
+
+    summary = refresh_score_table(path, ids, X, predict, version='v2')
+    assert summary['rescored'] == len(X) and summary['reason'] == 'model version changed'
+    assert open_score_table(path, 'v1') is None
+    assert open_score_table(path, 'v2').n_tracks == len(X)
+
+
+def test_sparse_ids_and_unknown_lookups(tmp_path):
+    X, model = fitted_forest(100)
+    ids = np.arange(len(X)) * 10 + 5
+    refresh_score_table(tmp_path / 'table', ids, X, CountingModel(model), version='v1')
+    table = ScoreTable.load(tmp_path / 'table')
+    scores = table.lookup([15, 4, 995, 10_000, -1])
+    assert np.isnan(scores[[1, 3, 4]]).all()
+    np.testing.assert_allclose(scores[[0, 2]], model.predict_proba(X[[1, 99]])[:, 1],
+                               rtol=1e-6)
+
+    # Rows that moved keep their score: matching is by id, not position
+    predict = CountingModel(model)
+    order = np.random.default_rng(0).permutation(len(X))
+    summary = refresh_score_table(tmp_path / 'table', ids[order], X[order], predict, 'v1')
+    assert summary['reused'] == len(X) and predict.rows == 0
+
+
+def test_service_answers_catalog_ids_from_the_table(tmp_path):
+    X, model = fitted_forest()
+    frame = pd.DataFrame(X, columns=FEATURES)
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'features.txt'
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0)
+                .fit(frame, (X[:, 0] + X[:, 1] > 1).astype(int)), model_path)
+    features_path.write_text("\n".join(FEATURES) + "\n")
+    predictor = HitPredictor.load(model_path, features_path)
+    refresh_score_table(tmp_path / 'table', np.arange(len(X)), X, predictor.predict_proba, 'v1')
+
+    service = ScoringService(predictor, score_table=ScoreTable.load(tmp_path / 'table'))
+    try:
+        adhoc = dict(zip(FEATURES, X[5]))
+        result = service.score({'tracks': [{'track_id': 3}, adhoc]})['hit_probabilities']
+        assert service.batcher.rows == 1
+        np.testing.assert_allclose(result, predictor.predict_proba(X[[3, 5]]), rtol=1e-6)
+        assert service.metrics()['score_table_tracks'] == len(X)
+    finally:
+        service.close()
+
+
+def test_only_integer_ids_are_looked_up(tmp_path):
+    X, model = fitted_forest()
+    frame = pd.DataFrame(X, columns=FEATURES)
+    model_path, features_path = tmp_path / 'model.pkl', tmp_path / 'features.txt'
+    joblib.dump(RandomForestClassifier(n_estimators=10, random_state=0)
+                .fit(frame, (X[:, 0] + X[:, 1] > 1).astype(int)), model_path)
+    features_path.write_text("\n".join(FEATURES) + "\n")
+    predictor = HitPredictor.load(model_path, features_path)
+    refresh_score_table(tmp_path / 'table', np.arange(len(X)), X, predictor.predict_proba, 'v1')
+    table = ScoreTable.load(tmp_path / 'table')
+    assert table.positions(['3', 2**70, 3.7, True, np.int64(3), -2**70]).tolist() == \
+        [-1, -1, -1, -1, 3, -1]
+
+    # Ids that are not catalog integers fall back to the track's features
+    service = ScoringService(predictor, score_table=table)
+    try:
+        bogus = [dict(zip(FEATURES, X[5]), track_id=track_id)
+                 for track_id in ('abc', 2**70, 3.7)]
+        result = service.score({'tracks': bogus + [{'track_id': 3}]})['hit_probabilities']
+        assert service.batcher.rows == 3
+        np.testing.assert_allclose(result, predictor.predict_proba(X[[5, 5, 5, 3]]), rtol=1e-6)
+        with pytest.raises(ValueError, match='missing feature'):
+            service.score({'track': {'track_id': 3.7}})
+    finally:
+        service.close()
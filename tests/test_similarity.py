@@ -0,0 +1,66 @@
+"""
+Test the audio-feature similarity index
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.similarity import AUDIO_FEATURES, SimilarityIndex
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+
+
+def naive_neighbours(index, queries, k):
+    diff = index.transform(queries)[:, None, :] - np.asarray(index.vectors)[None, :, :]
+    dists = np.sqrt((diff.astype(np.float64) ** 2).sum(axis=2))
+    return np.asarray(index.ids)[np.argsort(dists, axis=1, kind='stable')[:, :k]]
+
+
+def test_exact_and_ivf_search_match_brute_force():
+    df = pd.read_csv(RAW_CSV)
+    index = SimilarityIndex.from_frame(df, n_lists=16)
+    queries = df[AUDIO_FEATURES].to_numpy()[:50] * 1.01
+
+    exact_ids, exact_dists = index.search(queries, k=10)
+    assert exact_ids.shape == (50, 10)
+    assert (np.diff(exact_dists, axis=1) >= 0).all()
+    expected = naive_neighbours(index, queries, 10)
+    assert np.mean(exact_ids == expected) > 0.99  # float32 ties aside
+
+    # Probing every list is exhaustive; a few lists already find most neighbours
+    all_ids, _ = index.search(queries, k=10, n_probe=index.n_lists)
+    np.testing.assert_array_equal(all_ids, exact_ids)
+    approx_ids, _ = index.search(queries, k=10, n_probe=4)
+    recall = np.mean([len(np.intersect1d(a, e)) / 10 for a, e in zip(approx_ids, exact_ids)])
+    assert recall > 0.8
+
+    ids, dists = index.similar_to(0, k=5)
+    assert 0 not in ids and len(ids) == 5
+
+
+def test_incremental_insert_and_persistence(tmp_path):
+    rng = np.random.default_rng(0)
+    index = SimilarityIndex.build(rng.random((2000, 9)), n_lists=8)
+    new_tracks = rng.random((3, 9))
+
+    ids = index.add(new_tracks)
+    np.testing.assert_array_equal(ids, [2000, 2001, 2002])
+    assert index.n_pending == 3
+    # Pending tracks are found even with the narrowest probe
+    found, dists = index.search(new_tracks, k=1, n_probe=1)
+    np.testing.assert_array_equal(found[:, 0], ids)
+    assert np.allclose(dists, 0, atol=1e-3)
+
+    index.save(tmp_path / 'index')
+    assert index.n_pending == 0
+    loaded = SimilarityIndex.load(tmp_path / 'index')
+    assert loaded.n_tracks == 2003 and loaded.n_lists == 8
+    for n_probe in (None, 2):
+        np.testing.assert_array_equal(loaded.search(new_tracks, k=5, n_probe=n_probe)[0],
+                                      index.search(new_tracks, k=5, n_probe=n_probe)[0])
@@ -0,0 +1,58 @@
+"""
+Test the shared statistics engine against pandas
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.analytics import statistics
+from src.analytics.statistics import DatasetStatistics, get_statistics
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+
+
+def test_statistics_match_pandas():
+    df = pd.read_csv(RAW_CSV)
+    columns = list(df.columns)
+    stats = DatasetStatistics.compute(df)
+    assert list(df.columns) == columns
+
+    numeric = df.select_dtypes(include=[np.number])
+    np.testing.assert_allclose(stats.corr, numeric.corr().to_numpy(), atol=1e-12)
+    expected = numeric.corr()['target'].drop('target').abs().sort_values(ascending=False)
+    pd.testing.assert_series_equal(stats.target_correlations(), expected, check_names=False)
+
+    for feature in ('energy', 'valence', 'tempo'):
+        j = stats.feature_index(feature)
+        np.testing.assert_allclose(stats.group_means[:, j],
+                                   df.groupby('target')[feature].mean().to_numpy())
+        rates = df.groupby(pd.qcut(df[feature], q=4), observed=True)['target'].mean()
+        np.testing.assert_allclose(stats.quartile_hit_rates[j], rates.to_numpy())
+        hits = df.loc[df['target'] == 1, feature]
+        np.testing.assert_allclose(stats.boxes[1][j]['med'], hits.median())
+        density = np.histogram(hits, stats.hist_edges[j], density=True)[0]
+        np.testing.assert_allclose(stats.hist_density[1][j], density)
+
+
+def test_statistics_cached_by_fingerprint(tmp_path, monkeypatch):
+    df = pd.read_csv(RAW_CSV)
+    first = get_statistics(df, cache_dir=tmp_path)
+    assert get_statistics(df.copy(), cache_dir=tmp_path) is first
+
+    # A fresh process picks the results up from disk
+    monkeypatch.setattr(statistics, '_MEMORY_CACHE', {})
+    monkeypatch.setattr(DatasetStatistics, 'compute', None)
+    reloaded = get_statistics(df, cache_dir=tmp_path)
+    np.testing.assert_allclose(reloaded.corr, first.corr)
+    assert reloaded.boxes == first.boxes
+
+    changed = df.copy()
+    changed.loc[0, 'energy'] += 0.01
+    monkeypatch.undo()
+    assert get_statistics(changed).fingerprint != first.fingerprint
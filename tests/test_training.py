@@ -0,0 +1,101 @@
+"""
+Test the parallel training / tuning pipeline
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+from src.models.tuning import FeatureMatrixCache, SuccessiveHalvingSearch, candidate_grid
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+
+
+def _cached_matrix(tmp_path):
+    df = pd.read_csv(RAW_CSV)
+    features = ['danceability', 'energy', 'speechiness', 'valence']
+    return FeatureMatrixCache(tmp_path / 'cache').get_or_build(
+        RAW_CSV, features, lambda: (df[features].to_numpy(), df['target'].to_numpy())
+    )
+
+
+def test_halving_narrows_candidates_and_matches_across_executors(tmp_path):
+    X_path, y_path, hit = _cached_matrix(tmp_path)
+    assert not hit and _cached_matrix(tmp_path)[2]
+
+    candidates = [{"family": "logistic_regression", "params": {"C": c}}
+                  for c in (0.001, 0.01, 0.1, 1.0)]
+    candidates += [{"family": "random_forest", "params": {"n_estimators": 10, "max_depth": d}}
+                   for d in (2, 4, 6, 8, None)]
+    train_idx = np.arange(0, 2017, 2)
+
+    from train_models import SerialExecutor
+
+    # Cost by rows alone so this small dataset still exercises the halving rounds
+    serial = SuccessiveHalvingSearch(candidates, n_splits=3, eta=3, min_samples=100,
+                                     fit_overhead_rows=0)
+    best = serial.fit(X_path, y_path, train_idx, SerialExecutor())
+    assert [r['candidates'] for r in serial.rounds] == [9, 3]
+    assert serial.rounds[-1]['rows'] == len(train_idx)
+    assert serial.rounds[0]['rows'] < len(train_idx)
+
+    parallel = SuccessiveHalvingSearch(candidates, n_splits=3, eta=3, min_samples=100,
+                                       fit_overhead_rows=0)
+    with ProcessPoolExecutor(2) as pool:
+        assert parallel.fit(X_path, y_path, train_idx, pool) == best
+    assert parallel.rounds[-1]['scores'] == serial.rounds[-1]['scores']
+
+    report = serial.candidate_report()
+    assert sum(r['fits'] for r in report) == 9 * 3 + 3 * 3
+    assert all(r['fit_s'] > 0 for r in report)
+
+
+def test_small_datasets_fall_back_to_the_plain_grid():
+    candidates = candidate_grid(['random_forest', 'logistic_regression', 'extra_trees'])
+    search = SuccessiveHalvingSearch(candidates, n_splits=3, eta=3, min_samples=100)
+    # The shipped dataset: halving would cost 582 fits against the grid's 402
+    n_train = 1613
+    halving = search.schedule(n_train, search.n_rounds(n_train))
+    assert sum(alive for _, alive in halving) * 3 == 582
+    assert search.planned_rounds(n_train) == 1
+
+    # With enough data the cheap early rounds win
+    assert search.planned_rounds(200_000) > 1
+    assert search.estimated_cost(200_000, search.planned_rounds(200_000)) < \
+        search.estimated_cost(200_000, 1) / 3
+
+
+def test_train_script_writes_model_info(tmp_path):
+    from sklearn.ensemble import RandomForestClassifier
+    from train_models import BEST_FEATURES, main
+
+    from src.models.model_bundle import export_bundle, is_bundle
+    from src.models.model_server import HitPredictor
+
+    # A bundle from an earlier forest winner must not keep shadowing the new model
+    rng = np.random.default_rng(0)
+    stale = RandomForestClassifier(n_estimators=2, random_state=0).fit(
+        rng.random((50, len(BEST_FEATURES))), rng.integers(0, 2, 50))
+    export_bundle(stale, tmp_path / 'hit_model', BEST_FEATURES)
+
+    info = main(['--input', RAW_CSV, '--families', 'logistic_regression', '--workers', '1',
+                 '--output-dir', str(tmp_path), '--cache-dir', str(tmp_path / 'cache')])
+    saved = json.loads((tmp_path / 'model_info.json').read_text())
+    assert saved['model_type'] == 'Logistic Regression' == info['model_type']
+    assert len(saved['candidates']) == 8
+    assert set(saved['timings']) == {'features_s', 'search_s', 'refit_s'}
+    assert (tmp_path / 'model_features.txt').read_text().split() == saved['features_used']
+
+    # The winner replaces the model serving loads, whatever its family
+    assert saved['model_path'] == 'best_spotify_model_random_forest.pkl'
+    assert not is_bundle(tmp_path / 'hit_model')
+    served = HitPredictor.load(tmp_path / saved['model_path'], tmp_path / 'model_features.txt')
+    assert type(served.model[-1]).__name__ == 'LogisticRegression'
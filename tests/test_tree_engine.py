@@ -0,0 +1,76 @@
+"""
+Test the compact tree-ensemble engine against sklearn
+"""
+
+import os
+import sys
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+from src.models.tree_engine import CompactForest, export_forest
+
+
+def _training_data(n_rows=600, n_features=6):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(n_rows, n_features)) * [1, 10, 0.1, 100, 1, 1]
+    y = (X[:, 0] + X[:, 1] / 10 + rng.normal(0, 0.5, n_rows) > 0).astype(int)
+    return X, y
+
+
+def test_compact_forest_matches_sklearn(tmp_path):
+    X, y = _training_data()
+    X_test = _training_data(2000)[0]
+
+    for model in (RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0),
+                  ExtraTreesClassifier(n_estimators=30, random_state=0)):
+        model.fit(X, y)
+        path = export_forest(model, tmp_path / type(model).__name__)
+        forest = CompactForest.load(path)
+
+        assert isinstance(forest.nodes, np.memmap)
+        np.testing.assert_allclose(
+            forest.predict_proba(X_test), model.predict_proba(X_test), rtol=0, atol=1e-9
+        )
+        np.testing.assert_allclose(
+            forest.predict_proba(X_test[:1]), model.predict_proba(X_test[:1]), rtol=0, atol=1e-9
+        )
+        np.testing.assert_array_equal(forest.predict(X_test), model.predict(X_test))
+
+
+def test_thresholds_are_exact_at_split_points():
+    X, y = _training_data()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    forest = CompactForest.from_sklearn(model)
+
+    # Probe every split exactly at (and just around) its threshold
+    probes = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            for value in np.nextafter(tree.threshold[node], [-np.inf, np.inf]).tolist() + [tree.threshold[node]]:
+                row = X[node % len(X)].copy()
+                row[tree.feature[node]] = value
+                probes.append(row)
+    probes = np.asarray(probes)
+    np.testing.assert_allclose(forest.predict_proba(probes), model.predict_proba(probes), atol=1e-9)
+
+
+def test_predictor_sends_large_batches_to_sklearn():
+    from src.models.model_server import HitPredictor
+
+    X, y = _training_data()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    predictor = HitPredictor(model, [f"f{i}" for i in range(X.shape[1])], compact_max_rows=500)
+    assert predictor.sklearn_agrees
+    sklearn_rows = []
+    original = predictor._sklearn_proba
+    predictor._sklearn_proba = lambda rows: sklearn_rows.append(len(rows)) or original(rows)
+
+    small, large = predictor.predict_proba(X[:100]), predictor.predict_proba(X)
+    assert sklearn_rows == [len(X)]
+    np.testing.assert_allclose(small, model.predict_proba(X[:100])[:, 1], atol=1e-9)
+    np.testing.assert_allclose(large, model.predict_proba(X)[:, 1], atol=1e-9)
\ No newline at end of file
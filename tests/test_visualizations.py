@@ -0,0 +1,53 @@
+"""
+Test headless figure rendering and skipping of unchanged figures
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'scripts'))
+
+RAW_CSV = os.path.join(ROOT_DIR, 'data', 'raw', 'Spotify_Data.csv')
+
+
+def test_stratified_sample_keeps_class_shares():
+    from create_visualizations import stratified_sample
+
+    df = pd.DataFrame({'target': np.r_[np.ones(3000), np.zeros(7000)].astype(int)})
+    sample = stratified_sample(df, 1000)
+    assert len(sample) == 1000 and sample['target'].sum() == 300
+    assert stratified_sample(df, 20000) is df
+
+
+def test_headless_render_skips_unchanged_figures(tmp_path):
+    from create_visualizations import FIGURES, main
+
+    args = ['--input', RAW_CSV, '--output-dir', str(tmp_path), '--headless', '--dpi', '40']
+    rendered, skipped = main(args)
+    assert len(rendered) == len(FIGURES) and skipped == []
+    assert all((tmp_path / name).exists() for name, _, _ in FIGURES)
+
+    rendered, skipped = main(args)
+    assert rendered == [] and len(skipped) == len(FIGURES)
+
+    # A new render option invalidates every figure
+    rendered, _ = main(args[:-1] + ['50'])
+    assert len(rendered) == len(FIGURES)
+
+
+def test_help_does_not_import_pandas_or_matplotlib():
+    for script in ('create_visualizations.py', 'create_features.py'):
+        path = os.path.join(ROOT_DIR, 'scripts', script)
+        code = (f"import runpy, sys\nsys.argv = [{path!r}, '--help']\n"
+                f"try:\n    runpy.run_path({path!r}, run_name='__main__')\n"
+                f"except SystemExit:\n    pass\n"
+                f"print(sorted(m for m in ('pandas', 'matplotlib', 'seaborn') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=ROOT_DIR, check=True)
+        assert result.stdout.splitlines()[-1] == '[]', script